@@ -8,11 +8,27 @@ from . import types
 
 # Types
 
-class TNone(types.TMono):
+class _TGround(types.TMono):
+    """
+    A builtin type without parameters. Such a type is immutable,
+    so all of its instances are the same object.
+    """
+
+    def __new__(cls):
+        instance = cls.__dict__.get("_instance")
+        if instance is None:
+            instance = cls._instance = super().__new__(cls)
+        return instance
+
+    def __init__(self, name):
+        if not hasattr(self, "name"):
+            super().__init__(name)
+
+class TNone(_TGround):
     def __init__(self):
         super().__init__("NoneType")
 
-class TBool(types.TMono):
+class TBool(_TGround):
     def __init__(self):
         super().__init__("bool")
 
@@ -38,11 +54,14 @@ class TInt(types.TMono):
     def one():
         return 1
 
+_int32 = TInt(types.TValue(32))
+_int64 = TInt(types.TValue(64))
+
 def TInt32():
-    return TInt(types.TValue(32))
+    return _int32
 
 def TInt64():
-    return TInt(types.TValue(64))
+    return _int64
 
 def _int_printer(typ, printer, depth, max_depth):
     if types.is_var(typ["width"]):
@@ -51,7 +70,7 @@ def _int_printer(typ, printer, depth, max_depth):
         return "numpy.int{}".format(types.get_value(typ.find()["width"]))
 types.TypePrinter.custom_printers["int"] = _int_printer
 
-class TFloat(types.TMono):
+class TFloat(_TGround):
     def __init__(self):
         super().__init__("float")
 
@@ -63,15 +82,15 @@ class TFloat(types.TMono):
     def one():
         return 1.0
 
-class TStr(types.TMono):
+class TStr(_TGround):
     def __init__(self):
         super().__init__("str")
 
-class TBytes(types.TMono):
+class TBytes(_TGround):
     def __init__(self):
         super().__init__("bytes")
 
-class TByteArray(types.TMono):
+class TByteArray(_TGround):
     def __init__(self):
         super().__init__("bytearray")
 
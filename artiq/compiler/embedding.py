@@ -85,14 +85,6 @@ class EmbeddingMap:
                 n += 1
                 new_instance_type.name = "{}.{}".format(new_instance_type.name, n)
 
-    def attribute_count(self):
-        count = 0
-        for host_type in self.type_map:
-            instance_type, constructor_type = self.type_map[host_type]
-            count += len(instance_type.attributes)
-            count += len(constructor_type.attributes)
-        return count
-
     # Functions
     def store_function(self, function, ir_function_name):
         self.function_map[function] = ir_function_name
@@ -135,6 +127,24 @@ class EmbeddingMap:
                           self.object_forward_map.values()))
 
 
+class HostValueList(list):
+    """
+    A list of ``(value, loc)`` pairs of the host objects of a single type
+    that have been quoted. Every object is recorded once, with the location
+    where it was first quoted, so the list grows with the number of distinct
+    objects rather than with the number of times they are referenced.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.value_ids = set()
+
+    def add(self, value, loc):
+        if id(value) not in self.value_ids:
+            self.value_ids.add(id(value))
+            self.append((value, loc))
+
+
 class ASTSynthesizer:
     def __init__(self, embedding_map, value_map, quote_function=None, expanded_from=None):
         self.source = ""
@@ -267,7 +277,7 @@ class ASTSynthesizer:
             unquote_loc = self._add('`')
             loc         = quote_loc.join(unquote_loc)
 
-            self.value_map[module_type].append((value, loc))
+            self.value_map[module_type].add(value, loc)
             return asttyped.QuoteT(value=value, type=module_type, loc=loc)
         else:
             quote_loc   = self._add('`')
@@ -336,11 +346,11 @@ class ASTSynthesizer:
                     instance_type.constant_attributes = value.kernel_invariants
 
             if isinstance(value, type):
-                self.value_map[constructor_type].append((value, loc))
+                self.value_map[constructor_type].add(value, loc)
                 return asttyped.QuoteT(value=value, type=constructor_type,
                                        loc=loc)
             else:
-                self.value_map[instance_type].append((value, loc))
+                self.value_map[instance_type].add(value, loc)
                 return asttyped.QuoteT(value=value, type=instance_type,
                                        loc=loc)
 
@@ -363,7 +373,7 @@ class ASTSynthesizer:
             arg_nodes.append(self.quote(arg))
             if index < len(args) - 1:
                          self._add(", ")
-        if any(args) and any(kwargs):
+        if args and kwargs:
                          self._add(", ")
         for index, kw in enumerate(kwargs):
             arg_loc    = self._add(kw)
@@ -489,6 +499,9 @@ class StitchingInferencer(Inferencer):
         self.value_map = value_map
         self.quote = quote
         self.attr_type_cache = {}
+        self.quoted_type_cache = {}
+        self.attribute_accesses = {}
+        self.unresolved_types = []
 
     def _compute_attr_type(self, object_value, object_type, object_loc, attr_name, loc):
         if not hasattr(object_value, attr_name):
@@ -575,13 +588,26 @@ class StitchingInferencer(Inferencer):
                 {"attr": attr_name},
                 loc)
 
-            with self.engine.context(note):
-                # Slow path. We don't know what exactly is the attribute value,
-                # so we quote it only for the error message that may possibly result.
-                ast = self.quote(attr_value, object_loc.expanded_from)
-                Inferencer(engine=self.engine).visit(ast)
-                IntMonomorphizer(engine=self.engine).visit(ast)
-                attr_value_type = ast.type
+            try:
+                # The same host object is often the value of many attributes
+                # (e.g. a device referenced from several objects); if quoting
+                # it resulted in a type without type variables, we can reuse
+                # that type instead of quoting the object again.
+                _, attr_value_type = self.quoted_type_cache[id(attr_value)]
+            except KeyError:
+                with self.engine.context(note):
+                    # Slow path. We don't know what exactly is the attribute value,
+                    # so we quote it only for the error message that may possibly result.
+                    ast = self.quote(attr_value, object_loc.expanded_from)
+                    Inferencer(engine=self.engine).visit(ast)
+                    IntMonomorphizer(engine=self.engine).visit(ast)
+                    attr_value_type = ast.type
+
+                is_polymorphic = attr_value_type.fold(False,
+                    lambda accum, typ: accum or isinstance(typ, types.TVar))
+                if not is_polymorphic:
+                    # Keep a reference to the value so that its id stays unique.
+                    self.quoted_type_cache[id(attr_value)] = attr_value, attr_value_type
 
         return attributes, attr_value_type
 
@@ -594,7 +620,24 @@ class StitchingInferencer(Inferencer):
         # that we can successfully serialize the value of the attribute we
         # are now adding at the code generation stage.
         object_type = value_node.type.find()
-        for object_value, object_loc in self.value_map[object_type]:
+        if types.is_var(object_type):
+            self.unresolved_types.append(object_type)
+        else:
+            access_key = (object_type, attr_name)
+            if access_key not in self.attribute_accesses:
+                self.attribute_accesses[access_key] = [0, loc]
+            self._unify_attribute_values(object_type, attr_name)
+
+        super()._unify_attribute(result_type, value_node, attr_name, attr_loc, loc)
+
+    def _unify_attribute_values(self, object_type, attr_name):
+        # Every host object only needs to be checked once per attribute; after
+        # that, the type of its attribute is unified with the ARTIQ type.
+        access = self.attribute_accesses[(object_type, attr_name)]
+        checked_count, loc = access
+        object_values = self.value_map[object_type]
+        access[0] = len(object_values)
+        for object_value, object_loc in object_values[checked_count:]:
             attr_type_key = (id(object_value), attr_name)
             try:
                 attributes, attr_value_type = self.attr_type_cache[attr_type_key]
@@ -621,7 +664,20 @@ class StitchingInferencer(Inferencer):
                         object_loc)
                     self.engine.process(diag)
 
-        super()._unify_attribute(result_type, value_node, attr_name, attr_loc, loc)
+    def unify_new_attribute_values(self):
+        """
+        Check every attribute accessed so far on the host objects that were
+        quoted after the access was inferred.
+        """
+        while True:
+            checked = False
+            for object_type, attr_name in list(self.attribute_accesses):
+                checked_count, loc = self.attribute_accesses[(object_type, attr_name)]
+                if checked_count < len(self.value_map[object_type]):
+                    self._unify_attribute_values(object_type, attr_name)
+                    checked = True
+            if not checked:
+                break
 
     def visit_QuoteT(self, node):
         if inspect.ismethod(node.value):
@@ -633,15 +689,28 @@ class StitchingInferencer(Inferencer):
                                     loc=node.loc,
                                     self_loc=node.self_loc)
 
-class TypedtreeHasher(algorithm.Visitor):
+class TypedtreeTypeVarCollector(algorithm.Visitor):
+    """
+    Collects the type variables that remain unresolved anywhere
+    in the types of a typed tree.
+    """
+
+    def __init__(self):
+        self.type_vars = []
+
+    def _collect_type_var(self, accum, typ):
+        if isinstance(typ, types.TVar):
+            self.type_vars.append(typ)
+
     def generic_visit(self, node):
-        def freeze(obj):
+        def collect(obj):
             if isinstance(obj, ast.AST):
-                return self.visit(obj)
+                self.visit(obj)
             elif isinstance(obj, list):
-                return hash(tuple(freeze(elem) for elem in obj))
+                for elem in obj:
+                    collect(elem)
             elif isinstance(obj, types.Type):
-                return hash(obj.find())
+                obj.find().fold(None, self._collect_type_var)
             else:
                 # We don't care; only types change during inference.
                 pass
@@ -649,7 +718,16 @@ class TypedtreeHasher(algorithm.Visitor):
         fields = node._fields
         if hasattr(node, '_types'):
             fields = fields + node._types
-        return hash(tuple(freeze(getattr(node, field_name)) for field_name in fields))
+        for field_name in fields:
+            collect(getattr(node, field_name))
+
+def _is_inference_stale(type_vars):
+    # Unifying a type variable with another one gives inference no new
+    # information; only resolving it does.
+    for type_var in type_vars:
+        if not types.is_var(type_var):
+            return True
+    return False
 
 class Stitcher:
     def __init__(self, core, dmgr, engine=None, print_as_rpc=True):
@@ -675,7 +753,11 @@ class Stitcher:
         self.functions = {}
 
         self.embedding_map = EmbeddingMap()
-        self.value_map = defaultdict(lambda: [])
+        self.value_map = defaultdict(HostValueList)
+
+        # Statistics of the inference fixpoint in finalize().
+        self.inference_passes = 0
+        self.inferred_nodes = 0
 
     def stitch_call(self, function, args, kwargs, callback=None):
         # We synthesize source code for the initial call so that
@@ -689,20 +771,7 @@ class Stitcher:
         inferencer = StitchingInferencer(engine=self.engine,
                                          value_map=self.value_map,
                                          quote=self._quote)
-        typedtree_hasher = TypedtreeHasher()
-
-        # Iterate inference to fixed point.
-        old_typedtree_hash = None
-        old_attr_count = None
-        while True:
-            inferencer.visit(self.typedtree)
-            typedtree_hash = typedtree_hasher.visit(self.typedtree)
-            attr_count = self.embedding_map.attribute_count()
-
-            if old_typedtree_hash == typedtree_hash and old_attr_count == attr_count:
-                break
-            old_typedtree_hash = typedtree_hash
-            old_attr_count = attr_count
+        self._infer(inferencer)
 
         # After we've discovered every referenced attribute, check if any kernel_invariant
         # specifications refers to ones we didn't encounter.
@@ -738,6 +807,40 @@ class Stitcher:
             typing_env=self.globals, globals_in_scope=set(),
             body=self.typedtree, loc=source.Range(source_buffer, 0, 0))
 
+    def _infer(self, inferencer):
+        # Iterate inference to fixed point. Inferring a node may quote new
+        # functions (which get injected into the typed tree) or host objects,
+        # or resolve type variables; only the nodes that are new or that
+        # observed a type variable that got resolved since are inferred again.
+        type_var_dependencies = {}
+        while True:
+            # Host objects quoted while inferring one node may have attributes
+            # accessed by other nodes that were inferred earlier.
+            inferencer.unify_new_attribute_values()
+
+            worklist = [node for node in self.typedtree
+                        if id(node) not in type_var_dependencies or
+                            _is_inference_stale(type_var_dependencies[id(node)])]
+            if not worklist:
+                break
+
+            self.inference_passes += 1
+            self.inferred_nodes += len(worklist)
+            for node in worklist:
+                # A type variable may be observed while it is still unresolved
+                # and get resolved later while inferring the same node (e.g.
+                # the type of the self argument of a method), so the type
+                # variables unresolved before inference are dependencies, too.
+                collector = TypedtreeTypeVarCollector()
+                collector.visit(node)
+
+                inferencer.unresolved_types = []
+                inferencer.visit(node)
+
+                collector.visit(node)
+                type_var_dependencies[id(node)] = \
+                    collector.type_vars + inferencer.unresolved_types
+
     def _inject(self, node):
         self.typedtree.insert(self.inject_at, node)
         self.inject_at += 1
@@ -997,10 +1100,11 @@ class Stitcher:
         else:
             assert False
 
-        is_async = False
-        if hasattr(host_function, "artiq_embedded") and \
-                "async" in host_function.artiq_embedded.flags:
-            is_async = True
+        is_async = is_batch = False
+        if hasattr(host_function, "artiq_embedded"):
+            # batched RPCs are asynchronous as well
+            is_batch = "batch" in host_function.artiq_embedded.flags
+            is_async = is_batch or "async" in host_function.artiq_embedded.flags
 
         if not builtins.is_none(ret_type) and is_async:
             note = diagnostic.Diagnostic("note",
@@ -1014,7 +1118,7 @@ class Stitcher:
 
         function_type = types.TRPC(ret_type,
                                    service=self.embedding_map.store_object(host_function),
-                                   async=is_async)
+                                   async=is_async, batch=is_batch)
         self.functions[function] = function_type
         return function_type
 
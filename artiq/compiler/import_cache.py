@@ -1,3 +1,15 @@
+"""
+Keeps the source of the modules that may contain ARTIQ kernels as it was
+when they were imported, so that the compiler sees the same code as the
+interpreter even if the files are modified later.
+
+To keep imports fast, only the contents of the file are read at import time;
+they are decoded and split into lines the first time they are requested
+through :mod:`linecache`, which is what the compiler uses to find the source
+of kernels.
+"""
+
+import io
 import sys
 import builtins
 import linecache
@@ -15,6 +27,7 @@ logger = logging.getLogger(__name__)
 
 
 cache = dict()
+pending = dict()
 im_exec_module = None
 linecache_getlines = None
 
@@ -28,18 +41,35 @@ def hook_exec_module(self, module):
                  or (getattr(module, "portable", None) is portable))):
         fn = module.__file__
         try:
-            with tokenize.open(fn) as fp:
-                lines = fp.readlines()
-            if lines and not lines[-1].endswith("\n"):
-                lines[-1] += "\n"
-            cache[fn] = lines
+            with open(fn, "rb") as fp:
+                pending[fn] = fp.read()
         except:
             logger.warning("failed to add '%s' to cache", fn, exc_info=True)
         else:
+            cache.pop(fn, None)
             logger.debug("added '%s' to cache", fn)
 
 
+def _decode_pending(fn):
+    source = pending.pop(fn)
+    try:
+        # Decode the same way as tokenize.open().
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+        with io.TextIOWrapper(io.BytesIO(source), encoding,
+                              line_buffering=True) as fp:
+            lines = fp.readlines()
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        cache[fn] = lines
+    except:
+        logger.warning("failed to decode '%s' from cache", fn, exc_info=True)
+    else:
+        logger.debug("decoded '%s' from cache", fn)
+
+
 def hook_getlines(filename, module_globals=None):
+    if filename in pending:
+        _decode_pending(filename)
     if filename in cache:
         return cache[filename]
     else:
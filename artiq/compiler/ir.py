@@ -44,6 +44,8 @@ class Value:
     :ivar uses: (list of :class:`Value`) values that use this value
     """
 
+    __slots__ = ("uses", "type")
+
     def __init__(self, typ):
         self.uses, self.type = set(), typ.find()
 
@@ -54,15 +56,38 @@ class Value:
     def __str__(self):
         return self.as_entity(type_printer=types.TypePrinter())
 
+class _UntrackedUses(frozenset):
+    """
+    An always empty set of uses, for values whose uses are not tracked.
+    """
+
+    __slots__ = ()
+
+    def add(self, user):
+        pass
+
+    def remove(self, user):
+        pass
+
+    def discard(self, user):
+        pass
+
+_untracked_uses = _UntrackedUses()
+
 class Constant(Value):
     """
     A constant value.
 
+    Constants are never replaced, so their uses are not tracked;
+    large kernels contain a great many of them.
+
     :ivar value: (Python object) value
     """
 
+    __slots__ = ("value",)
+
     def __init__(self, value, typ):
-        super().__init__(typ)
+        self.uses, self.type = _untracked_uses, typ.find()
         self.value = value
 
     def as_operand(self, type_printer):
@@ -90,6 +115,8 @@ class NamedValue(Value):
     :ivar function: (:class:`Function`) function containing this value
     """
 
+    __slots__ = ("name", "function")
+
     def __init__(self, typ, name):
         super().__init__(typ)
         self.name, self.function = name, None
@@ -123,16 +150,19 @@ class User(NamedValue):
     :ivar operands: (list of :class:`Value`) operands of this value
     """
 
+    __slots__ = ("operands",)
+
     def __init__(self, operands, typ, name):
         super().__init__(typ, name)
         self.operands = []
         self.set_operands(operands)
 
     def set_operands(self, new_operands):
-        for operand in set(self.operands):
-            operand.uses.remove(self)
+        # An operand may occur several times; it is only used once.
+        for operand in self.operands:
+            operand.uses.discard(self)
         self.operands = new_operands
-        for operand in set(self.operands):
+        for operand in new_operands:
             operand.uses.add(self)
 
     def drop_references(self):
@@ -156,6 +186,8 @@ class Instruction(User):
         source location
     """
 
+    __slots__ = ("basic_block", "loc")
+
     def __init__(self, operands, typ, name=""):
         assert isinstance(operands, list)
         assert isinstance(typ, types.Type)
@@ -227,6 +259,8 @@ class Phi(Instruction):
     directly reading :attr:`operands` or calling :meth:`set_operands`.
     """
 
+    __slots__ = ()
+
     def __init__(self, typ, name=""):
         super().__init__([], typ, name)
 
@@ -294,6 +328,8 @@ class Terminator(Instruction):
     An SSA instruction that performs control flow.
     """
 
+    __slots__ = ()
+
     def successors(self):
         return [operand for operand in self.operands if isinstance(operand, BasicBlock)]
 
@@ -304,6 +340,8 @@ class BasicBlock(NamedValue):
     :ivar instructions: (list of :class:`Instruction`)
     """
 
+    __slots__ = ("instructions",)
+
     def __init__(self, instructions, name=""):
         super().__init__(TBasicBlock(), name)
         self.instructions = []
@@ -411,6 +449,8 @@ class Argument(NamedValue):
     A function argument.
     """
 
+    __slots__ = ()
+
     def as_entity(self, type_printer):
         return self.as_operand(type_printer)
 
@@ -431,6 +471,9 @@ class Function:
         Flag ``fast-math`` is the equivalent of gcc's ``-ffast-math``.
     """
 
+    __slots__ = ("type", "name", "loc", "names", "arguments", "basic_blocks",
+                 "next_name", "is_internal", "is_cold", "is_generated", "flags")
+
     def __init__(self, typ, name, arguments, loc=None):
         self.type, self.name, self.loc = typ, name, loc
         self.names, self.arguments, self.basic_blocks = set(), [], []
@@ -567,6 +610,8 @@ class EnvironmentArgument(Argument):
     A function argument specifying an outer environment.
     """
 
+    __slots__ = ()
+
     def as_operand(self, type_printer):
         return "environment(...) %{}".format(escape_name(self.name))
 
@@ -576,6 +621,8 @@ class Alloc(Instruction):
     the type of the intsruction.
     """
 
+    __slots__ = ()
+
     def __init__(self, operands, typ, name=""):
         for operand in operands: assert isinstance(operand, Value)
         super().__init__(operands, typ, name)
@@ -598,6 +645,8 @@ class GetLocal(Instruction):
     :ivar var_name: (string) variable name
     """
 
+    __slots__ = ("var_name",)
+
     """
     :param env: (:class:`Value`) local environment
     :param var_name: (string) local variable name
@@ -628,6 +677,8 @@ class SetLocal(Instruction):
     :ivar var_name: (string) variable name
     """
 
+    __slots__ = ("var_name",)
+
     """
     :param env: (:class:`Value`) local environment
     :param var_name: (string) local variable name
@@ -664,6 +715,8 @@ class GetAttr(Instruction):
     :ivar attr: (string) variable name
     """
 
+    __slots__ = ("attr",)
+
     """
     :param obj: (:class:`Value`) object or tuple
     :param attr: (string or integer) attribute or index
@@ -701,6 +754,8 @@ class SetAttr(Instruction):
     :ivar attr: (string) variable name
     """
 
+    __slots__ = ("attr",)
+
     """
     :param obj: (:class:`Value`) object or tuple
     :param attr: (string or integer) attribute
@@ -736,6 +791,8 @@ class GetElem(Instruction):
     An intruction that loads an element from a list.
     """
 
+    __slots__ = ()
+
     """
     :param lst: (:class:`Value`) list
     :param index: (:class:`Value`) index
@@ -759,6 +816,8 @@ class SetElem(Instruction):
     An intruction that stores an element into a list.
     """
 
+    __slots__ = ()
+
     """
     :param lst: (:class:`Value`) list
     :param index: (:class:`Value`) index
@@ -788,6 +847,8 @@ class Coerce(Instruction):
     A coercion operation for numbers.
     """
 
+    __slots__ = ()
+
     def __init__(self, value, typ, name=""):
         assert isinstance(value, Value)
         assert isinstance(typ, types.Type)
@@ -806,6 +867,8 @@ class Arith(Instruction):
     :ivar op: (:class:`pythonparser.ast.operator`) operation
     """
 
+    __slots__ = ("op",)
+
     """
     :param op: (:class:`pythonparser.ast.operator`) operation
     :param lhs: (:class:`Value`) left-hand operand
@@ -840,6 +903,8 @@ class Compare(Instruction):
     :ivar op: (:class:`pythonparser.ast.cmpop`) operation
     """
 
+    __slots__ = ("op",)
+
     """
     :param op: (:class:`pythonparser.ast.cmpop`) operation
     :param lhs: (:class:`Value`) left-hand operand
@@ -875,6 +940,8 @@ class Builtin(Instruction):
     :ivar op: (string) operation name
     """
 
+    __slots__ = ("op",)
+
     """
     :param op: (string) operation name
     """
@@ -901,6 +968,8 @@ class Closure(Instruction):
     :ivar target_function: (:class:`Function`) function to invoke
     """
 
+    __slots__ = ("target_function",)
+
     """
     :param func: (:class:`Function`) function
     :param env: (:class:`Value`) outer environment
@@ -935,6 +1004,8 @@ class Call(Instruction):
         the callee function is cold
     """
 
+    __slots__ = ("arg_exprs", "static_target_function", "is_cold")
+
     """
     :param func: (:class:`Value`) function to call
     :param args: (list of :class:`Value`) function arguments
@@ -977,6 +1048,8 @@ class Select(Instruction):
     A conditional select instruction.
     """
 
+    __slots__ = ()
+
     """
     :param cond: (:class:`Value`) select condition
     :param if_true: (:class:`Value`) value of select if condition is truthful
@@ -1009,6 +1082,8 @@ class Quote(Instruction):
     :ivar value: (string) operation name
     """
 
+    __slots__ = ("value",)
+
     """
     :param value: (string) operation name
     """
@@ -1029,6 +1104,8 @@ class Branch(Terminator):
     An unconditional branch instruction.
     """
 
+    __slots__ = ()
+
     """
     :param target: (:class:`BasicBlock`) branch target
     """
@@ -1052,6 +1129,8 @@ class BranchIf(Terminator):
     A conditional branch instruction.
     """
 
+    __slots__ = ()
+
     """
     :param cond: (:class:`Value`) branch condition
     :param if_true: (:class:`BasicBlock`) branch target if condition is truthful
@@ -1082,6 +1161,8 @@ class IndirectBranch(Terminator):
     An indirect branch instruction.
     """
 
+    __slots__ = ()
+
     """
     :param target: (:class:`Value`) branch target
     :param destinations: (list of :class:`BasicBlock`) all possible values of `target`
@@ -1114,6 +1195,8 @@ class Return(Terminator):
     A return instruction.
     """
 
+    __slots__ = ()
+
     """
     :param value: (:class:`Value`) return value
     """
@@ -1132,6 +1215,8 @@ class Unreachable(Terminator):
     An instruction used to mark unreachable branches.
     """
 
+    __slots__ = ()
+
     """
     :param target: (:class:`BasicBlock`) branch target
     """
@@ -1146,6 +1231,8 @@ class Raise(Terminator):
     A raise instruction.
     """
 
+    __slots__ = ()
+
     """
     :param value: (:class:`Value`) exception value
     :param exn: (:class:`BasicBlock` or None) exceptional target
@@ -1173,6 +1260,8 @@ class Reraise(Terminator):
     A reraise instruction.
     """
 
+    __slots__ = ()
+
     """
     :param exn: (:class:`BasicBlock` or None) exceptional target
     """
@@ -1202,6 +1291,8 @@ class Invoke(Terminator):
         the callee function is cold
     """
 
+    __slots__ = ("arg_exprs", "static_target_function", "is_cold")
+
     """
     :param func: (:class:`Value`) function to call
     :param args: (list of :class:`Value`) function arguments
@@ -1267,6 +1358,8 @@ class LandingPad(Terminator):
         exception types corresponding to the basic block operands
     """
 
+    __slots__ = ("types",)
+
     def __init__(self, cleanup, name=""):
         super().__init__([cleanup], builtins.TException(), name)
         self.types = []
@@ -1311,6 +1404,8 @@ class Delay(Terminator):
     :ivar interval: (:class:`iodelay.Expr`) expression
     """
 
+    __slots__ = ("interval",)
+
     """
     :param interval: (:class:`iodelay.Expr`) expression
     :param call: (:class:`Call` or ``Constant(None, builtins.TNone())``)
@@ -1364,6 +1459,8 @@ class Loop(Terminator):
         expression for trip count
     """
 
+    __slots__ = ("trip_count",)
+
     """
     :param trip_count: (:class:`iodelay.Expr`) expression
     :param indvar: (:class:`Phi`)
@@ -1413,6 +1510,8 @@ class Interleave(Terminator):
     in parallel.
     """
 
+    __slots__ = ()
+
     def __init__(self, destinations, name=""):
         super().__init__(destinations, builtins.TNone(), name)
 
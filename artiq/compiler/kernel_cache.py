@@ -0,0 +1,200 @@
+"""
+The :class:`KernelCache` class implements a persistent, content-addressed
+on-disk cache of linked kernel libraries.
+
+Kernels are keyed by the LLVM IR emitted by the ARTIQ compiler together with
+the target and the versions of ARTIQ, LLVM and binutils. The LLVM IR is produced after embedding, so
+it captures the experiment source (including the line information used for
+backtraces) as well as every host value and device database entry
+that the kernel refers to; the stages that follow it (optimization,
+code generation, linking and stripping) depend on nothing else and are skipped
+on a cache hit.
+
+The cache has a size limit; when it is exceeded, the least recently used
+kernels are evicted.
+
+The cache is only used when ``ARTIQ_KERNEL_CACHE`` names its directory, and
+it is bypassed while the output of one of the skipped stages is being dumped
+(``ARTIQ_DUMP_UNOPT_LLVM``, ``ARTIQ_DUMP_LLVM``, ``ARTIQ_DUMP_ASM``,
+``ARTIQ_DUMP_OBJ`` or ``ARTIQ_DUMP_ELF``).
+"""
+
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import subprocess
+
+from llvmlite_artiq import __version__ as llvmlite_version
+
+from artiq import __version__ as artiq_version
+
+
+logger = logging.getLogger(__name__)
+
+
+_binutils_versions = {}
+
+# Environment variables requesting a dump of the output of a stage that is
+# skipped on a cache hit.
+_dump_variables = ["ARTIQ_DUMP_UNOPT_LLVM", "ARTIQ_DUMP_LLVM",
+                   "ARTIQ_DUMP_ASM", "ARTIQ_DUMP_OBJ", "ARTIQ_DUMP_ELF"]
+
+# Temporary files older than this, in seconds, were left behind by an
+# interrupted store.
+_stale_temp_age = 3600
+
+
+def _binutils_version(triple):
+    """Return the version banner of the linker for ``triple``, or an empty
+    string if it cannot be run."""
+    try:
+        return _binutils_versions[triple]
+    except KeyError:
+        pass
+    try:
+        output = subprocess.check_output([triple + "-ld", "--version"],
+                                         stderr=subprocess.DEVNULL)
+        version = output.decode("utf-8").split("\n")[0]
+    except (OSError, subprocess.CalledProcessError):
+        version = ""
+    _binutils_versions[triple] = version
+    return version
+
+
+class KernelCache:
+    """
+    :param directory: directory where the cached kernels are stored.
+        It is created when the first kernel is stored.
+    :param size_limit: maximum total size of the cached kernels, in bytes.
+    """
+    def __init__(self, directory, size_limit=256*1024*1024):
+        self.directory = directory
+        self.size_limit = size_limit
+
+    @staticmethod
+    def key(target, llvm_irs):
+        """Compute the cache key of the kernel compiled for ``target`` from
+        the textual LLVM IR of its modules ``llvm_irs``."""
+        hasher = hashlib.sha256()
+        for item in [artiq_version, llvmlite_version,
+                     _binutils_version(target.triple),
+                     target.triple, target.data_layout] + target.features:
+            hasher.update(item.encode("utf-8"))
+            hasher.update(b"\0")
+        for llvm_ir in llvm_irs:
+            hasher.update(llvm_ir.encode("utf-8"))
+            hasher.update(b"\0")
+        return hasher.hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key):
+        """Return the ``(library, stripped_library)`` pair stored under
+        ``key``, or ``None`` if there is no such entry."""
+        try:
+            with open(self._path(key, ".elf"), "rb") as f:
+                library = f.read()
+            with open(self._path(key, ".stripped.elf"), "rb") as f:
+                stripped_library = f.read()
+        except FileNotFoundError:
+            return None
+
+        # Mark the entry as recently used.
+        for suffix in (".elf", ".stripped.elf"):
+            try:
+                os.utime(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+        logger.debug("kernel cache hit: %s", key)
+        return library, stripped_library
+
+    def put(self, key, library, stripped_library):
+        """Store a kernel under ``key`` and evict the least recently used
+        kernels if the cache has grown over its size limit."""
+        os.makedirs(self.directory, exist_ok=True)
+        # The stripped library is written last and read last, so that a
+        # concurrent reader never observes a half-written entry.
+        for suffix, data in ((".elf", library),
+                             (".stripped.elf", stripped_library)):
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, self._path(key, suffix))
+            except:
+                os.unlink(temp_path)
+                raise
+        logger.debug("kernel cache store: %s", key)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used kernels until the total size of
+        the cache is within its limit, as well as temporary files left
+        behind by an interrupted :meth:`put`."""
+        now = time.time()
+        entries = {}
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith(".tmp"):
+                if now - stat.st_mtime > _stale_temp_age:
+                    self._unlink(entry.path)
+                continue
+            if not entry.name.endswith(".elf"):
+                continue
+            # Both files of an entry are evicted together.
+            key = entry.name.split(".")[0]
+            mtime, paths, size = entries.get(key, (0, [], 0))
+            entries[key] = (max(mtime, stat.st_mtime), paths + [entry.path],
+                            size + stat.st_size)
+
+        total_size = sum(size for mtime, paths, size in entries.values())
+        for mtime, key in sorted((entries[key][0], key) for key in entries):
+            if total_size <= self.size_limit:
+                break
+            _, paths, size = entries[key]
+            for path in paths:
+                self._unlink(path)
+            total_size -= size
+            logger.debug("kernel cache evict: %s", key)
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def dump_requested():
+    """Return ``True`` if the environment requests a dump of the output of
+    a stage that is skipped on a cache hit, in which case the cache should be
+    bypassed."""
+    return any(os.getenv(variable) is not None for variable in _dump_variables)
+
+
+def default_kernel_cache():
+    """Return the kernel cache configured through the environment, or ``None``
+    if it is disabled.
+
+    ``ARTIQ_KERNEL_CACHE`` selects the cache directory; the cache is disabled
+    if it is unset or empty. ``ARTIQ_KERNEL_CACHE_SIZE`` sets the size limit
+    in MiB (default: 256).
+    """
+    directory = os.getenv("ARTIQ_KERNEL_CACHE")
+    if not directory:
+        return None
+
+    size = os.getenv("ARTIQ_KERNEL_CACHE_SIZE", "256")
+    try:
+        size_limit = int(size)*1024*1024
+    except ValueError:
+        logger.warning("invalid ARTIQ_KERNEL_CACHE_SIZE %r, using 256 MiB",
+                       size)
+        size_limit = 256*1024*1024
+    return KernelCache(directory, size_limit)
@@ -10,7 +10,7 @@ string and infers types for it using a trivial :module:`prelude`.
 
 import os
 from pythonparser import source, diagnostic, parse_buffer
-from . import prelude, types, transforms, analyses, validators
+from . import prelude, types, transforms, analyses, validators, profiler
 
 class Source:
     def __init__(self, source_buffer, engine=None):
@@ -40,7 +40,8 @@ class Source:
             return cls(source.Buffer(f.read(), filename, 1), engine=engine)
 
 class Module:
-    def __init__(self, src, ref_period=1e-6, attribute_writeback=True, remarks=False):
+    def __init__(self, src, ref_period=1e-6, attribute_writeback=True, remarks=False,
+                 profile_hook=None):
         self.attribute_writeback = attribute_writeback
         self.engine = src.engine
         self.embedding_map = src.embedding_map
@@ -64,21 +65,82 @@ class Module:
         interleaver = transforms.Interleaver(engine=self.engine)
         invariant_detection = analyses.InvariantDetection(engine=self.engine)
 
-        cast_monomorphizer.visit(src.typedtree)
-        int_monomorphizer.visit(src.typedtree)
-        inferencer.visit(src.typedtree)
-        monomorphism_validator.visit(src.typedtree)
-        escape_validator.visit(src.typedtree)
-        iodelay_estimator.visit_fixpoint(src.typedtree)
-        constness_validator.visit(src.typedtree)
-        devirtualization.visit(src.typedtree)
-        self.artiq_ir = artiq_ir_generator.visit(src.typedtree)
-        artiq_ir_generator.annotate_calls(devirtualization)
-        dead_code_eliminator.process(self.artiq_ir)
-        interleaver.process(self.artiq_ir)
-        local_access_validator.process(self.artiq_ir)
+        def profile(stage):
+            return profiler.profile(profile_hook, stage)
+
+        # Counting is only worth it if someone is looking at the counters,
+        # and is done outside of the profiled stages. The tree and the IR
+        # are counted again before every stage, since the stages before it
+        # may have changed them.
+        def count_nodes():
+            if profile_hook is None:
+                return 0
+            return profiler.count_nodes(src.typedtree)
+
+        def count_instructions():
+            if profile_hook is None:
+                return 0
+            return profiler.count_instructions(self.artiq_ir)
+
+        nodes = count_nodes()
+        with profile("Cast monomorphization") as counters:
+            counters["nodes"] = nodes
+            cast_monomorphizer.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("Integer monomorphization") as counters:
+            counters["nodes"] = nodes
+            int_monomorphizer.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("Type inference") as counters:
+            counters["nodes"] = nodes
+            inferencer.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("Monomorphism validation") as counters:
+            counters["nodes"] = nodes
+            monomorphism_validator.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("Escape validation") as counters:
+            counters["nodes"] = nodes
+            escape_validator.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("I/O delay estimation") as counters:
+            counters["nodes"] = nodes
+            iodelay_estimator.visit_fixpoint(src.typedtree)
+            counters["iterations"] = iodelay_estimator.iterations
+        nodes = count_nodes()
+        with profile("Constness validation") as counters:
+            counters["nodes"] = nodes
+            constness_validator.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("Devirtualization") as counters:
+            counters["nodes"] = nodes
+            devirtualization.visit(src.typedtree)
+        nodes = count_nodes()
+        with profile("ARTIQ IR generation") as counters:
+            counters["nodes"] = nodes
+            self.artiq_ir = artiq_ir_generator.visit(src.typedtree)
+            artiq_ir_generator.annotate_calls(devirtualization)
+            counters["functions"] = len(self.artiq_ir)
+
+        instructions = count_instructions()
+        with profile("Dead code elimination") as counters:
+            counters["instructions"] = instructions
+            dead_code_eliminator.process(self.artiq_ir)
+
+        instructions = count_instructions()
+        with profile("Interleaving") as counters:
+            counters["instructions"] = instructions
+            interleaver.process(self.artiq_ir)
+
+        instructions = count_instructions()
+        with profile("Local access validation") as counters:
+            counters["instructions"] = instructions
+            local_access_validator.process(self.artiq_ir)
         if remarks:
-            invariant_detection.process(self.artiq_ir)
+            instructions = count_instructions()
+            with profile("Invariant detection") as counters:
+                counters["instructions"] = instructions
+                invariant_detection.process(self.artiq_ir)
 
     def build_llvm_ir(self, target):
         """Compile the module to LLVM IR for the specified target."""
@@ -0,0 +1,117 @@
+"""
+The :mod:`profiler` module measures the time spent in each stage of
+the compiler pipeline.
+
+Compiler entry points accept a ``profile_hook``, which is called as
+``profile_hook(stage, seconds, **counters)`` after each stage completes;
+the counters are stage-specific, e.g. the number of AST nodes or ARTIQ IR
+instructions processed, or the number of fixpoint iterations.
+:class:`ProfileReport` is a hook that collects these calls into
+a report that can be printed or saved as JSON.
+
+Setting the ``ARTIQ_COMPILER_PROFILE`` environment variable to
+a file name makes :meth:`artiq.coredevice.core.Core.compile`
+append the report of every compiled kernel to that file,
+as one JSON object per line.
+"""
+
+import os, time, json
+from collections import OrderedDict
+from contextlib import contextmanager
+from pythonparser import ast
+
+
+@contextmanager
+def profile(profile_hook, stage):
+    """
+    Report the time spent in the ``with`` block to ``profile_hook``.
+
+    The ``with`` statement binds a dictionary; the counters stored
+    in it are passed to ``profile_hook`` as keyword arguments.
+    """
+    counters = OrderedDict()
+    if profile_hook is None:
+        yield counters
+        return
+
+    start = time.perf_counter()
+    yield counters
+    profile_hook(stage, time.perf_counter() - start, **counters)
+
+
+def count_nodes(node):
+    """Return the number of AST nodes in the tree rooted at ``node``."""
+    count, worklist = 0, [node]
+    while worklist:
+        node = worklist.pop()
+        if isinstance(node, list):
+            worklist.extend(node)
+        elif isinstance(node, ast.AST):
+            count += 1
+            worklist.extend(getattr(node, field) for field in node._fields)
+    return count
+
+
+def count_instructions(functions):
+    """Return the number of ARTIQ IR instructions in ``functions``."""
+    return sum(len(block.instructions)
+               for function in functions
+               for block in function.basic_blocks)
+
+
+class ProfileReport:
+    """
+    A ``profile_hook`` that records every stage it is called with.
+
+    :param profile_hook: (callable or None)
+        If set, every call is forwarded to it as well.
+    :var stages: (list of :class:`collections.OrderedDict`)
+        Stages in the order of completion; each has the ``stage``
+        and ``seconds`` keys followed by the counters.
+    """
+
+    def __init__(self, profile_hook=None):
+        self.profile_hook = profile_hook
+        self.stages = []
+
+    def __call__(self, stage, seconds, **counters):
+        entry = OrderedDict([("stage", stage), ("seconds", seconds)])
+        entry.update(sorted(counters.items()))
+        self.stages.append(entry)
+        if self.profile_hook is not None:
+            self.profile_hook(stage, seconds, **counters)
+
+    def total(self):
+        """Return the total time spent in all recorded stages, in seconds."""
+        return sum(entry["seconds"] for entry in self.stages)
+
+    def format(self):
+        """Return the report as a human-readable table."""
+        lines = []
+        for entry in self.stages:
+            counters = ", ".join("{}={}".format(key, value)
+                                 for key, value in entry.items()
+                                 if key not in ("stage", "seconds"))
+            lines.append("{:<45} {:9.2f} ms  {}".format(
+                entry["stage"], entry["seconds"]*1000, counters).rstrip())
+        lines.append("{:<45} {:9.2f} ms".format("Total", self.total()*1000))
+        return "\n".join(lines)
+
+    def to_json(self, **metadata):
+        """Return the report as a JSON object; ``metadata`` is included
+        at the top level, e.g. to identify the kernel."""
+        report = OrderedDict(sorted(metadata.items()))
+        report["total_seconds"] = self.total()
+        report["stages"] = self.stages
+        return json.dumps(report)
+
+    def save(self, filename, **metadata):
+        """Append the report to ``filename`` as a single line of JSON."""
+        with open(filename, "a") as f:
+            f.write(self.to_json(**metadata) + "\n")
+
+
+def default_report_filename():
+    """Return the file configured through ``ARTIQ_COMPILER_PROFILE``,
+    or ``None`` if profile reports are not saved."""
+    return os.getenv("ARTIQ_COMPILER_PROFILE") or None
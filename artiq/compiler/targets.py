@@ -1,5 +1,6 @@
 import os, sys, tempfile, subprocess
-from artiq.compiler import types
+from concurrent.futures import ProcessPoolExecutor
+from artiq.compiler import types, profiler
 from llvmlite_artiq import ir as ll, binding as llvm
 
 llvm.initialize()
@@ -7,9 +8,10 @@ llvm.initialize_all_targets()
 llvm.initialize_all_asmprinters()
 
 class RunTool:
-    def __init__(self, pattern, **tempdata):
+    def __init__(self, pattern, stdin=None, **tempdata):
         self.files = []
         self.pattern = pattern
+        self.stdin = stdin
         self.tempdata = tempdata
 
     def maketemp(self, data):
@@ -30,8 +32,9 @@ class RunTool:
         for argument in self.pattern:
             cmdline.append(argument.format(**tempnames))
 
-        process = subprocess.Popen(cmdline, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = process.communicate()
+        process = subprocess.Popen(cmdline, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate(self.stdin)
         if process.returncode != 0:
             raise Exception("{} invocation failed: {}".
                             format(cmdline[0], stderr.decode('utf-8')))
@@ -57,6 +60,16 @@ def _dump(target, kind, suffix, content):
         file.close()
         print("{} dumped as {}".format(kind, file.name), file=sys.stderr)
 
+def _assemble_llvm_ir(target, llvm_ir, profile):
+    # Runs in a worker process. LLVM modules cannot be pickled, so they
+    # cross the process boundary as textual IR and relocatable objects.
+    # The stages are timed here and reported by the parent process.
+    stages = []
+    if profile:
+        target.profile_hook = lambda stage, seconds, **counters: \
+            stages.append((stage, seconds, counters))
+    return target.assemble(target.optimize_llvm_ir(llvm_ir)), stages
+
 class Target:
     """
     A description of the target environment where the binaries
@@ -71,6 +84,9 @@ class Target:
     :var print_function: (string)
         Name of a formatted print functions (with the signature of ``printf``)
         provided by the target, e.g. ``"printf"``.
+    :var profile_hook: (callable or None)
+        If set, called as ``profile_hook(stage, seconds, **counters)`` after each
+        compilation stage completes, e.g. ``("LLVM optimization", 0.12)``.
     """
     triple = "unknown"
     data_layout = ""
@@ -80,14 +96,34 @@ class Target:
 
     def __init__(self):
         self.llcontext = ll.Context()
+        self.profile_hook = None
+        self._llmachine = None
+
+    def __getstate__(self):
+        # Only the description of the target is sent to worker processes;
+        # LLVM objects and the profile hook stay in this process.
+        state = dict(self.__dict__)
+        del state["llcontext"], state["profile_hook"], state["_llmachine"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.llcontext = ll.Context()
+        self.profile_hook = None
+        self._llmachine = None
+
+    def profile(self, stage):
+        """Report the time spent in the ``with`` block to :attr:`profile_hook`."""
+        return profiler.profile(self.profile_hook, stage)
 
     def target_machine(self):
-        lltarget = llvm.Target.from_triple(self.triple)
-        llmachine = lltarget.create_target_machine(
-                        features=",".join(["+{}".format(f) for f in self.features]),
-                        reloc="pic", codemodel="default")
-        llmachine.set_asm_verbosity(True)
-        return llmachine
+        if self._llmachine is None:
+            lltarget = llvm.Target.from_triple(self.triple)
+            self._llmachine = lltarget.create_target_machine(
+                            features=",".join(["+{}".format(f) for f in self.features]),
+                            reloc="pic", codemodel="default")
+            self._llmachine.set_asm_verbosity(True)
+        return self._llmachine
 
     def optimize(self, llmodule):
         llpassmgr = llvm.create_module_pass_manager()
@@ -120,8 +156,8 @@ class Target:
 
         llpassmgr.run(llmodule)
 
-    def compile(self, module):
-        """Compile the module to a relocatable object for this target."""
+    def generate_llvm_ir(self, module):
+        """Generate unoptimized textual LLVM IR for the module."""
 
         if os.getenv("ARTIQ_DUMP_SIG"):
             print("====== MODULE_SIGNATURE DUMP ======", file=sys.stderr)
@@ -131,19 +167,31 @@ class Target:
         _dump(os.getenv("ARTIQ_DUMP_IR"), "ARTIQ IR", ".txt",
               lambda: "\n".join(fn.as_entity(type_printer) for fn in module.artiq_ir))
 
-        llmod = module.build_llvm_ir(self)
+        with self.profile("LLVM IR generation"):
+            llmod = module.build_llvm_ir(self)
+            # llvmlite can only hand a module over to LLVM as text;
+            # serialize it exactly once.
+            return str(llmod)
 
-        try:
-            llparsedmod = llvm.parse_assembly(str(llmod))
-            llparsedmod.verify()
-        except RuntimeError:
-            _dump("", "LLVM IR (broken)", ".ll", lambda: str(llmod))
-            raise
+    def compile(self, module):
+        """Compile the module to an optimized LLVM module for this target."""
+        return self.optimize_llvm_ir(self.generate_llvm_ir(module))
+
+    def optimize_llvm_ir(self, llvm_ir):
+        """Parse, verify and optimize textual LLVM IR."""
+        with self.profile("LLVM IR parsing"):
+            try:
+                llparsedmod = llvm.parse_assembly(llvm_ir)
+                llparsedmod.verify()
+            except RuntimeError:
+                _dump("", "LLVM IR (broken)", ".ll", lambda: llvm_ir)
+                raise
 
         _dump(os.getenv("ARTIQ_DUMP_UNOPT_LLVM"), "LLVM IR (generated)", "_unopt.ll",
               lambda: str(llparsedmod))
 
-        self.optimize(llparsedmod)
+        with self.profile("LLVM optimization"):
+            self.optimize(llparsedmod)
 
         _dump(os.getenv("ARTIQ_DUMP_LLVM"), "LLVM IR (optimized)", ".ll",
               lambda: str(llparsedmod))
@@ -156,18 +204,22 @@ class Target:
         _dump(os.getenv("ARTIQ_DUMP_ASM"), "Assembly", ".s",
               lambda: llmachine.emit_assembly(llmodule))
 
+        with self.profile("LLVM machine code emission"):
+            llobject = llmachine.emit_object(llmodule)
+
         _dump(os.getenv("ARTIQ_DUMP_OBJ"), "Object file", ".o",
-              lambda: llmachine.emit_object(llmodule))
+              lambda: llobject)
 
-        return llmachine.emit_object(llmodule)
+        return llobject
 
     def link(self, objects):
         """Link the relocatable objects into a shared library for this target."""
-        with RunTool([self.triple + "-ld", "-shared", "--eh-frame-hdr"] +
-                     ["{{obj{}}}".format(index) for index in range(len(objects))] +
-                     ["-o", "{output}"],
-                     output=b"",
-                     **{"obj{}".format(index): obj for index, obj in enumerate(objects)}) \
+        with self.profile("Linking"), \
+                RunTool([self.triple + "-ld", "-shared", "--eh-frame-hdr"] +
+                        ["{{obj{}}}".format(index) for index in range(len(objects))] +
+                        ["-o", "{output}"],
+                        output=b"",
+                        **{"obj{}".format(index): obj for index, obj in enumerate(objects)}) \
                 as results:
             library = results["output"].read()
 
@@ -176,12 +228,42 @@ class Target:
 
             return library
 
-    def compile_and_link(self, modules):
-        return self.link([self.assemble(self.compile(module)) for module in modules])
+    def assemble_modules(self, modules, jobs=None):
+        """
+        Compile the modules to relocatable objects for this target.
+
+        If there is more than one module, the LLVM optimization and machine
+        code emission stages run in a pool of ``jobs`` worker processes
+        (by default, one per CPU); ``jobs=1`` compiles sequentially.
+        """
+        if len(modules) > 1 and jobs != 1:
+            llvm_irs = [self.generate_llvm_ir(module) for module in modules]
+            # Only the stages timed in the workers are reported; the wall
+            # time of the pool would count them a second time.
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(_assemble_llvm_ir,
+                                            [self] * len(llvm_irs), llvm_irs,
+                                            [self.profile_hook is not None] * len(llvm_irs)))
+            objects = []
+            for llobject, stages in results:
+                objects.append(llobject)
+                for stage, seconds, counters in stages:
+                    self.profile_hook(stage, seconds, **counters)
+            return objects
+        else:
+            return [self.assemble(self.compile(module)) for module in modules]
+
+    def compile_and_link(self, modules, jobs=None):
+        """
+        Compile and link the modules into a shared library for this target.
+        See :meth:`assemble_modules` for the meaning of ``jobs``.
+        """
+        return self.link(self.assemble_modules(modules, jobs))
 
     def strip(self, library):
-        with RunTool([self.triple + "-strip", "--strip-debug", "{library}", "-o", "{output}"],
-                     library=library, output=b"") \
+        with self.profile("Stripping"), \
+                RunTool([self.triple + "-strip", "--strip-debug", "{library}", "-o", "{output}"],
+                        library=library, output=b"") \
                 as results:
             return results["output"].read()
 
@@ -195,7 +277,8 @@ class Target:
         # the backtrace entry should point at.
         offset_addresses = [hex(addr - 1) for addr in addresses]
         with RunTool([self.triple + "-addr2line", "--addresses",  "--functions", "--inlines",
-                      "--demangle", "--exe={library}"] + offset_addresses,
+                      "--demangle", "--exe={library}"],
+                     stdin="\n".join(offset_addresses).encode("utf-8"),
                      library=library) \
                 as results:
             lines = iter(results["__stdout__"].rstrip().split("\n"))
@@ -221,7 +304,8 @@ class Target:
             return backtrace
 
     def demangle(self, names):
-        with RunTool([self.triple + "-c++filt"] + names) as results:
+        with RunTool([self.triple + "-c++filt"],
+                     stdin="\n".join(names).encode("utf-8")) as results:
             return results["__stdout__"].rstrip().split("\n")
 
 class NativeTarget(Target):
@@ -2,6 +2,7 @@ import sys, os
 from pythonparser import diagnostic
 from ..module import Module, Source
 from ..targets import OR1KTarget
+from ..profiler import ProfileReport
 from . import benchmark
 
 def main():
@@ -33,5 +34,12 @@ def main():
     benchmark(lambda: OR1KTarget().compile_and_link([module]),
               "LLVM optimization and linking")
 
+    report = ProfileReport()
+    target = OR1KTarget()
+    target.profile_hook = report
+    module = Module(Source.from_string(code, filename), profile_hook=report)
+    target.compile_and_link([module])
+    print(report.format())
+
 if __name__ == "__main__":
     main()
@@ -68,5 +68,15 @@ def main():
     benchmark(lambda: target.strip(elf_shlib),
               "Stripping debug information")
 
+    benchmark(lambda: target.strip(target.compile_and_link([Module(embed())])),
+              "Combined embedding, compilation and linking")
+
+    modules = [module] * 8
+    benchmark(lambda: target.assemble_modules(modules, jobs=1),
+              "LLVM optimization and emission of {} modules, sequential".format(len(modules)))
+
+    benchmark(lambda: target.assemble_modules(modules),
+              "LLVM optimization and emission of {} modules, parallel".format(len(modules)))
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,58 @@
+import sys
+from pythonparser import diagnostic
+from ..module import Source
+from ..transforms import IODelayEstimator
+from . import benchmark
+
+
+def synthesize_module(depth):
+    # Every function calls the one defined after it, so that the delay of
+    # each function only becomes known after that of its callee.
+    lines = []
+    for level in range(depth):
+        lines += [
+            "def f{}(n):".format(level),
+            "    delay_mu(n)",
+        ]
+        if level < depth - 1:
+            lines.append("    f{}(n)".format(level + 1))
+        lines.append("")
+    lines.append("f0(1)")
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) == 2:
+        depth = int(sys.argv[1])
+    elif len(sys.argv) == 1:
+        depth = 200
+    else:
+        print("Expected either no arguments or a call chain depth", file=sys.stderr)
+        exit(1)
+
+    def process_diagnostic(diag):
+        print("\n".join(diag.render()), file=sys.stderr)
+        if diag.level in ("fatal", "error"):
+            exit(1)
+
+    engine = diagnostic.Engine()
+    engine.process = process_diagnostic
+
+    code = synthesize_module(depth)
+
+    def parse():
+        return Source.from_string(code, "perf_iodelay.py", engine=engine)
+
+    def estimate():
+        iodelay_estimator = IODelayEstimator(engine=engine, ref_period=1e-6)
+        iodelay_estimator.visit_fixpoint(parse().typedtree)
+        return iodelay_estimator
+
+    print("{} iterations over a call chain of depth {}".format(
+            estimate().iterations, depth))
+
+    benchmark(parse, "ARTIQ parsing and inference")
+    benchmark(estimate, "ARTIQ parsing, inference and I/O delay estimation")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import sys, gc, tracemalloc
+from pythonparser import diagnostic
+from ..module import Module, Source
+from .. import transforms
+from . import benchmark
+
+
+def synthesize_kernel(n_pulses):
+    # Straight-line code, as if unrolled by hand; the timeline is set with
+    # at_mu() rather than delayed, so that the basic blocks do not get split.
+    lines = [
+        "def entrypoint():",
+        "    t = now_mu()",
+    ]
+    for pulse in range(n_pulses):
+        lines += [
+            "    at_mu(t + {})".format(pulse * 8),
+            "    rtio_log(\"ttl\", {})".format(pulse),
+        ]
+    lines += [
+        "",
+        "entrypoint()",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) == 2:
+        n_pulses = int(sys.argv[1])
+    elif len(sys.argv) == 1:
+        n_pulses = 10000
+    else:
+        print("Expected either no arguments or a pulse count", file=sys.stderr)
+        exit(1)
+
+    def process_diagnostic(diag):
+        print("\n".join(diag.render()), file=sys.stderr)
+        if diag.level in ("fatal", "error"):
+            exit(1)
+
+    engine = diagnostic.Engine()
+    engine.process = process_diagnostic
+
+    source = Source.from_string(synthesize_kernel(n_pulses), "perf_ir.py", engine=engine)
+    module = Module(source)
+    n_insns = sum(len(list(func.instructions())) for func in module.artiq_ir)
+    del module
+
+    def process():
+        artiq_ir_generator = transforms.ARTIQIRGenerator(engine=engine,
+                                                         module_name=source.name,
+                                                         ref_period=1e-6)
+        dead_code_eliminator = transforms.DeadCodeEliminator(engine=engine)
+        interleaver = transforms.Interleaver(engine=engine)
+
+        artiq_ir = artiq_ir_generator.visit(source.typedtree)
+        dead_code_eliminator.process(artiq_ir)
+        interleaver.process(artiq_ir)
+        return artiq_ir
+
+    gc.collect()
+    tracemalloc.start()
+    artiq_ir = process()
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del artiq_ir
+
+    print("{} ARTIQ IR instructions: {:.1f} MiB allocated, {:.1f} MiB peak".format(
+            n_insns, size / 1024 / 1024, peak / 1024 / 1024))
+
+    benchmark(process, "ARTIQ IR generation, dead code elimination and interleaving "
+                       "({} pulses)".format(n_pulses))
+
+if __name__ == "__main__":
+    main()
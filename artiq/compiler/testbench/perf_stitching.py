@@ -0,0 +1,90 @@
+import sys, os, tempfile
+from ...tools import file_import
+from ...coredevice.core import Core
+from ..embedding import Stitcher
+from . import benchmark
+
+
+def synthesize_experiment(n_devices, n_methods):
+    lines = [
+        "from artiq.language.core import *",
+        "",
+        "class Device:",
+        "    kernel_invariants = {'core', 'channel'}",
+        "",
+        "    def __init__(self, core, channel):",
+        "        self.core = core",
+        "        self.channel = channel",
+        "        self.count = 0",
+        "",
+        "    @kernel",
+        "    def pulse(self, duration):",
+        "        delay_mu(duration)",
+        "        self.count += 1",
+        "",
+        "class Benchmark:",
+        "    def __init__(self, core, devices):",
+        "        self.core = core",
+        "        self.devices = devices",
+        "        for index, device in enumerate(devices):",
+        "            setattr(self, 'device{}'.format(index), device)",
+        "",
+        "    @kernel",
+        "    def run(self):",
+    ]
+    for method in range(n_methods):
+        lines.append("        self.method{}()".format(method))
+    for method in range(n_methods):
+        lines += [
+            "",
+            "    @kernel",
+            "    def method{}(self):".format(method),
+        ]
+        for offset in range(3):
+            device = (method * 7 + offset * 131) % n_devices
+            lines.append("        self.device{}.pulse({})".format(device, 100 + offset))
+        lines.append("        self.devices[{}].pulse(100)".format(method % n_devices))
+    return "\n".join(lines) + "\n"
+
+
+class _DeviceManager:
+    def __init__(self):
+        self.core = Core(self, host=None, ref_period=1e-9)
+
+    def get(self, name):
+        assert name == "core"
+        return self.core
+
+
+def main():
+    if len(sys.argv) == 3:
+        n_devices, n_methods = int(sys.argv[1]), int(sys.argv[2])
+    elif len(sys.argv) == 1:
+        n_devices, n_methods = 500, 200
+    else:
+        print("Expected either no arguments or device and kernel method counts",
+              file=sys.stderr)
+        exit(1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "synthetic_experiment.py")
+        with open(filename, "w") as f:
+            f.write(synthesize_experiment(n_devices, n_methods))
+        module = file_import(filename)
+
+        dmgr = _DeviceManager()
+        devices = [module.Device(dmgr.core, channel) for channel in range(n_devices)]
+        experiment = module.Benchmark(dmgr.core, devices)
+
+        def embed():
+            stitcher = Stitcher(core=dmgr.core, dmgr=dmgr)
+            stitcher.stitch_call(experiment.run, (), {})
+            stitcher.finalize()
+            return stitcher
+
+        benchmark(embed,
+                  "ARTIQ embedding ({} devices, {} kernel methods)".format(
+                      n_devices, n_methods))
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,8 @@ from pythonparser import ast, algorithm, diagnostic
 from .. import types, iodelay, builtins, asttyped
 
 class _UnknownDelay(Exception):
-    pass
+    def __init__(self, delay):
+        self.delay = delay
 
 class _IndeterminateDelay(Exception):
     def __init__(self, cause):
@@ -18,7 +19,7 @@ class IODelayEstimator(algorithm.Visitor):
     def __init__(self, engine, ref_period):
         self.engine         = engine
         self.ref_period     = ref_period
-        self.changed        = False
+        self.iterations     = 0
         self.current_delay  = iodelay.Const(0)
         self.current_args   = None
         self.current_goto   = None
@@ -78,22 +79,45 @@ class IODelayEstimator(algorithm.Visitor):
         raise _IndeterminateDelay(diag)
 
     def visit_fixpoint(self, node):
-        while True:
-            self.changed = False
-            self.visit(node)
-            if not self.changed:
-                return
-
-    def visit_ModuleT(self, node):
+        # A top-level statement that calls a function whose delay is not known
+        # yet is estimated again only once that delay becomes known; estimating
+        # it any earlier would stop at the same call. Statements that were
+        # estimated completely are never visited again, since the delays of
+        # the functions they call cannot change anymore.
+        self.iterations = 0
+        worklist, waiting = node.body, []
+        while worklist:
+            self.iterations += 1
+            for stmt in worklist:
+                delay = self.visit_toplevel(stmt)
+                if delay is not None:
+                    waiting.append((stmt, delay))
+
+            worklist = [stmt for stmt, delay in waiting if not types.is_var(delay)]
+            waiting  = [(stmt, delay) for stmt, delay in waiting if types.is_var(delay)]
+
+    def visit_toplevel(self, stmt):
+        """
+        Estimate the delays of the functions in a top-level statement.
+
+        :return: (:class:`types.TVar` or None) the unknown delay of a function
+            called in ``stmt``, if the estimation had to stop there
+        """
+        self.current_delay  = iodelay.Const(0)
+        self.current_args   = None
+        self.current_goto   = None
+        self.current_return = None
         try:
-            for stmt in node.body:
-                try:
-                    self.visit(stmt)
-                except _UnknownDelay:
-                    pass # more luck next time?
+            self.visit(stmt)
+        except _UnknownDelay as error:
+            return error.delay # more luck next time?
         except _IndeterminateDelay:
             pass # we don't care; module-level code is never interleaved
 
+    def visit_ModuleT(self, node):
+        for stmt in node.body:
+            self.visit_toplevel(stmt)
+
     def visit_function(self, args, body, typ, loc):
         old_args, self.current_args = self.current_args, args
         old_return, self.current_return = self.current_return, None
@@ -118,10 +142,7 @@ class IODelayEstimator(algorithm.Visitor):
             return
 
         try:
-            old_delay = typ.delay.find()
             typ.delay.unify(delay)
-            if typ.delay.find() != old_delay:
-                self.changed = True
         except types.UnificationError as e:
             printer = types.TypePrinter()
             diag = diagnostic.Diagnostic("fatal",
@@ -293,7 +314,7 @@ class IODelayEstimator(algorithm.Visitor):
             else:
                 delay = typ.find().delay.find()
                 if types.is_var(delay):
-                    raise _UnknownDelay()
+                    raise _UnknownDelay(delay)
                 elif delay.is_indeterminate():
                     note = diagnostic.Diagnostic("note",
                         "function called here", {},
@@ -323,5 +344,8 @@ class IODelayEstimator(algorithm.Visitor):
         else:
             call_delay = iodelay.Const(0)
 
-        self.current_delay += call_delay
+        if not iodelay.is_zero(call_delay):
+            # Don't build a deeply nested expression from zero delays in
+            # straight-line code with many calls.
+            self.current_delay += call_delay
         node.iodelay = call_delay
@@ -344,6 +344,8 @@ class LLVMIRGenerator:
             llty = ll.FunctionType(llvoid, [lli32, llsliceptr, llptrptr])
         elif name == "rpc_send_async":
             llty = ll.FunctionType(llvoid, [lli32, llsliceptr, llptrptr])
+        elif name == "rpc_send_batch":
+            llty = ll.FunctionType(llvoid, [lli32, llsliceptr, llptrptr])
         elif name == "rpc_recv":
             llty = ll.FunctionType(lli32, [llptr])
         elif name == "now":
@@ -359,7 +361,7 @@ class LLVMIRGenerator:
             llglobal = ll.Function(self.llmodule, llty, name)
             if name in ("__artiq_raise", "__artiq_reraise", "llvm.trap"):
                 llglobal.attributes.add("noreturn")
-            if name in ("rtio_log", "rpc_send", "rpc_send_async",
+            if name in ("rtio_log", "rpc_send", "rpc_send_async", "rpc_send_batch",
                         "watchdog_set", "watchdog_clear",
                         self.target.print_function):
                 llglobal.attributes.add("nounwind")
@@ -1245,7 +1247,10 @@ class LLVMIRGenerator:
             llargptr = self.llbuilder.gep(llargs, [ll.Constant(lli32, index)])
             self.llbuilder.store(llargslot, llargptr)
 
-        if fun_type.async:
+        if fun_type.batch:
+            self.llbuilder.call(self.llbuiltin("rpc_send_batch"),
+                                [llservice, lltagptr, llargs])
+        elif fun_type.async:
             self.llbuilder.call(self.llbuiltin("rpc_send_async"),
                                 [llservice, lltagptr, llargs])
         else:
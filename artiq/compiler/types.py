@@ -50,11 +50,13 @@ class TVar(Type):
     A type variable.
 
     In effect, the classic union-find data structure is intrusively
-    folded into this class.
+    folded into this class. Unifying two type variables links the root
+    of the smaller tree (by rank) to the root of the larger one.
     """
 
     def __init__(self):
         self.parent = self
+        self.rank = 0
 
     def find(self):
         if self.parent is self:
@@ -82,11 +84,18 @@ class TVar(Type):
 
     def unify(self, other):
         other = other.find()
-
-        if self.parent is self:
-            self.parent = other
+        root = self.find()
+
+        if root is other:
+            return
+        elif root.__class__ != TVar:
+            root.unify(other)
+        elif other.__class__ == TVar and other.rank < root.rank:
+            other.parent = root
         else:
-            self.find().unify(other)
+            if other.__class__ == TVar and other.rank == root.rank:
+                other.rank += 1
+            root.parent = other
 
     def fold(self, accum, fn):
         if self.parent is self:
@@ -145,7 +154,8 @@ class TMono(Type):
         return self.params[param]
 
     def __eq__(self, other):
-        return isinstance(other, TMono) and \
+        return self is other or \
+                isinstance(other, TMono) and \
                 self.name == other.name and \
                 _map_find(self.params) == _map_find(other.params)
 
@@ -188,7 +198,8 @@ class TTuple(Type):
         return "artiq.compiler.types.TTuple(%s)" % repr(self.elts)
 
     def __eq__(self, other):
-        return isinstance(other, TTuple) and \
+        return self is other or \
+                isinstance(other, TTuple) and \
                 _map_find(self.elts) == _map_find(other.elts)
 
     def __ne__(self, other):
@@ -312,13 +323,15 @@ class TRPC(Type):
         return type
     :ivar service: (int) RPC service number
     :ivar async: (bool) whether the RPC blocks until return
+    :ivar batch: (bool) whether the core device may buffer an async RPC
+        and send it together with later ones
     """
 
     attributes = OrderedDict()
 
-    def __init__(self, ret, service, async=False):
+    def __init__(self, ret, service, async=False, batch=False):
         assert isinstance(ret, Type)
-        self.ret, self.service, self.async = ret, service, async
+        self.ret, self.service, self.async, self.batch = ret, service, async, batch
 
     def find(self):
         return self
@@ -326,7 +339,8 @@ class TRPC(Type):
     def unify(self, other):
         if isinstance(other, TRPC) and \
                 self.service == other.service and \
-                self.async == other.async:
+                self.async == other.async and \
+                self.batch == other.batch:
             self.ret.unify(other.ret)
         elif isinstance(other, TVar):
             other.unify(self)
@@ -343,7 +357,8 @@ class TRPC(Type):
     def __eq__(self, other):
         return isinstance(other, TRPC) and \
                 self.service == other.service and \
-                self.async == other.async
+                self.async == other.async and \
+                self.batch == other.batch
 
     def __ne__(self, other):
         return not (self == other)
@@ -734,6 +749,7 @@ class TypePrinter(object):
                 return signature
         elif isinstance(typ, TRPC):
             return "[rpc{} #{}](...)->{}".format(typ.service,
+                                                 " batch" if typ.batch else
                                                  " async" if typ.async else "",
                                                  self.name(typ.ret, depth + 1))
         elif isinstance(typ, TBuiltinFunction):
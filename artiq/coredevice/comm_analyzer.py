@@ -1,5 +1,5 @@
 from operator import itemgetter
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from itertools import count
 from contextlib import contextmanager
 from enum import Enum
@@ -7,6 +7,8 @@ import struct
 import logging
 import socket
 
+import numpy
+
 
 logger = logging.getLogger(__name__)
 
@@ -34,18 +36,83 @@ class ExceptionType(Enum):
     i_overflow = 0b100001
 
 
+class AnalyzerDumpStream:
+    """Retrieves the analyzer dump from the core device as it arrives.
+
+    The dump header is read when the stream is created; its fields
+    are available as :attr:`log_channel` and :attr:`dds_onehot_sel`.
+    The messages are then retrieved either with :meth:`blocks`, which
+    yields them in blocks while they are received, or with :meth:`read`.
+    """
+    def __init__(self, host, port=1382):
+        self.socket = socket.create_connection((host, port))
+        try:
+            self.header = bytearray(_header_size)
+            self._receive_into(memoryview(self.header))
+            (self.sent_bytes, self.log_channel,
+             self.dds_onehot_sel) = _decode_header(self.header)
+        except:
+            self.close()
+            raise
+
+    def close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _receive_into(self, view):
+        while view:
+            n = self.socket.recv_into(view)
+            if not n:
+                raise ValueError("analyzer dump is truncated")
+            view = view[n:]
+
+    def read(self):
+        """Receive the rest of the dump and return all of it, including
+        the header, as a bytearray."""
+        dump = bytearray(_header_size + self.sent_bytes)
+        dump[:_header_size] = self.header
+        self._receive_into(memoryview(dump)[_header_size:])
+        return dump
+
+    def blocks(self, fileobj=None, block_size=2048):
+        """Receive the messages of the dump and yield them as
+        :class:`MessageArray` blocks of up to ``block_size`` messages,
+        as soon as they are received.
+
+        :param fileobj: If set, the raw dump is also written to this file,
+            so that it can be saved without keeping it in memory.
+        """
+        if fileobj is not None:
+            fileobj.write(self.header)
+        buf = bytearray(32*block_size)
+        view = memoryview(buf)
+        remaining = self.sent_bytes
+        pending = 0
+        while remaining:
+            n = self.socket.recv_into(view[pending:pending+remaining])
+            if not n:
+                raise ValueError("analyzer dump is truncated")
+            if fileobj is not None:
+                fileobj.write(view[pending:pending+n])
+            pending += n
+            remaining -= n
+
+            complete = pending - pending % 32
+            if complete:
+                # copy the messages out, since the buffer is reused
+                yield MessageArray.from_bytes(buf[:complete])
+                buf[:pending-complete] = buf[complete:pending]
+                pending -= complete
+
+
 def get_analyzer_dump(host, port=1382):
-    sock = socket.create_connection((host, port))
-    try:
-        r = bytes()
-        while True:
-            buf = sock.recv(8192)
-            if not buf:
-                break
-            r += buf
-    finally:
-        sock.close()
-    return r
+    with AnalyzerDumpStream(host, port) as stream:
+        return stream.read()
 
 
 OutputMessage = namedtuple(
@@ -85,33 +152,179 @@ def decode_message(data):
         raise ValueError
 
 
+# Layout of the 32-byte messages in an analyzer dump. Exception messages
+# store the exception type in the last byte of the address field, and
+# stopped messages only use the rtio_counter field.
+message_dtype = numpy.dtype([
+    ("data", ">u8"),
+    ("address", ">u4"),
+    ("rtio_counter", ">u8"),
+    ("timestamp", ">u8"),
+    ("message_type_channel", ">u4"),
+])
+assert message_dtype.itemsize == 32
+
+
+class MessageArray:
+    """Sequence of analyzer messages backed by a NumPy structured array
+    of :data:`message_dtype` records.
+
+    Indexing and iterating yield the same named tuples as
+    :func:`decode_message`; they are only created on demand. The fields
+    of all messages are available as NumPy arrays, e.g. :attr:`timestamp`,
+    for vectorized processing, and :meth:`select` and :meth:`of_type`
+    return the subset of messages matching a mask.
+    """
+    def __init__(self, records):
+        self.records = records
+
+    @classmethod
+    def from_bytes(cls, data, count=-1):
+        """Create a message array viewing ``count`` messages (all by
+        default) in ``data`` without copying it."""
+        return cls(numpy.frombuffer(data, message_dtype, count))
+
+    @classmethod
+    def from_messages(cls, messages):
+        """Create a message array from a sequence of message named tuples,
+        as returned by :func:`decode_message`."""
+        return cls.from_bytes(b"".join(map(_encode_message, messages)))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MessageArray(self.records[index])
+        return decode_message(self.records[index].tobytes())
+
+    def __iter__(self):
+        block_size = 4096
+        for start in range(0, len(self), block_size):
+            block = self[start:start+block_size]
+            yield from map(_make_message,
+                           block.message_type.tolist(),
+                           block.channel.tolist(),
+                           block.timestamp.tolist(),
+                           block.rtio_counter.tolist(),
+                           block.address.tolist(),
+                           block.data.tolist())
+
+    def select(self, mask):
+        """Return the messages for which ``mask`` is true."""
+        return MessageArray(self.records[mask])
+
+    def of_type(self, message_type):
+        """Return the messages of the :class:`MessageType` ``message_type``."""
+        return self.select(self.message_type == message_type.value)
+
+    @property
+    def message_type(self):
+        return (self.records["message_type_channel"] & 0b11).astype(numpy.uint8)
+
+    @property
+    def channel(self):
+        return (self.records["message_type_channel"] >> 2).astype(numpy.uint32)
+
+    @property
+    def timestamp(self):
+        return self.records["timestamp"].astype(numpy.uint64)
+
+    @property
+    def rtio_counter(self):
+        return self.records["rtio_counter"].astype(numpy.uint64)
+
+    @property
+    def address(self):
+        return self.records["address"].astype(numpy.uint32)
+
+    @property
+    def data(self):
+        return self.records["data"].astype(numpy.uint64)
+
+    @property
+    def exception_type(self):
+        return (self.records["address"] & 0xff).astype(numpy.uint8)
+
+    @property
+    def time(self):
+        """The timestamps of output and input messages, and the RTIO
+        counter values of the others; see :func:`get_message_time`."""
+        return numpy.where(self.message_type <= _input_type,
+                           self.timestamp, self.rtio_counter)
+
+
+_output_type = MessageType.output.value
+_input_type = MessageType.input.value
+_exception_type = MessageType.exception.value
+
+
+def _make_message(message_type, channel, timestamp, rtio_counter,
+                  address, data):
+    if message_type == _output_type:
+        return OutputMessage(channel, timestamp, rtio_counter, address, data)
+    elif message_type == _input_type:
+        return InputMessage(channel, timestamp, rtio_counter, data)
+    elif message_type == _exception_type:
+        return ExceptionMessage(channel, rtio_counter,
+                                ExceptionType(address & 0xff))
+    else:
+        return StoppedMessage(rtio_counter)
+
+
+def _encode_message(message):
+    if isinstance(message, OutputMessage):
+        return struct.pack(">QIQQI", message.data, message.address,
+                           message.rtio_counter, message.timestamp,
+                           (message.channel << 2) | _output_type)
+    elif isinstance(message, InputMessage):
+        return struct.pack(">QIQQI", message.data, 0,
+                           message.rtio_counter, message.timestamp,
+                           (message.channel << 2) | _input_type)
+    elif isinstance(message, ExceptionMessage):
+        return struct.pack(">QIQQI", 0, message.exception_type.value,
+                           message.rtio_counter, 0,
+                           (message.channel << 2) | _exception_type)
+    elif isinstance(message, StoppedMessage):
+        return struct.pack(">QIQQI", 0, 0, message.rtio_counter, 0,
+                           MessageType.stopped.value)
+    else:
+        raise TypeError("{!r} is not an analyzer message".format(message))
+
+
 DecodedDump = namedtuple(
     "DecodedDump", "log_channel dds_onehot_sel messages")
 
 
-def decode_dump(data):
-    parts = struct.unpack(">IQbbb", data[:15])
+_header_size = 15
+
+
+def _decode_header(header):
+    parts = struct.unpack(">IQbbb", header[:_header_size])
     (sent_bytes, total_byte_count,
      overflow_occured, log_channel, dds_onehot_sel) = parts
 
-    expected_len = sent_bytes + 15
-    if expected_len != len(data):
-        raise ValueError("analyzer dump has incorrect length "
-                         "(got {}, expected {})".format(
-                            len(data), expected_len))
     if overflow_occured:
         logger.warning("analyzer FIFO overflow occured, "
                        "some messages have been lost")
     if total_byte_count > sent_bytes:
         logger.info("analyzer ring buffer has wrapped %d times",
                     total_byte_count//sent_bytes)
+    return sent_bytes, log_channel, bool(dds_onehot_sel)
+
+
+def decode_dump(data):
+    sent_bytes, log_channel, dds_onehot_sel = _decode_header(data)
+
+    expected_len = sent_bytes + _header_size
+    if expected_len != len(data):
+        raise ValueError("analyzer dump has incorrect length "
+                         "(got {}, expected {})".format(
+                            len(data), expected_len))
 
-    position = 15
-    messages = []
-    for _ in range(sent_bytes//32):
-        messages.append(decode_message(data[position:position+32]))
-        position += 32
-    return DecodedDump(log_channel, bool(dds_onehot_sel), messages)
+    messages = MessageArray.from_bytes(memoryview(data)[_header_size:],
+                                       sent_bytes//32)
+    return DecodedDump(log_channel, dds_onehot_sel, messages)
 
 
 def vcd_codes():
@@ -141,30 +354,52 @@ class VCDChannel:
         self.set_value("{:064b}".format(integer_cast))
 
 
+def _format_doubles(x):
+    # Vectorized set_value_double formatting: the IEEE 754 bit patterns
+    # of the array of doubles x, as strings.
+    octets = numpy.ascontiguousarray(x, dtype=">f8").view(numpy.uint8)
+    bits = numpy.unpackbits(octets).reshape(-1, 64) + ord("0")
+    return bits.view("S64")[:, 0].astype(str).tolist()
+
+
 class VCDManager:
-    def __init__(self, fileobj):
-        self.out = fileobj
+    """Writes a VCD file.
+
+    Output is buffered and written to ``fileobj`` in batches of time
+    steps; :meth:`flush` must be called after the last value change.
+    """
+    def __init__(self, fileobj, buffer_size=4096):
+        self.fileobj = fileobj
+        self.buffer = []
+        self.buffer_size = buffer_size
+        self.write = self.buffer.append
         self.codes = vcd_codes()
         self.current_time = None
 
+    def flush(self):
+        self.fileobj.write("".join(self.buffer))
+        self.buffer.clear()
+
     def set_timescale_ps(self, timescale):
-        self.out.write("$timescale {}ps $end\n".format(round(timescale)))
+        self.write("$timescale {}ps $end\n".format(round(timescale)))
 
     def get_channel(self, name, width):
         code = next(self.codes)
-        self.out.write("$var wire {width} {code} {name} $end\n"
-                       .format(name=name, code=code, width=width))
-        return VCDChannel(self.out, code)
+        self.write("$var wire {width} {code} {name} $end\n"
+                   .format(name=name, code=code, width=width))
+        return VCDChannel(self, code)
 
     @contextmanager
     def scope(self, name):
-        self.out.write("$scope module {} $end\n".format(name))
+        self.write("$scope module {} $end\n".format(name))
         yield
-        self.out.write("$upscope $end\n")
+        self.write("$upscope $end\n")
 
     def set_time(self, time):
         if time != self.current_time:
-            self.out.write("#{}\n".format(time))
+            if len(self.buffer) >= self.buffer_size:
+                self.flush()
+            self.write("#{}\n".format(time))
             self.current_time = time
 
 
@@ -468,34 +703,172 @@ def decoded_dump_to_vcd(fileobj, devices, dump):
         logger.warning("unable to determine DDS sysclk")
         dds_sysclk = 3e9  # guess
 
-    if isinstance(dump.messages[-1], StoppedMessage):
-        messages = dump.messages[:-1]
+    messages = dump.messages
+    if not isinstance(messages, MessageArray):
+        messages = MessageArray.from_messages(messages)
+    if messages.message_type[-1] == MessageType.stopped.value:
+        messages = messages[:-1]
     else:
         logger.warning("StoppedMessage missing")
-        messages = dump.messages
-    messages = sorted(messages, key=get_message_time)
+    # stable, like sorting by get_message_time
+    times = messages.time.astype(numpy.int64)
+    order = numpy.argsort(times, kind="mergesort")
+    messages, times = messages.select(order), times[order]
 
     channel_handlers = create_channel_handlers(
         vcd_manager, devices, ref_period,
         dds_sysclk, dump.dds_onehot_sel)
-    vcd_log_channels = get_vcd_log_channels(dump.log_channel, messages)
+    log_messages = messages.select(
+        (messages.message_type == MessageType.output.value) &
+        (messages.channel == dump.log_channel))
+    vcd_log_channels = get_vcd_log_channels(dump.log_channel, log_messages)
     channel_handlers[dump.log_channel] = LogHandler(
         vcd_manager, vcd_log_channels)
     slack = vcd_manager.get_channel("rtio_slack", 64)
 
     vcd_manager.set_time(0)
-    start_time = 0
-    for m in messages:
-        start_time = get_message_time(m)
-        if start_time:
-            break
-
-    for message in messages:
-        if message.channel in channel_handlers:
-            t = get_message_time(message) - start_time
-            if t >= 0:
-                vcd_manager.set_time(t)
-            channel_handlers[message.channel].process_message(message)
-            if isinstance(message, OutputMessage):
-                slack.set_value_double(
-                    (message.timestamp - message.rtio_counter)*ref_period)
+    nonzero_times = numpy.flatnonzero(times)
+    if len(nonzero_times):
+        times -= times[nonzero_times[0]]
+
+    handled = ((messages.message_type != MessageType.stopped.value) &
+               numpy.in1d(messages.channel, list(channel_handlers)))
+    messages, times = messages.select(handled), times[handled].tolist()
+    is_output = (messages.message_type == MessageType.output.value).tolist()
+    slack_values = _format_doubles(
+        (messages.timestamp.astype(numpy.int64) -
+         messages.rtio_counter.astype(numpy.int64))*ref_period)
+
+    for message, t, output, slack_value in zip(messages, times, is_output,
+                                               slack_values):
+        if t >= 0:
+            vcd_manager.set_time(t)
+        channel_handlers[message.channel].process_message(message)
+        if output:
+            slack.set_value(slack_value)
+    vcd_manager.flush()
+
+
+def get_channel_names(devices):
+    """Return a dictionary of the device names of RTIO channels, from
+    the device database ``devices``."""
+    names = dict()
+    for name, desc in sorted(devices.items(), key=itemgetter(0)):
+        if isinstance(desc, dict) and desc["type"] == "local":
+            arguments = desc.get("arguments", {})
+            if desc["module"] == "artiq.coredevice.dds":
+                channel = arguments.get("bus_channel")
+            else:
+                channel = arguments.get("channel")
+            if isinstance(channel, int):
+                names.setdefault(channel, []).append(name)
+    return {channel: "/".join(channel_names)
+            for channel, channel_names in names.items()}
+
+
+def dump_statistics(dump, ref_period=1e-9, channel_names={},
+                    slack_threshold=1e-6):
+    """Compute per-channel statistics of the messages in an analyzer dump.
+
+    Slack is the time between the RTIO counter at the moment an output
+    event was submitted, and its timestamp; the lower it is, the closer
+    the channel is to an underflow.
+
+    :param dump: A :class:`DecodedDump`.
+    :param ref_period: The RTIO clock period, in seconds.
+    :param channel_names: A dictionary of channel names, as returned by
+        :func:`get_channel_names`.
+    :param slack_threshold: Output events with less slack than this, in
+        seconds, are counted as ``low_slack``.
+    :return: A list with one dictionary per channel, ordered by channel.
+        Times and slack are in seconds and rates in Hz; fields that
+        cannot be computed are ``None``.
+    """
+    messages = dump.messages
+    if not isinstance(messages, MessageArray):
+        messages = MessageArray.from_messages(messages)
+    messages = messages.select(
+        messages.message_type != MessageType.stopped.value)
+
+    # group the messages by channel, keeping them in order
+    order = numpy.argsort(messages.channel, kind="mergesort")
+    messages = messages.select(order)
+    channels = messages.channel
+    boundaries = numpy.flatnonzero(numpy.diff(channels)) + 1
+    starts = [0] + boundaries.tolist()
+    stops = boundaries.tolist() + [len(messages)]
+
+    statistics = []
+    for start, stop in zip(starts, stops):
+        if start == stop:
+            continue
+        channel = int(channels[start])
+        channel_messages = messages[start:stop]
+        message_type = channel_messages.message_type
+        is_output = message_type == MessageType.output.value
+        is_event = message_type <= MessageType.input.value
+        events = channel_messages.timestamp[is_event].astype(numpy.int64)
+        slack = (channel_messages.timestamp[is_output].astype(numpy.int64) -
+                 channel_messages.rtio_counter[is_output].astype(numpy.int64)
+                 )*ref_period
+        exception_types, exception_counts = numpy.unique(
+            channel_messages.exception_type[
+                message_type == MessageType.exception.value],
+            return_counts=True)
+
+        if channel == dump.log_channel:
+            name = "rtio_log"
+        else:
+            name = channel_names.get(channel)
+        entry = OrderedDict([
+            ("channel", channel),
+            ("name", name),
+            ("outputs", int(numpy.count_nonzero(is_output))),
+            ("inputs", len(events) - int(numpy.count_nonzero(is_output))),
+            ("rate", None),
+            ("min_slack", None),
+            ("p1_slack", None),
+            ("median_slack", None),
+            ("low_slack", int(numpy.count_nonzero(slack < slack_threshold))),
+            ("exceptions", OrderedDict(
+                (ExceptionType(exception_type).name, count)
+                for exception_type, count in zip(exception_types.tolist(),
+                                                 exception_counts.tolist())))
+        ])
+        if len(events) > 1:
+            span = (events.max() - events.min())*ref_period
+            if span > 0:
+                entry["rate"] = (len(events) - 1)/span
+        if len(slack):
+            entry["min_slack"] = float(slack.min())
+            entry["p1_slack"], entry["median_slack"] = \
+                numpy.percentile(slack, [1, 50]).tolist()
+        statistics.append(entry)
+    return statistics
+
+
+def format_statistics(statistics):
+    """Format the result of :func:`dump_statistics` as a table."""
+    def number(value, scale=1, fmt="{:.1f}"):
+        if value is None:
+            return "-"
+        return fmt.format(value*scale)
+
+    lines = ["{:>7} {:<20} {:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>9}  {}"
+             .format("channel", "name", "outputs", "inputs", "rate/kHz",
+                     "min/ns", "p1/ns", "median/ns", "low slack",
+                     "exceptions")]
+    for entry in statistics:
+        exceptions = ", ".join("{}: {}".format(exception_type, count)
+                               for exception_type, count
+                               in entry["exceptions"].items())
+        lines.append(
+            "{:>7} {:<20} {:>8} {:>8} {:>10} {:>10} {:>10} {:>10} {:>9}  {}"
+            .format(entry["channel"], entry["name"] or "-",
+                    entry["outputs"], entry["inputs"],
+                    number(entry["rate"], 1e-3, "{:.3f}"),
+                    number(entry["min_slack"], 1e9),
+                    number(entry["p1_slack"], 1e9),
+                    number(entry["median_slack"], 1e9),
+                    entry["low_slack"], exceptions).rstrip())
+    return "\n".join(lines)
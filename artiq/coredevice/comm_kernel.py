@@ -2,11 +2,14 @@ import struct
 import logging
 import socket
 import sys
+import threading
+import time
 import traceback
 import numpy
 from enum import Enum
 from fractions import Fraction
-from collections import namedtuple
+from collections import namedtuple, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from artiq.coredevice import exceptions
 from artiq import __version__ as software_version
@@ -33,6 +36,8 @@ class _H2DMsgType(Enum):
     FLASH_WRITE_REQUEST = 10
     FLASH_ERASE_REQUEST = 11
     FLASH_REMOVE_REQUEST = 12
+    FLASH_READ_MANY_REQUEST = 15
+    FLASH_WRITE_MANY_REQUEST = 16
 
     HOTSWAP = 14
 
@@ -56,12 +61,15 @@ class _D2HMsgType(Enum):
     FLASH_READ_REPLY = 11
     FLASH_OK_REPLY = 12
     FLASH_ERROR_REPLY = 13
+    FLASH_READ_MANY_REPLY = 17
 
     WATCHDOG_EXPIRED = 14
     CLOCK_FAILURE = 15
 
     HOTSWAP_IMMINENT = 16
 
+    RPC_BATCH = 18
+
 
 class _LogLevel(Enum):
     OFF = 0
@@ -109,6 +117,177 @@ def initialize_connection(host, port):
     return sock
 
 
+class _AsyncRPCExecutor:
+    """Runs asynchronous RPCs on worker threads, so that the connection
+    to the core device keeps being drained while they execute.
+
+    Calls to the same service run in the order they were submitted;
+    calls to different services may run concurrently if there is more
+    than one worker. Once a call raises an exception, the calls that are
+    still pending are dropped and :meth:`join` re-raises the exception.
+    After :meth:`abandon`, the exceptions of the calls submitted so far
+    are logged instead.
+    """
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # service key -> deque of calls; a key is present while
+        # a worker is running the calls of that service
+        self._pending = dict()
+        self._count = 0
+        self._exception = None
+        # calls are tagged with the generation they were submitted in;
+        # abandon() starts a new generation
+        self._generation = 0
+        self._failed_generation = None
+
+    def submit(self, key, service, args, kwargs):
+        with self._lock:
+            self._count += 1
+            call = (self._generation, service, args, kwargs)
+            if key in self._pending:
+                self._pending[key].append(call)
+                return
+            self._pending[key] = deque([call])
+        self._executor.submit(self._run, key)
+
+    def _run(self, key):
+        while True:
+            with self._lock:
+                calls = self._pending[key]
+                if not calls:
+                    del self._pending[key]
+                    return
+                generation, service, args, kwargs = calls.popleft()
+                failed = self._failed_generation == generation
+
+            exception = None
+            if not failed:
+                try:
+                    service(*args, **kwargs)
+                except Exception as exn:
+                    exception = exn
+
+            abandoned = False
+            with self._lock:
+                if exception is not None and not failed:
+                    self._failed_generation = generation
+                    if generation == self._generation:
+                        self._exception = exception
+                    else:
+                        abandoned = True
+                self._count -= 1
+                if not self._count:
+                    self._idle.notify_all()
+            if abandoned:
+                logger.error("asynchronous RPC failed after the kernel "
+                             "terminated", exc_info=exception)
+
+    def join(self):
+        """Wait until all submitted calls have completed, and re-raise
+        the exception raised by the first failed call, if any."""
+        with self._lock:
+            while self._count:
+                self._idle.wait()
+            exception, self._exception = self._exception, None
+        if exception is not None:
+            raise exception
+
+    def abandon(self):
+        """Stop reporting the outcome of the calls submitted so far, without
+        waiting for them. They still run, in order, but exceptions they raise
+        are logged rather than re-raised by :meth:`join`."""
+        with self._lock:
+            exception, self._exception = self._exception, None
+            self._generation += 1
+        if exception is not None:
+            logger.error("asynchronous RPC failed after the kernel "
+                         "terminated", exc_info=exception)
+
+    def close(self):
+        self._executor.shutdown()
+
+
+class RPCStatistics:
+    """
+    Per-service statistics of the RPCs served by :class:`CommKernel`.
+
+    :var services: (:class:`collections.OrderedDict`) maps the name of each
+        service to an :class:`collections.OrderedDict` with the ``calls``,
+        ``bytes_received``, ``bytes_sent``, ``decode_seconds``,
+        ``service_seconds`` and ``encode_seconds`` keys. Encoding only
+        takes place for synchronous RPCs, which reply to the kernel.
+        The received bytes of a call are those of its service number,
+        arguments and return type; message headers, including the call
+        count of an RPC batch, are not attributed to any service.
+    """
+
+    _counters = ("calls", "bytes_received", "bytes_sent",
+                 "decode_seconds", "service_seconds", "encode_seconds")
+
+    def __init__(self):
+        # asynchronous RPCs may be recorded from worker threads
+        self._lock = threading.Lock()
+        self.services = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self.services.clear()
+
+    def record(self, name, **counters):
+        with self._lock:
+            entry = self.services.get(name)
+            if entry is None:
+                entry = OrderedDict((counter, 0) for counter in self._counters)
+                self.services[name] = entry
+            for counter, value in counters.items():
+                entry[counter] += value
+
+    def timed(self, name, service):
+        """Wrap ``service`` so that its execution time is recorded."""
+        def timed_service(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return service(*args, **kwargs)
+            finally:
+                self.record(name, service_seconds=time.perf_counter() - start)
+        return timed_service
+
+    @staticmethod
+    def total_seconds(entry):
+        return (entry["decode_seconds"] + entry["service_seconds"] +
+                entry["encode_seconds"])
+
+    def format(self):
+        """Return the statistics as a human-readable table, with
+        the services that took the most host time first."""
+        with self._lock:
+            entries = sorted(self.services.items(),
+                             key=lambda item: self.total_seconds(item[1]),
+                             reverse=True)
+        lines = ["{:<40} {:>8} {:>10} {:>10} {:>11} {:>11} {:>11}".format(
+            "Service", "Calls", "Received", "Sent",
+            "Decode", "Service", "Encode")]
+        for name, entry in entries:
+            lines.append(
+                "{:<40} {:>8} {:>10} {:>10} {:>8.2f} ms {:>8.2f} ms "
+                "{:>8.2f} ms".format(
+                    name, entry["calls"],
+                    entry["bytes_received"], entry["bytes_sent"],
+                    entry["decode_seconds"]*1000,
+                    entry["service_seconds"]*1000,
+                    entry["encode_seconds"]*1000))
+        return "\n".join(lines)
+
+
+def _service_name(service_id, service):
+    if service_id == 0:
+        return "(attribute writeback)"
+    return getattr(service, "__qualname__", repr(service))
+
+
 class CommKernelDummy:
     def __init__(self):
         pass
@@ -136,10 +315,26 @@ class CommKernelDummy:
 
 
 class CommKernel:
-    def __init__(self, host, port=1381):
+    """Core device kernel and management connection.
+
+    :param async_rpc_workers: number of threads that execute asynchronous
+        RPCs (``@rpc(flags={"async"})``) while the connection keeps being
+        read. Calls to the same function always execute in order, and all
+        asynchronous RPCs complete before a synchronous RPC is executed and
+        before the kernel is considered finished. If 0 (the default),
+        asynchronous RPCs are executed before the next message is read.
+    :var rpc_statistics: (:class:`RPCStatistics` or None) if set, the calls,
+        bytes transferred and host time of every RPC are recorded there.
+    """
+    def __init__(self, host, port=1381, async_rpc_workers=0):
         self._read_type = None
         self.host = host
         self.port = port
+        self.async_rpc_workers = async_rpc_workers
+        self._async_rpcs = None
+        self.rpc_statistics = None
+        self._bytes_received = 0
+        self._bytes_sent = 0
 
     def open(self):
         if hasattr(self, "socket"):
@@ -148,6 +343,9 @@ class CommKernel:
         self.socket.sendall(b"ARTIQ coredev\n")
 
     def close(self):
+        if self._async_rpcs is not None:
+            self._async_rpcs.close()
+            self._async_rpcs = None
         if not hasattr(self, "socket"):
             return
         self.socket.close()
@@ -155,15 +353,28 @@ class CommKernel:
         logger.debug("disconnected")
 
     def read(self, length):
-        r = bytes()
-        while len(r) < length:
-            rn = self.socket.recv(min(8192, length - len(r)))
-            if not rn:
+        self._bytes_received += length
+        r = self.socket.recv(min(8192, length))
+        if len(r) == length:
+            return r
+        if not r:
+            raise ConnectionResetError("Connection closed")
+
+        # Large chunks (e.g. kernels or flash storage values) arrive in
+        # many packets; receive them in place instead of concatenating.
+        buffer = bytearray(length)
+        view = memoryview(buffer)
+        view[:len(r)] = r
+        position = len(r)
+        while position < length:
+            count = self.socket.recv_into(view[position:])
+            if not count:
                 raise ConnectionResetError("Connection closed")
-            r += rn
-        return r
+            position += count
+        return bytes(buffer)
 
     def write(self, data):
+        self._bytes_sent += len(data)
         self.socket.sendall(data)
 
     #
@@ -318,6 +529,76 @@ class CommKernel:
         else:
             self._read_expect(_D2HMsgType.FLASH_OK_REPLY)
 
+    def flash_storage_read_many(self, keys):
+        """Read several keys from the flash storage in a single request.
+
+        Unlike :meth:`flash_storage_read`, the values are returned
+        as ``bytes``; keys that do not exist read as ``b""``.
+
+        :param keys: list of keys to read.
+        :return: a dictionary mapping each key to its value.
+        """
+        keys = list(keys)
+        self._write_header(_H2DMsgType.FLASH_READ_MANY_REQUEST)
+        self._write_chunk(self._pack_strings(keys))
+
+        self._read_header()
+        if self._read_type == _D2HMsgType.FLASH_ERROR_REPLY:
+            raise IOError("Flash storage is corrupted or busy")
+        self._read_expect(_D2HMsgType.FLASH_READ_MANY_REPLY)
+        count = self._read_int32()
+        if count != len(keys):
+            raise IOError("Incorrect number of values from device: {} "
+                          "(expected {})".format(count, len(keys)))
+        return {key: self._read_bytes() for key in keys}
+
+    def flash_storage_write_many(self, records, chunk_size=65536):
+        """Write several key-value records to the flash storage in
+        a single request.
+
+        The records are appended in one pass over the flash storage;
+        if they do not fit, even after compacting it, none of them is
+        written. Small records are sent together; values larger than
+        ``chunk_size`` are streamed directly from the buffer they are
+        stored in.
+
+        :param records: dictionary (or iterable of pairs) mapping keys
+            (``str``) to values (``bytes``). An empty value removes the key.
+        """
+        if isinstance(records, dict):
+            records = records.items()
+        records = list(records)
+
+        self._write_header(_H2DMsgType.FLASH_WRITE_MANY_REQUEST)
+        pending = bytearray(struct.pack(">l", len(records)))
+        for key, value in records:
+            key = key.encode("utf-8")
+            pending += struct.pack(">l", len(key))
+            pending += key
+            pending += struct.pack(">l", len(value))
+            if len(value) > chunk_size:
+                self._write_chunk(pending)
+                self._write_chunk(value)
+                pending = bytearray()
+            else:
+                pending += value
+        self._write_chunk(pending)
+
+        self._read_header()
+        if self._read_type == _D2HMsgType.FLASH_ERROR_REPLY:
+            raise IOError("Flash storage is full")
+        else:
+            self._read_expect(_D2HMsgType.FLASH_OK_REPLY)
+
+    @staticmethod
+    def _pack_strings(values):
+        chunk = bytearray(struct.pack(">l", len(values)))
+        for value in values:
+            value = value.encode("utf-8")
+            chunk += struct.pack(">l", len(value))
+            chunk += value
+        return chunk
+
     def flash_storage_erase(self):
         self._write_empty(_H2DMsgType.FLASH_ERASE_REQUEST)
 
@@ -501,7 +782,22 @@ class CommKernel:
             return msg
 
     def _serve_rpc(self, embedding_map):
-        async        = self._read_bool()
+        async = self._read_bool()
+        self._serve_rpc_call(embedding_map, async)
+
+    def _serve_rpc_batch(self, embedding_map):
+        # Several asynchronous RPCs buffered by the core device.
+        count = self._read_int32()
+        logger.debug("rpc batch: %d calls", count)
+        for _ in range(count):
+            self._serve_rpc_call(embedding_map, async=True)
+
+    def _serve_rpc_call(self, embedding_map, async):
+        statistics = self.rpc_statistics
+        if statistics is not None:
+            start = time.perf_counter()
+            bytes_received = self._bytes_received
+
         service_id   = self._read_int32()
         args, kwargs = self._receive_rpc_args(embedding_map)
         return_tags  = self._read_bytes()
@@ -513,12 +809,30 @@ class CommKernel:
         logger.debug("rpc service: [%d]%r%s %r %r -> %s", service_id, service,
                      (" (async)" if async else ""), args, kwargs, return_tags)
 
+        if statistics is not None:
+            name = _service_name(service_id, service)
+            statistics.record(name, calls=1,
+                              bytes_received=self._bytes_received - bytes_received,
+                              decode_seconds=time.perf_counter() - start)
+
         if async:
-            service(*args, **kwargs)
+            if statistics is not None:
+                service = statistics.timed(name, service)
+            if self._async_rpcs is None:
+                service(*args, **kwargs)
+            else:
+                self._async_rpcs.submit(service_id, service, args, kwargs)
             return
 
+        if self._async_rpcs is not None:
+            # the service may depend on the effects of earlier async RPCs
+            self._async_rpcs.join()
+
+        start = time.perf_counter()
+        bytes_sent = self._bytes_sent
         try:
             result = service(*args, **kwargs)
+            serviced = time.perf_counter()
             logger.debug("rpc service: %d %r %r = %r", service_id, args, kwargs, result)
 
             self._write_header(_H2DMsgType.RPC_REPLY)
@@ -527,6 +841,7 @@ class CommKernel:
         except RPCReturnValueError as exn:
             raise
         except Exception as exn:
+            serviced = time.perf_counter()
             logger.debug("rpc service: %d %r %r ! %r", service_id, args, kwargs, exn)
 
             self._write_header(_H2DMsgType.RPC_EXCEPTION)
@@ -569,6 +884,11 @@ class CommKernel:
                 self._write_int32(-1) # column not known
                 self._write_string(function)
 
+        if statistics is not None:
+            statistics.record(name, bytes_sent=self._bytes_sent - bytes_sent,
+                              service_seconds=serviced - start,
+                              encode_seconds=time.perf_counter() - serviced)
+
     def _serve_exception(self, embedding_map, symbolizer, demangler):
         name      = self._read_string()
         message   = self._read_string()
@@ -595,16 +915,29 @@ class CommKernel:
         raise python_exn
 
     def serve(self, embedding_map, symbolizer, demangler):
-        while True:
-            self._read_header()
-            if self._read_type == _D2HMsgType.RPC_REQUEST:
-                self._serve_rpc(embedding_map)
-            elif self._read_type == _D2HMsgType.KERNEL_EXCEPTION:
-                self._serve_exception(embedding_map, symbolizer, demangler)
-            elif self._read_type == _D2HMsgType.WATCHDOG_EXPIRED:
-                raise exceptions.WatchdogExpired
-            elif self._read_type == _D2HMsgType.CLOCK_FAILURE:
-                raise exceptions.ClockFailure
-            else:
-                self._read_expect(_D2HMsgType.KERNEL_FINISHED)
-                return
+        if self.async_rpc_workers and self._async_rpcs is None:
+            self._async_rpcs = _AsyncRPCExecutor(self.async_rpc_workers)
+        try:
+            while True:
+                self._read_header()
+                if self._read_type == _D2HMsgType.RPC_REQUEST:
+                    self._serve_rpc(embedding_map)
+                elif self._read_type == _D2HMsgType.RPC_BATCH:
+                    self._serve_rpc_batch(embedding_map)
+                elif self._read_type == _D2HMsgType.KERNEL_EXCEPTION:
+                    self._serve_exception(embedding_map, symbolizer, demangler)
+                elif self._read_type == _D2HMsgType.WATCHDOG_EXPIRED:
+                    raise exceptions.WatchdogExpired
+                elif self._read_type == _D2HMsgType.CLOCK_FAILURE:
+                    raise exceptions.ClockFailure
+                else:
+                    self._read_expect(_D2HMsgType.KERNEL_FINISHED)
+                    break
+        except:
+            # Report the error that terminated the kernel rather than
+            # an asynchronous RPC failure, and do not wait for slow RPCs.
+            if self._async_rpcs is not None:
+                self._async_rpcs.abandon()
+            raise
+        if self._async_rpcs is not None:
+            self._async_rpcs.join()
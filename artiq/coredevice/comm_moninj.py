@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import struct
+from collections import OrderedDict
 from enum import Enum
 
 
@@ -21,7 +22,17 @@ class TTLOverride(Enum):
     oe = 2
 
 
+_monitor_packet = struct.Struct(">lbl")
+_injection_status_packet = struct.Struct(">lbb")
+
+
 class CommMonInj:
+    """Client for the moninj protocol of the core device.
+
+    All the complete packets received at once are processed together;
+    if several of them update the same probe or override, only the latest
+    value is passed to ``monitor_cb`` or ``injection_status_cb``.
+    """
     def __init__(self, monitor_cb, injection_status_cb, disconnect_cb=None):
         self.monitor_cb = monitor_cb
         self.injection_status_cb = injection_status_cb
@@ -55,6 +66,19 @@ class CommMonInj:
         packet = struct.pack(">bblb", 0, enable, channel, probe)
         self._writer.write(packet)
 
+    def subscribe(self, channel, probe, interval=0.2, periodic=False):
+        """Enable monitoring of a probe, with the core device checking
+        its value every ``interval`` seconds (at least 10ms).
+
+        If ``periodic`` is false, the value is only reported when it has
+        changed; otherwise, it is reported after every check. Monitoring
+        is disabled with :meth:`monitor`. This requires a core device
+        firmware that supports subscriptions.
+        """
+        packet = struct.pack(">blbIb", 3, channel, probe,
+                             round(interval*1000), periodic)
+        self._writer.write(packet)
+
     def inject(self, channel, override, value):
         packet = struct.pack(">blbb", 1, channel, override, value)
         self._writer.write(packet)
@@ -64,21 +88,42 @@ class CommMonInj:
         self._writer.write(packet)
 
     async def _receive_cr(self):
+        buf = bytearray()
         try:
             while True:
-                ty = await self._reader.read(1)
-                if not ty:
+                data = await self._reader.read(8192)
+                if not data:
                     return
-                if ty == b"\x00":
-                    payload = await self._reader.read(9)
-                    channel, probe, value = struct.unpack(">lbl", payload)
-                    self.monitor_cb(channel, probe, value)
-                elif ty == b"\x01":
-                    payload = await self._reader.read(6)
-                    channel, override, value = struct.unpack(">lbb", payload)
-                    self.injection_status_cb(channel, override, value)
-                else:
-                    raise ValueError("Unknown packet type", ty)
+                buf += data
+                position, updates = self._parse(buf)
+                del buf[:position]
+                for (ty, channel, probe), value in updates.items():
+                    if ty == 0:
+                        self.monitor_cb(channel, probe, value)
+                    else:
+                        self.injection_status_cb(channel, probe, value)
         finally:
             if self.disconnect_cb is not None:
                 self.disconnect_cb()
+
+    @staticmethod
+    def _parse(buf):
+        # Returns the length of the complete packets in buf, and the latest
+        # value of each probe and override they update, in order of first
+        # update.
+        updates = OrderedDict()
+        position = 0
+        while position < len(buf):
+            ty = buf[position]
+            if ty == 0:
+                packet = _monitor_packet
+            elif ty == 1:
+                packet = _injection_status_packet
+            else:
+                raise ValueError("Unknown packet type", bytes([ty]))
+            if position + 1 + packet.size > len(buf):
+                break
+            channel, probe, value = packet.unpack_from(buf, position + 1)
+            updates[(ty, channel, probe)] = value
+            position += 1 + packet.size
+        return position, updates
@@ -1,4 +1,4 @@
-import os, sys
+import os, sys, logging
 import numpy
 
 from pythonparser import diagnostic
@@ -12,12 +12,18 @@ from artiq.language.units import *
 from artiq.compiler.module import Module
 from artiq.compiler.embedding import Stitcher
 from artiq.compiler.targets import OR1KTarget
+from artiq.compiler.kernel_cache import (KernelCache, default_kernel_cache,
+                                         dump_requested)
+from artiq.compiler.profiler import ProfileReport, default_report_filename
 
-from artiq.coredevice.comm_kernel import CommKernel, CommKernelDummy
+from artiq.coredevice.comm_kernel import CommKernel, CommKernelDummy, RPCStatistics
 # Import for side effects (creating the exception classes).
 from artiq.coredevice import exceptions
 
 
+logger = logging.getLogger(__name__)
+
+
 def _render_diagnostic(diagnostic, colored):
     def shorten_path(path):
         return path.replace(artiq_dir, "<artiq>")
@@ -63,6 +69,13 @@ class Core:
     :param ref_multiplier: ratio between the RTIO fine timestamp frequency
         and the RTIO coarse timestamp frequency (e.g. SERDES multiplication
         factor).
+    :param async_rpc_workers: number of host threads that execute
+        asynchronous RPCs while the kernel keeps running; see
+        :class:`artiq.coredevice.comm_kernel.CommKernel`.
+    :param rpc_statistics: whether to record the number of calls, bytes
+        transferred and host time of every RPC function. The statistics
+        of each kernel are logged at the end of :meth:`run`, and remain
+        available as :attr:`rpc_statistics` until the next kernel runs.
     """
 
     kernel_invariants = {
@@ -71,7 +84,7 @@ class Core:
     }
 
     def __init__(self, dmgr, host, ref_period, external_clock=False,
-                 ref_multiplier=8):
+                 ref_multiplier=8, async_rpc_workers=0, rpc_statistics=False):
         self.ref_period = ref_period
         self.external_clock = external_clock
         self.ref_multiplier = ref_multiplier
@@ -79,9 +92,13 @@ class Core:
         if host is None:
             self.comm = CommKernelDummy()
         else:
-            self.comm = CommKernel(host)
+            self.comm = CommKernel(host, async_rpc_workers=async_rpc_workers)
+
+        self.rpc_statistics = RPCStatistics() if rpc_statistics else None
+        self.comm.rpc_statistics = self.rpc_statistics
 
         self.first_run = True
+        self.kernel_cache = default_kernel_cache()
         self.dmgr = dmgr
         self.core = self
         self.comm.core = self
@@ -90,22 +107,59 @@ class Core:
         self.comm.close()
 
     def compile(self, function, args, kwargs, set_result=None,
-                attribute_writeback=True, print_as_rpc=True):
+                attribute_writeback=True, print_as_rpc=True, profile_hook=None):
         try:
             engine = _DiagnosticEngine(all_errors_are_fatal=True)
+            target = OR1KTarget()
 
-            stitcher = Stitcher(engine=engine, core=self, dmgr=self.dmgr,
-                                print_as_rpc=print_as_rpc)
-            stitcher.stitch_call(function, args, kwargs, set_result)
-            stitcher.finalize()
+            report_filename = default_report_filename()
+            if report_filename is not None:
+                profile_hook = report = ProfileReport(profile_hook)
+            target.profile_hook = profile_hook
+
+            with target.profile("Embedding") as counters:
+                stitcher = Stitcher(engine=engine, core=self, dmgr=self.dmgr,
+                                    print_as_rpc=print_as_rpc)
+                stitcher.stitch_call(function, args, kwargs, set_result)
+                stitcher.finalize()
+                counters["functions"] = len(stitcher.functions)
+                counters["inference_passes"] = stitcher.inference_passes
+                counters["inferred_nodes"] = stitcher.inferred_nodes
 
             module = Module(stitcher,
                 ref_period=self.ref_period,
-                attribute_writeback=attribute_writeback)
-            target = OR1KTarget()
-
-            library = target.compile_and_link([module])
-            stripped_library = target.strip(library)
+                attribute_writeback=attribute_writeback,
+                profile_hook=profile_hook)
+
+            llvm_ir = target.generate_llvm_ir(module)
+            kernel_cache = self.kernel_cache
+            if dump_requested():
+                kernel_cache = None
+            if kernel_cache is None:
+                cached = None
+            else:
+                cache_key = KernelCache.key(target, [llvm_ir])
+                cached = kernel_cache.get(cache_key)
+
+            if cached is None:
+                # A kernel is a single module, which Target.compile_and_link
+                # would not parallelize; the stages are run here directly
+                # since the LLVM IR is needed for the cache key anyway.
+                library = target.link([target.assemble(target.optimize_llvm_ir(llvm_ir))])
+                stripped_library = target.strip(library)
+                if kernel_cache is not None:
+                    try:
+                        kernel_cache.put(cache_key, library, stripped_library)
+                    except OSError:
+                        logger.warning("cannot store kernel in cache %s",
+                                       kernel_cache.directory, exc_info=True)
+            else:
+                library, stripped_library = cached
+
+            if report_filename is not None:
+                report.save(report_filename,
+                            kernel=getattr(function, "__qualname__", repr(function)),
+                            cached=cached is not None)
 
             return stitcher.embedding_map, stripped_library, \
                    lambda addresses: target.symbolize(library, addresses), \
@@ -130,7 +184,23 @@ class Core:
 
         self.comm.load(kernel_library)
         self.comm.run()
-        self.comm.serve(embedding_map, symbolizer, demangler)
+        if self.rpc_statistics is None:
+            self.comm.serve(embedding_map, symbolizer, demangler)
+        else:
+            name = getattr(function, "__qualname__", repr(function))
+            self.rpc_statistics.clear()
+            try:
+                self.comm.serve(embedding_map, symbolizer, demangler)
+            except:
+                # The asynchronous RPCs that were still running are
+                # abandoned, and their statistics are only partly recorded.
+                logger.info("RPC statistics of %s (incomplete: the service "
+                            "time of asynchronous RPCs still running after "
+                            "the error is missing):\n%s",
+                            name, self.rpc_statistics.format())
+                raise
+            logger.info("RPC statistics of %s:\n%s",
+                        name, self.rpc_statistics.format())
 
         return result
 
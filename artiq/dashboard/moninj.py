@@ -177,6 +177,12 @@ class _DeviceManager:
         self.core_connection = None
         self.core_connector_task = asyncio.ensure_future(self.core_connector())
 
+        # Widgets are refreshed at most at this interval, in seconds, so
+        # that fast-changing channels do not saturate the event loop.
+        self.refresh_interval = 1/30
+        self.last_refresh = 0
+        self.dirty_widgets = set()
+
         self.dds_sysclk = 0
         self.ttl_cb = lambda: None
         self.ttl_widgets = dict()
@@ -230,6 +236,7 @@ class _DeviceManager:
         if k in self.ttl_widgets:
             widget = self.ttl_widgets[k]
             self.setup_ttl_monitoring(False, widget.channel)
+            self.dirty_widgets.discard(widget)
             widget.deleteLater()
             del self.ttl_widgets_by_channel[widget.channel]
             del self.ttl_widgets[k]
@@ -237,6 +244,7 @@ class _DeviceManager:
         if k in self.dds_widgets:
             widget = self.dds_widgets[k]
             self.setup_dds_monitoring(False, widget.bus_channel, widget.channel)
+            self.dirty_widgets.discard(widget)
             widget.deleteLater()
             del self.dds_widgets_by_channel[(widget.bus_channel, widget.channel)]
             del self.dds_widgets[k]
@@ -276,6 +284,19 @@ class _DeviceManager:
         if self.core_connection is not None:
             self.core_connection.monitor(enable, bus_channel, channel)
 
+    def schedule_refresh(self, widget):
+        if not self.dirty_widgets:
+            loop = asyncio.get_event_loop()
+            delay = self.last_refresh + self.refresh_interval - loop.time()
+            loop.call_later(max(delay, 0), self.refresh_widgets)
+        self.dirty_widgets.add(widget)
+
+    def refresh_widgets(self):
+        self.last_refresh = asyncio.get_event_loop().time()
+        widgets, self.dirty_widgets = self.dirty_widgets, set()
+        for widget in widgets:
+            widget.refresh_display()
+
     def monitor_cb(self, channel, probe, value):
         if channel in self.ttl_widgets_by_channel:
             widget = self.ttl_widgets_by_channel[channel]
@@ -283,11 +304,11 @@ class _DeviceManager:
                 widget.cur_level = bool(value)
             elif probe == TTLProbe.oe.value:
                 widget.cur_oe = bool(value)
-            widget.refresh_display()
+            self.schedule_refresh(widget)
         if (channel, probe) in self.dds_widgets_by_channel:
             widget = self.dds_widgets_by_channel[(channel, probe)]
             widget.cur_frequency = value*self.dds_sysclk/2**32
-            widget.refresh_display()
+            self.schedule_refresh(widget)
 
     def injection_status_cb(self, channel, override, value):
         if channel in self.ttl_widgets_by_channel:
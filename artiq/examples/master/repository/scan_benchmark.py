@@ -0,0 +1,46 @@
+import time
+import tracemalloc
+
+from artiq.experiment import *
+
+
+class ScanBenchmark(EnvExperiment):
+    """Scan iteration benchmark"""
+    def build(self):
+        self.setattr_argument("npoints", NumberValue(100, min=1, max=1000,
+                                                     ndecimals=0, step=1))
+        self.setattr_argument("randomize", BooleanValue(True))
+
+    def make_scan(self):
+        npoints = int(self.npoints)
+        return MultiScanManager(
+            ("a", RangeScan(0, 1, npoints)),
+            ("b", RangeScan(0, 1, npoints)),
+            ("c", RangeScan(0, 1, npoints, randomize=self.randomize)))
+
+    def iterate_points(self):
+        for point in self.make_scan():
+            pass
+
+    def iterate_blocks(self):
+        for block in self.make_scan().blocks():
+            pass
+
+    def measure(self, name, method):
+        tracemalloc.start()
+        start_time = time.monotonic()
+        method()
+        end_time = time.monotonic()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        npoints = int(self.npoints)**3
+        print("{}: {} points in {:.3f} s ({:.2f} us/point), {:.1f} KiB peak"
+              .format(name, npoints, end_time - start_time,
+                      (end_time - start_time)/npoints*1e6, peak/1024))
+        self.set_dataset("scan_benchmark." + name,
+                         (end_time - start_time)/npoints, broadcast=True)
+
+    def run(self):
+        self.measure("points", self.iterate_points)
+        self.measure("blocks", self.iterate_blocks)
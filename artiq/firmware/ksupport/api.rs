@@ -88,6 +88,7 @@ static mut API: &'static [(&'static str, *const ())] = &[
 
     api!(rpc_send = ::rpc_send),
     api!(rpc_send_async = ::rpc_send_async),
+    api!(rpc_send_batch = ::rpc_send_batch),
     api!(rpc_recv = ::rpc_recv),
 
     api!(cache_get = ::cache_get),
@@ -16,6 +16,7 @@ extern crate amp;
 
 use core::{mem, ptr, slice, str};
 use std::io::Cursor;
+use byteorder::{ByteOrder, NetworkEndian};
 use cslice::{CSlice, AsCSlice};
 use board::csr;
 use dyld::Library;
@@ -111,6 +112,7 @@ pub extern fn send_to_rtio_log(timestamp: i64, text: CSlice<u8>) {
 }
 
 extern fn rpc_send(service: u32, tag: CSlice<u8>, data: *const *const ()) {
+    rpc_flush();
     while !rpc_queue::empty() {}
     send(&RpcSend {
         async:   false,
@@ -120,28 +122,86 @@ extern fn rpc_send(service: u32, tag: CSlice<u8>, data: *const *const ()) {
     })
 }
 
-extern fn rpc_send_async(service: u32, tag: CSlice<u8>, data: *const *const ()) {
-    while rpc_queue::full() {}
-    rpc_queue::enqueue(|mut slice| {
-        let length = {
-            let mut writer = Cursor::new(&mut slice[4..]);
-            rpc_proto::send_args(&mut writer, service, tag.as_ref(), data)?;
-            writer.position()
-        };
-        proto::WriteExt::write_u32(&mut slice, length as u32)
-    }).unwrap_or_else(|err| {
-        assert!(err.kind() == std::io::ErrorKind::WriteZero);
-
-        while !rpc_queue::empty() {}
-        send(&RpcSend {
-            async:   true,
-            service: service,
-            tag:     tag.as_ref(),
-            data:    data
-        })
+// Asynchronous RPCs are written one after another to the chunk at the tail
+// of the RPC queue, each prefixed with its length and followed by a zero
+// length. The chunk is kept open for batched RPCs, and passed on to the
+// runtime once no further RPC fits in it, or before any message that
+// the host must receive after these RPCs.
+static mut RPC_BATCH_OFFSET: usize = 0;
+
+fn rpc_append(service: u32, tag: &[u8], data: *const *const ()) -> bool {
+    unsafe {
+        if RPC_BATCH_OFFSET == 0 {
+            while rpc_queue::full() {}
+        }
+
+        let offset = RPC_BATCH_OFFSET;
+        let appended = rpc_queue::fill(|chunk| {
+            let slice = &mut chunk[offset..];
+            if slice.len() < 8 {
+                return Err(())
+            }
+
+            let end = slice.len() - 4;
+            let length = {
+                let mut writer = Cursor::new(&mut slice[4..end]);
+                rpc_proto::send_args(&mut writer, service, tag, data).map_err(|err| {
+                    assert!(err.kind() == std::io::ErrorKind::WriteZero)
+                })?;
+                writer.position() as usize
+            };
+            NetworkEndian::write_u32(&mut slice[..4], length as u32);
+            NetworkEndian::write_u32(&mut slice[4 + length..], 0);
+            Ok(offset + 4 + length)
+        });
+
+        match appended {
+            Ok(next_offset) => {
+                RPC_BATCH_OFFSET = next_offset;
+                true
+            }
+            Err(()) => false
+        }
+    }
+}
+
+fn rpc_flush() {
+    unsafe {
+        if RPC_BATCH_OFFSET > 0 {
+            rpc_queue::commit();
+            RPC_BATCH_OFFSET = 0
+        }
+    }
+}
+
+extern fn rpc_send_batch(service: u32, tag: CSlice<u8>, data: *const *const ()) {
+    if rpc_append(service, tag.as_ref(), data) {
+        return
+    }
+
+    if unsafe { RPC_BATCH_OFFSET } > 0 {
+        // no room left in this chunk; pass it on and start a new one
+        rpc_flush();
+        if rpc_append(service, tag.as_ref(), data) {
+            return
+        }
+    }
+
+    // the arguments do not fit in a chunk
+    while !rpc_queue::empty() {}
+    send(&RpcSend {
+        async:   true,
+        service: service,
+        tag:     tag.as_ref(),
+        data:    data
     })
 }
 
+extern fn rpc_send_async(service: u32, tag: CSlice<u8>, data: *const *const ()) {
+    rpc_send_batch(service, tag, data);
+    rpc_flush()
+}
+
 extern fn rpc_recv(slot: *mut ()) -> usize {
     send(&RpcRecvRequest(slot));
     recv!(&RpcRecvReply(ref result) => {
@@ -173,6 +233,9 @@ fn terminate(exception: &eh::Exception, mut backtrace: &mut [usize]) -> ! {
     }
     let backtrace = &mut backtrace.as_mut()[0..cursor];
 
+    rpc_flush();
+    while !rpc_queue::empty() {}
+
     send(&NowSave(unsafe { NOW }));
     send(&RunException {
         exception: kernel_proto::Exception {
@@ -428,7 +491,7 @@ unsafe fn attribute_writeback(typeinfo: *const ()) {
                 attributes = attributes.offset(1);
 
                 if (*attribute).tag.len() > 0 {
-                    rpc_send_async(0, (*attribute).tag, [
+                    rpc_send_batch(0, (*attribute).tag, [
                         &object as *const _ as *const (),
                         &(*attribute).name as *const _ as *const (),
                         (object as usize + (*attribute).offset) as *const ()
@@ -476,6 +539,9 @@ pub unsafe fn main() {
         attribute_writeback(typeinfo as *const ());
     }
 
+    rpc_flush();
+    while !rpc_queue::empty() {}
+
     send(&RunFinished);
 
     loop {}
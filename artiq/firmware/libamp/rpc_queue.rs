@@ -33,14 +33,29 @@ pub fn full() -> bool {
 
 pub fn enqueue<T, E, F>(f: F) -> Result<T, E>
         where F: FnOnce(&mut [u8]) -> Result<T, E> {
+    fill(f).and_then(|x| {
+        commit();
+        Ok(x)
+    })
+}
+
+// Gives access to the chunk at the tail of the queue without passing it on
+// to the consumer, so that several records can be written to it before `commit`.
+pub fn fill<T, E, F>(f: F) -> Result<T, E>
+        where F: FnOnce(&mut [u8]) -> Result<T, E> {
     debug_assert!(!full());
 
     unsafe {
         let slice = slice::from_raw_parts_mut(read_volatile(SEND_MAILBOX) as *mut u8, QUEUE_CHUNK);
-        f(slice).and_then(|x| {
-            write_volatile(SEND_MAILBOX, next(read_volatile(SEND_MAILBOX)));
-            Ok(x)
-        })
+        f(slice)
+    }
+}
+
+pub fn commit() {
+    debug_assert!(!full());
+
+    unsafe {
+        write_volatile(SEND_MAILBOX, next(read_volatile(SEND_MAILBOX)));
     }
 }
 
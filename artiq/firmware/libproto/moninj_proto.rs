@@ -5,7 +5,8 @@ use {ReadExt, WriteExt};
 pub enum HostMessage {
     Monitor { enable: bool, channel: u32, probe: u8 },
     Inject { channel: u32, overrd: u8, value: u8 },
-    GetInjectionStatus { channel: u32, overrd: u8 }
+    GetInjectionStatus { channel: u32, overrd: u8 },
+    Subscribe { channel: u32, probe: u8, interval: u32, periodic: bool }
 }
 
 #[derive(Debug)]
@@ -31,6 +32,12 @@ impl HostMessage {
                 channel: reader.read_u32()?,
                 overrd: reader.read_u8()?
             },
+            3 => HostMessage::Subscribe {
+                channel: reader.read_u32()?,
+                probe: reader.read_u8()?,
+                interval: reader.read_u32()?,
+                periodic: if reader.read_u8()? == 0 { false } else { true }
+            },
             _ => return Err(io::Error::new(io::ErrorKind::InvalidData, "unknown packet type"))
         })
     }
@@ -39,6 +39,8 @@ pub enum Request {
     FlashWrite  { key: String, value: Vec<u8> },
     FlashRemove { key: String },
     FlashErase,
+    FlashReadMany  { keys: Vec<String> },
+    FlashWriteMany { records: Vec<(String, Vec<u8>)> },
 }
 
 impl Request {
@@ -74,6 +76,24 @@ impl Request {
             12 => Request::FlashRemove {
                 key: reader.read_string()?
             },
+            15 => {
+                let count = reader.read_u32()?;
+                let mut keys = Vec::new();
+                for _ in 0..count {
+                    keys.push(reader.read_string()?)
+                }
+                Request::FlashReadMany { keys: keys }
+            },
+            16 => {
+                let count = reader.read_u32()?;
+                let mut records = Vec::new();
+                for _ in 0..count {
+                    let key   = reader.read_string()?;
+                    let value = reader.read_bytes()?;
+                    records.push((key, value))
+                }
+                Request::FlashWriteMany { records: records }
+            },
             _  => return Err(io::Error::new(io::ErrorKind::InvalidData, "unknown request type"))
         })
     }
@@ -105,10 +125,12 @@ pub enum Reply<'a> {
     },
 
     RpcRequest { async: bool },
+    RpcBatch { count: u32 },
 
     FlashRead(&'a [u8]),
     FlashOk,
     FlashError,
+    FlashReadMany(&'a [&'a [u8]]),
 
     WatchdogExpired,
     ClockFailure,
@@ -179,6 +201,13 @@ impl<'a> Reply<'a> {
             Reply::FlashError => {
                 writer.write_u8(13)?;
             },
+            Reply::FlashReadMany(values) => {
+                writer.write_u8(17)?;
+                writer.write_u32(values.len() as u32)?;
+                for value in values {
+                    writer.write_bytes(value)?;
+                }
+            },
 
             Reply::WatchdogExpired => {
                 writer.write_u8(14)?;
@@ -186,6 +215,11 @@ impl<'a> Reply<'a> {
             Reply::ClockFailure => {
                 writer.write_u8(15)?;
             },
+
+            Reply::RpcBatch { count } => {
+                writer.write_u8(18)?;
+                writer.write_u32(count)?;
+            },
         }
         Ok(())
     }
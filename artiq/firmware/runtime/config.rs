@@ -1,4 +1,6 @@
 use core::str;
+use std::vec::Vec;
+use std::string::String;
 use std::btree_map::BTreeMap;
 use byteorder::{ByteOrder, BigEndian};
 use board::{mem, csr, cache, spiflash};
@@ -99,6 +101,29 @@ pub fn read<F: FnOnce(Result<&[u8], ()>) -> R, R>(key: &str, f: F) -> R {
     }))
 }
 
+fn lookup_many(keys: &[String]) -> Result<Vec<&'static [u8]>, ()> {
+    let lock = Lock::take()?;
+    let mut iter = Iter::new(lock.data());
+    let mut values = vec![&[][..]; keys.len()];
+    while let Some(result) = iter.next() {
+        let (record_key, record_value) = result?;
+        for (key, value) in keys.iter().zip(values.iter_mut()) {
+            if key.as_bytes() == record_key {
+                // last write wins
+                *value = record_value
+            }
+        }
+    }
+    Ok(values)
+}
+
+pub fn read_many<F: FnOnce(Result<&[&[u8]], ()>) -> R, R>(keys: &[String], f: F) -> R {
+    match lookup_many(keys) {
+        Ok(values) => f(Ok(&values[..])),
+        Err(())    => f(Err(()))
+    }
+}
+
 pub fn read_str<F: FnOnce(Result<&str, ()>) -> R, R>(key: &str, f: F) -> R {
     read(key, |result| {
         f(result.and_then(|value| str::from_utf8(value).map_err(|_| ())))
@@ -106,7 +131,7 @@ pub fn read_str<F: FnOnce(Result<&str, ()>) -> R, R>(key: &str, f: F) -> R {
 }
 
 fn append_at(mut offset: usize, key: &[u8], value: &[u8]) -> Result<usize, ()> {
-    let record_size = 4 + key.len() + 1 + value.len();
+    let record_size = record_size(key, value);
     if offset + record_size > SIZE {
         return Err(())
     }
@@ -178,6 +203,66 @@ pub fn write(key: &str, value: &[u8]) -> Result<(), ()> {
     Ok(())
 }
 
+fn record_size(key: &[u8], value: &[u8]) -> usize {
+    4 + key.len() + 1 + value.len()
+}
+
+// Either writes all records or, if they do not fit even after compaction,
+// none of them.
+pub fn write_many(records: &[(String, Vec<u8>)]) -> Result<(), ()> {
+    let lock = Lock::take()?;
+
+    let free_offset = {
+        let mut iter = Iter::new(lock.data());
+        while let Some(result) = iter.next() {
+            let _ = result?;
+        }
+        iter.offset
+    };
+
+    let records_size = records.iter()
+        .map(|&(ref key, ref value)| record_size(key.as_bytes(), value))
+        .fold(0, |sum, size| sum + size);
+    if free_offset + records_size <= SIZE {
+        let mut offset = free_offset;
+        for &(ref key, ref value) in records {
+            offset = append_at(offset, key.as_bytes(), value)?;
+        }
+        return Ok(())
+    }
+
+    // The records do not fit after the existing ones; compact the storage
+    // with the records merged in, after checking that the result fits.
+    // The items are copied out of the flash sector, since it is erased
+    // before they are written back.
+    let mut items = BTreeMap::new();
+    {
+        let mut iter = Iter::new(lock.data());
+        while let Some(result) = iter.next() {
+            let (key, value) = result?;
+            items.insert(key.to_vec(), value.to_vec());
+        }
+    }
+    for &(ref key, ref value) in records {
+        items.insert(key.as_bytes().to_vec(), value.clone());
+    }
+    let compacted_size = items.iter()
+        .map(|(key, value)| record_size(key, value))
+        .fold(0, |sum, size| sum + size);
+    if compacted_size > SIZE {
+        return Err(())
+    }
+
+    spiflash::erase_sector(ADDR);
+    cache::flush_l2_cache();
+
+    let mut offset = 0;
+    for (key, value) in items {
+        offset = append_at(offset, &key, &value)?;
+    }
+    Ok(())
+}
+
 pub fn remove(key: &str) -> Result<(), ()> {
     write(key, &[])
 }
@@ -1,7 +1,14 @@
+use std::vec::Vec;
+use std::string::String;
+
 pub fn read<F: FnOnce(Result<&[u8], ()>) -> R, R>(_key: &str, f: F) -> R {
     f(Err(()))
 }
 
+pub fn read_many<F: FnOnce(Result<&[&[u8]], ()>) -> R, R>(_keys: &[String], f: F) -> R {
+    f(Err(()))
+}
+
 pub fn read_str<F: FnOnce(Result<&str, ()>) -> R, R>(_key: &str, f: F) -> R {
     f(Err(()))
 }
@@ -10,6 +17,10 @@ pub fn write(_key: &str, _value: &[u8]) -> Result<(), ()> {
     Err(())
 }
 
+pub fn write_many(_records: &[(String, Vec<u8>)]) -> Result<(), ()> {
+    Err(())
+}
+
 pub fn remove(_key: &str) -> Result<(), ()> {
     Err(())
 }
@@ -160,9 +160,33 @@ fn read_injection_status(channel: u32, probe: u8) -> u8 {
     0
 }
 
+// Probes enabled with HostMessage::Monitor are checked at this interval,
+// in milliseconds, and reported when they change.
+const DEFAULT_INTERVAL: u64 = 200;
+// Subscriptions cannot ask for probes to be checked more often than this,
+// so that monitoring does not starve the other threads.
+const MIN_INTERVAL: u64 = 10;
+
+struct Watch {
+    previous: Option<u32>,
+    interval: u64,
+    periodic: bool,
+    next_check: u64
+}
+
+impl Watch {
+    fn new(interval: u64, periodic: bool) -> Watch {
+        Watch {
+            previous: None,
+            interval: if interval < MIN_INTERVAL { MIN_INTERVAL } else { interval },
+            periodic: periodic,
+            next_check: 0
+        }
+    }
+}
+
 fn connection_worker(io: &Io, mut stream: &mut TcpStream) -> io::Result<()> {
     let mut watch_list = BTreeMap::new();
-    let mut next_check = 0;
 
     check_magic(&mut stream)?;
     info!("new connection from {}", stream.remote_endpoint());
@@ -173,7 +197,8 @@ fn connection_worker(io: &Io, mut stream: &mut TcpStream) -> io::Result<()> {
             match request {
                 HostMessage::Monitor { enable, channel, probe } => {
                     if enable {
-                        let _ = watch_list.entry((channel, probe)).or_insert(None);
+                        let _ = watch_list.entry((channel, probe))
+                                          .or_insert(Watch::new(DEFAULT_INTERVAL, false));
                     } else {
                         let _ = watch_list.remove(&(channel, probe));
                     }
@@ -187,26 +212,32 @@ fn connection_worker(io: &Io, mut stream: &mut TcpStream) -> io::Result<()> {
                         value: value
                     };
                     reply.write_to(stream)?;
+                },
+                HostMessage::Subscribe { channel, probe, interval, periodic } => {
+                    let _ = watch_list.insert((channel, probe),
+                                              Watch::new(interval as u64, periodic));
                 }
             }
         } else if !stream.may_recv() {
             return Ok(())
         }
 
-        if clock::get_ms() > next_check {
-            for (&(channel, probe), previous) in watch_list.iter_mut() {
-                let current = read_probe(channel, probe);
-                if previous.is_none() || (previous.unwrap() != current) {
-                    let message = DeviceMessage::MonitorStatus {
-                        channel: channel,
-                        probe: probe,
-                        value: current
-                    };
-                    message.write_to(stream)?;
-                    *previous = Some(current);
-                }
+        let now = clock::get_ms();
+        for (&(channel, probe), watch) in watch_list.iter_mut() {
+            if now < watch.next_check {
+                continue
+            }
+            let current = read_probe(channel, probe);
+            if watch.periodic || watch.previous != Some(current) {
+                let message = DeviceMessage::MonitorStatus {
+                    channel: channel,
+                    probe: probe,
+                    value: current
+                };
+                message.write_to(stream)?;
+                watch.previous = Some(current);
             }
-            next_check = clock::get_ms() + 200;
+            watch.next_check = now + watch.interval;
         }
 
         io.relinquish().unwrap();
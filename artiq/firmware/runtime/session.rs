@@ -247,6 +247,22 @@ fn process_host_message(io: &Io,
             }
         }
 
+        host::Request::FlashReadMany { ref keys } => {
+            config::read_many(keys, |result| {
+                match result {
+                    Ok(values) => host_write(stream, host::Reply::FlashReadMany(values)),
+                    Err(())    => host_write(stream, host::Reply::FlashError)
+                }
+            })
+        }
+
+        host::Request::FlashWriteMany { ref records } => {
+            match config::write_many(records) {
+                Ok(())  => host_write(stream, host::Reply::FlashOk),
+                Err(()) => host_write(stream, host::Reply::FlashError)
+            }
+        }
+
         host::Request::FlashRemove { ref key } => {
             match config::remove(key) {
                 Ok(()) => host_write(stream, host::Reply::FlashOk),
@@ -504,11 +520,27 @@ fn process_kern_message(io: &Io, mut stream: Option<&mut TcpStream>,
 fn process_kern_queued_rpc(stream: &mut TcpStream,
                            _session: &mut Session) -> io::Result<()> {
     rpc_queue::dequeue(|slice| {
-        debug!("comm<-kern (async RPC)");
-        let length = NetworkEndian::read_u32(slice) as usize;
-        host_write(stream, host::Reply::RpcRequest { async: true })?;
-        debug!("{:?}", &slice[4..][..length]);
-        stream.write(&slice[4..][..length])?;
+        // See ksupport/lib.rs:rpc_append for the layout of the chunk.
+        let mut records = Vec::new();
+        let mut offset = 0;
+        while offset + 4 <= slice.len() {
+            let length = NetworkEndian::read_u32(&slice[offset..]) as usize;
+            if length == 0 { break }
+            records.push(&slice[offset + 4..][..length]);
+            offset += 4 + length;
+        }
+
+        if records.len() == 1 {
+            debug!("comm<-kern (async RPC)");
+            host_write(stream, host::Reply::RpcRequest { async: true })?;
+        } else {
+            debug!("comm<-kern ({} batched RPCs)", records.len());
+            host_write(stream, host::Reply::RpcBatch { count: records.len() as u32 })?;
+        }
+        for record in records {
+            debug!("{:?}", record);
+            stream.write_all(record)?;
+        }
         Ok(())
     })
 }
@@ -6,6 +6,7 @@ from artiq.master.databases import DeviceDB, DatasetDB
 from artiq.master.worker_db import DeviceManager, DatasetManager
 from artiq.language.environment import ProcessArgumentManager
 from artiq.coredevice.core import CompileError
+from artiq.compiler.profiler import ProfileReport
 from artiq.tools import *
 
 
@@ -26,6 +27,8 @@ def get_argparser():
 
     parser.add_argument("-o", "--output", default=None,
                         help="output file")
+    parser.add_argument("-p", "--profile", default=False, action="store_true",
+                        help="print the time spent in each compilation stage")
     parser.add_argument("file", metavar="FILE",
                         help="file containing the experiment to compile")
     parser.add_argument("arguments", metavar="ARGUMENTS",
@@ -53,9 +56,14 @@ def main():
         core_name = exp.run.artiq_embedded.core_name
         core = getattr(exp_inst, core_name)
 
+        profile_hook = None
+        if args.profile:
+            profile_hook = ProfileReport()
+
         object_map, kernel_library, _, _ = \
             core.compile(exp.run, [exp_inst], {},
-                         attribute_writeback=False, print_as_rpc=False)
+                         attribute_writeback=False, print_as_rpc=False,
+                         profile_hook=profile_hook)
     except CompileError as error:
         return
     finally:
@@ -64,6 +72,9 @@ def main():
     if object_map.has_rpc():
         raise ValueError("Experiment must not use RPC")
 
+    if args.profile:
+        print(profile_hook.format())
+
     output = args.output
     if output is None:
         basename, ext = os.path.splitext(args.file)
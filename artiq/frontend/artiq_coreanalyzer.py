@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
 import sys
 
 from artiq.tools import verbosity_args, init_logger
 from artiq.master.databases import DeviceDB
 from artiq.master.worker_db import DeviceManager
-from artiq.coredevice.comm_analyzer import (get_analyzer_dump,
-                                            decode_dump, decoded_dump_to_vcd)
+from artiq.coredevice.comm_analyzer import (AnalyzerDumpStream,
+                                            decode_dump, decoded_dump_to_vcd,
+                                            get_ref_period, get_channel_names,
+                                            dump_statistics, format_statistics)
 
 
 def get_argparser():
@@ -26,16 +29,61 @@ def get_argparser():
                         help="format and write contents to VCD file")
     parser.add_argument("-d", "--write-dump", type=str, default=None,
                         help="write raw dump file")
+    parser.add_argument("-s", "--statistics", default=False, action="store_true",
+                        help="print per-channel event counts, rates, slack "
+                             "and exceptions")
+    parser.add_argument("--json", default=False, action="store_true",
+                        help="print statistics as JSON instead of a table")
+    parser.add_argument("--slack-threshold", type=float, default=1e-6,
+                        help="count output events with less slack than this, "
+                             "in seconds, in the statistics "
+                             "(default: %(default)s)")
     return parser
 
 
+def print_header(dump):
+    print("Log channel:", dump.log_channel)
+    print("DDS one-hot:", dump.dds_onehot_sel)
+
+
+def stream_dump(stream, args):
+    if args.print_decoded:
+        print_header(stream)
+    if args.write_dump:
+        f = open(args.write_dump, "wb")
+    else:
+        f = None
+    try:
+        for messages in stream.blocks(f):
+            if args.print_decoded:
+                for message in messages:
+                    print(message)
+    finally:
+        if f is not None:
+            f.close()
+
+
+def print_statistics(devices, dump, args):
+    ref_period = get_ref_period(devices)
+    if ref_period is None:
+        print("Unable to determine core device ref_period, assuming 1ns",
+              file=sys.stderr)
+        ref_period = 1e-9
+    statistics = dump_statistics(dump, ref_period, get_channel_names(devices),
+                                 args.slack_threshold)
+    if args.json:
+        print(json.dumps(statistics, indent=4))
+    else:
+        print(format_statistics(statistics))
+
+
 def main():
     args = get_argparser().parse_args()
     init_logger(args)
 
-    if (not args.print_decoded
+    if (not args.print_decoded and not args.statistics
             and args.write_vcd is None and args.write_dump is None):
-        print("No action selected, use -p, -w and/or -d. See -h for help.")
+        print("No action selected, use -p, -w, -d and/or -s. See -h for help.")
         sys.exit(1)
 
     device_mgr = DeviceManager(DeviceDB(args.device_db))
@@ -44,13 +92,19 @@ def main():
             dump = f.read()
     else:
         core_addr = device_mgr.get_desc("core")["arguments"]["host"]
-        dump = get_analyzer_dump(core_addr)
+        with AnalyzerDumpStream(core_addr) as stream:
+            if args.write_vcd is None and not args.statistics:
+                # Print and save the messages as they are received.
+                stream_dump(stream, args)
+                return
+            dump = stream.read()
     decoded_dump = decode_dump(dump)
     if args.print_decoded:
-        print("Log channel:", decoded_dump.log_channel)
-        print("DDS one-hot:", decoded_dump.dds_onehot_sel)
+        print_header(decoded_dump)
         for message in decoded_dump.messages:
             print(message)
+    if args.statistics:
+        print_statistics(device_mgr.get_device_db(), decoded_dump, args)
     if args.write_vcd:
         with open(args.write_vcd, "w") as f:
             decoded_dump_to_vcd(f, device_mgr.get_device_db(),
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 
 import argparse
+import logging
+import os
 import struct
 
 from artiq.tools import verbosity_args, init_logger
+from artiq.protocols import pyon
 from artiq.master.databases import DeviceDB
 from artiq.master.worker_db import DeviceManager
 
 
+logger = logging.getLogger(__name__)
+
+
 def get_argparser():
     parser = argparse.ArgumentParser(description="ARTIQ core device "
                                                  "configuration tool")
@@ -43,10 +49,83 @@ def get_argparser():
                           default=[], type=str,
                           help="key to be deleted from core device config")
 
+    p_sync = subparsers.add_parser("sync",
+                                   help="write key-value records to core "
+                                        "device config, skipping those "
+                                        "that are already up to date")
+    p_sync.add_argument("source", metavar="SOURCE", type=str,
+                        help="directory containing one file per key, or "
+                             "PYON file containing a dictionary that maps "
+                             "keys to strings or bytes")
+    p_sync.add_argument("-n", "--dry-run", default=False, action="store_true",
+                        help="only print the keys that would be written")
+
     subparsers.add_parser("erase", help="fully erase core device config")
     return parser
 
 
+def load_records(source):
+    """Load the key-value records to be synchronized from ``source``.
+
+    ``source`` is either a directory, in which case the name of each file
+    is a key and its content the value, or a PYON file containing a
+    dictionary. Values are returned as ``bytes``; strings are UTF-8 encoded.
+    """
+    records = dict()
+    if os.path.isdir(source):
+        for key in sorted(os.listdir(source)):
+            filename = os.path.join(source, key)
+            if os.path.isfile(filename):
+                with open(filename, "rb") as f:
+                    records[key] = f.read()
+    else:
+        for key, value in pyon.load_file(source).items():
+            if isinstance(value, str):
+                value = value.encode("utf-8")
+            elif not isinstance(value, bytes):
+                raise TypeError("Value of key {} is neither a string nor "
+                                "bytes".format(key))
+            records[key] = value
+    return records
+
+
+def sync_records(comm, records, dry_run=False):
+    """Write the records whose value differs from the one stored in
+    the core device flash, using one bulk read and one bulk write.
+
+    :return: the sorted list of keys that differ.
+    """
+    current = comm.flash_storage_read_many(records.keys())
+    changed = sorted(key for key, value in records.items()
+                     if current[key] != value)
+    logger.info("%d of %d keys differ", len(changed), len(records))
+    if changed and not dry_run:
+        comm.flash_storage_write_many([(key, records[key])
+                                       for key in changed])
+    return changed
+
+
+def write_records(comm, records):
+    """Write the records with a single bulk request or, if the core device
+    firmware does not support it, with one request per record. An empty
+    value removes the key.
+    """
+    try:
+        comm.flash_storage_write_many(records)
+        return
+    except ConnectionError:
+        # Firmware without bulk requests closes the connection when it
+        # receives one, without writing anything.
+        logger.warning("core device does not support bulk flash storage "
+                       "writes, writing one key at a time")
+        comm.close()
+    for key, value in records:
+        if value:
+            comm.flash_storage_write(key, value)
+        else:
+            comm.flash_storage_remove(key)
+
+
 def main():
     args = get_argparser().parse_args()
     init_logger(args)
@@ -62,14 +141,19 @@ def main():
             else:
                 print(value)
         elif args.action == "write":
+            records = []
             for key, value in args.string:
-                comm.flash_storage_write(key, value.encode("utf-8"))
+                records.append((key, value.encode("utf-8")))
             for key, filename in args.file:
                 with open(filename, "rb") as fi:
-                    comm.flash_storage_write(key, fi.read())
+                    records.append((key, fi.read()))
+            write_records(comm, records)
         elif args.action == "delete":
-            for key in args.key:
-                comm.flash_storage_remove(key)
+            write_records(comm, [(key, b"") for key in args.key])
+        elif args.action == "sync":
+            for key in sync_records(comm, load_records(args.source),
+                                    args.dry_run):
+                print(key)
         elif args.action == "erase":
             comm.flash_storage_erase()
     finally:
@@ -19,29 +19,31 @@ def get_argparser():
     return parser
 
 
-def write_record(f, key, value):
-    key_size = len(key) + 1
-    value_size = len(value)
-    record_size = key_size + value_size + 4
-    f.write(struct.pack(">l", record_size))
-    f.write(key.encode())
-    f.write(b"\x00")
-    f.write(value)
+def write_record(image, key, value):
+    key = key.encode()
+    record_size = 4 + len(key) + 1 + len(value)
+    image += struct.pack(">l", record_size)
+    image += key
+    image += b"\x00"
+    image += value
 
 
-def write_end_marker(f):
-    f.write(b"\xff\xff\xff\xff")
+def write_end_marker(image):
+    image += b"\xff\xff\xff\xff"
 
 
 def main():
     args = get_argparser().parse_args()
+    # The image is assembled in memory and written out at once.
+    image = bytearray()
+    for key, string in args.s:
+        write_record(image, key, string.encode())
+    for key, filename in args.f:
+        with open(filename, "rb") as fi:
+            write_record(image, key, fi.read())
+    write_end_marker(image)
     with open(args.output, "wb") as fo:
-        for key, string in args.s:
-            write_record(fo, key, string.encode())
-        for key, filename in args.f:
-            with open(filename, "rb") as fi:
-                write_record(fo, key, fi.read())
-        write_end_marker(fo)
+        fo.write(image)
 
 if __name__ == "__main__":
     main()
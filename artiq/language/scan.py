@@ -15,11 +15,19 @@ Iterating multiple times on the same scan object is possible, with the scan
 yielding the same values each time. Iterating concurrently on the
 same scan object (e.g. via nested loops) is also supported, and the
 iterators are independent from each other.
+
+On the host, the points of a scan can also be obtained in bulk as a NumPy
+array with the ``points`` method of a scan object, and the points of
+a multi-dimensional scan in blocks with
+:meth:`artiq.language.scan.MultiScanManager.blocks`.
+:class:`artiq.language.scan.ScanBlocks` uses these blocks to run a kernel
+once per block of points rather than once per point.
 """
 
-import random
 import inspect
-from itertools import product
+import random
+
+import numpy
 
 from artiq.language.core import *
 from artiq.language.environment import NoDefault, DefaultMissing
@@ -28,11 +36,18 @@ from artiq.language import units
 
 __all__ = ["ScanObject",
            "NoScan", "RangeScan", "ExplicitScan",
-           "Scannable", "MultiScanManager"]
+           "Scannable", "MultiScanManager", "ScanBlocks"]
+
+
+# Number of points computed at once when iterating over a scan.
+_block_size = 4096
 
 
 class ScanObject:
-    pass
+    def points(self, start=0, stop=None):
+        """Return the points of the scan with indices from ``start`` to
+        ``stop`` (default: the end of the scan) as a NumPy array."""
+        return numpy.array(list(self))[start:stop]
 
 
 class NoScan(ScanObject):
@@ -54,6 +69,10 @@ class NoScan(ScanObject):
     def __len__(self):
         return self.repetitions
 
+    def points(self, start=0, stop=None):
+        return numpy.full(len(range(*slice(start, stop).indices(self.repetitions))),
+                          self.value)
+
     def describe(self):
         return {"ty": "NoScan", "value": self.value,
                 "repetitions": self.repetitions}
@@ -61,7 +80,12 @@ class NoScan(ScanObject):
 
 class RangeScan(ScanObject):
     """A scan object that yields a fixed number of evenly spaced values in a
-    range. If ``randomize`` is True the points are randomly ordered."""
+    range. If ``randomize`` is True the points are randomly ordered.
+
+    The points are computed from their index when they are needed, rather
+    than stored; a randomized scan stores the permutation of the indices.
+    The ``sequence`` attribute, a list of all points, is only built when it
+    is first accessed (e.g. by a kernel) and is then kept."""
     def __init__(self, start, stop, npoints, randomize=False, seed=None):
         self.start = start
         self.stop = stop
@@ -69,23 +93,55 @@ class RangeScan(ScanObject):
         self.randomize = randomize
         self.seed = seed
 
-        if npoints == 0:
-            self.sequence = []
-        if npoints == 1:
-            self.sequence = [self.start]
+        if npoints > 1:
+            self._step = (stop - start)/(npoints - 1)
         else:
-            dx = (stop - start)/(npoints - 1)
-            self.sequence = [i*dx + start for i in range(npoints)]
+            self._step = 0.0
 
         if randomize:
+            indices = list(range(npoints))
             rng = random.Random(seed)
-            random.shuffle(self.sequence, rng.random)
+            random.shuffle(indices, rng.random)
+            self._permutation = numpy.array(indices, dtype=numpy.int64)
+        else:
+            self._permutation = None
+
+        self._sequence = None
+
+    def points(self, start=0, stop=None):
+        if self._sequence is not None:
+            return numpy.array(self._sequence[start:stop])
+        indices = numpy.arange(*slice(start, stop).indices(self.npoints))
+        if self._permutation is not None:
+            indices = self._permutation[indices]
+        if self.npoints == 1:
+            return numpy.full(len(indices), self.start)
+        return indices*self._step + self.start
+
+    @property
+    def sequence(self):
+        if self._sequence is None:
+            self._sequence = self.points().tolist()
+        return self._sequence
+
+    @sequence.setter
+    def sequence(self, sequence):
+        self._sequence = sequence
+
+    def _gen(self):
+        if self._sequence is not None:
+            yield from self._sequence
+            return
+        for start in range(0, self.npoints, _block_size):
+            yield from self.points(start, start + _block_size).tolist()
 
     @portable
     def __iter__(self):
-        return iter(self.sequence)
+        return self._gen()
 
     def __len__(self):
+        if self._sequence is not None:
+            return len(self._sequence)
         return self.npoints
 
     def describe(self):
@@ -108,6 +164,9 @@ class ExplicitScan(ScanObject):
     def __len__(self):
         return len(self.sequence)
 
+    def points(self, start=0, stop=None):
+        return numpy.asarray(self.sequence)[start:stop]
+
     def describe(self):
         return {"ty": "ExplicitScan", "sequence": self.sequence}
 
@@ -219,25 +278,162 @@ class MultiScanManager:
         self.names = [a[0] for a in args]
         self.scan_objects = [a[1] for a in args]
 
+        names = tuple(self.names)
         class ScanPoint:
-            def __init__(self, **kwargs):
-                self.attr = set()
-                for k, v in kwargs.items():
+            attr = set(names)
+
+            def __init__(self, *values):
+                for k, v in zip(names, values):
                     setattr(self, k, v)
-                    self.attr.add(k)
 
             def __repr__(self):
                 return ("<ScanPoint " +
                     " ".join("{}={}".format(k, getattr(self, k))
-                             for k in self.attr) +
+                             for k in names) +
                     ">")
 
         self.scan_point_cls = ScanPoint
 
+    def __len__(self):
+        length = 1
+        for scan_object in self.scan_objects:
+            length *= len(scan_object)
+        return length
+
+    def blocks(self, block_size=_block_size):
+        """
+        Iterate over the scan in blocks of up to ``block_size`` points.
+
+        Each block is a NumPy structured array with one field per scan
+        object, named after it; its rows are the points of the scan,
+        in the same order as they are yielded by iteration.
+        """
+        if block_size < 1:
+            raise ValueError("block size must be positive")
+
+        columns = []
+        for scan_object in self.scan_objects:
+            if isinstance(scan_object, ScanObject):
+                columns.append(scan_object.points())
+            else:
+                columns.append(numpy.array(list(scan_object)))
+        shape = tuple(len(column) for column in columns)
+        dtype = [(name, column.dtype) for name, column in zip(self.names, columns)]
+
+        length = 1
+        for dimension in shape:
+            length *= dimension
+        for start in range(0, length, block_size):
+            indices = numpy.unravel_index(
+                numpy.arange(start, min(start + block_size, length)), shape)
+            block = numpy.empty(len(indices[0]), dtype)
+            for name, column, index in zip(self.names, columns, indices):
+                block[name] = column[index]
+            yield block
+
     def _gen(self):
-        for values in product(*self.scan_objects):
-            d = {k: v for k, v in zip(self.names, values)}
-            yield self.scan_point_cls(**d)
+        for block in self.blocks():
+            columns = [block[name].tolist() for name in self.names]
+            for values in zip(*columns):
+                yield self.scan_point_cls(*values)
 
     def __iter__(self):
         return self._gen()
+
+
+class ScanBlocks:
+    """
+    Runs a kernel over a scan in blocks of points, so that the cost of
+    compiling, loading and starting the kernel is paid once per block rather
+    than once per point.
+
+    The number of points in a block is chosen so that the kernel takes
+    about ``block_duration`` to process it, given that it takes
+    ``point_duration`` to process one point. Between blocks, the scheduler
+    is asked whether the experiment should pause, and if so the connection
+    to the core device is closed and the experiment yields to the scheduler
+    (which raises :exc:`TerminationRequested` if it is being terminated).
+
+    The kernel is called with one NumPy array argument per scan dimension,
+    holding the values of the points of the block. It should report its
+    results with a single call to the asynchronous RPC :meth:`store`,
+    e.g. ::
+
+        @kernel
+        def run_block(self, frequencies):
+            results = [0 for _ in range(len(frequencies))]
+            for i in range(len(frequencies)):
+                results[i] = self.measure(frequencies[i])
+            self.scan_blocks.store(results)
+
+        def run(self):
+            self.scan_blocks = ScanBlocks(self.frequencies, 100*us,
+                                          scheduler=self.scheduler,
+                                          core=self.core)
+            results = self.scan_blocks.run(self.run_block)
+
+    :param scan: a scan object, or a :class:`MultiScanManager`.
+    :param point_duration: the time it takes the kernel to process
+        a point, in seconds.
+    :param block_duration: the time it should take the kernel to process
+        a block, in seconds.
+    :param max_block_size: the maximum number of points in a block.
+        The points are compiled into the kernel as constants, so very large
+        blocks make compilation slow.
+    :param scheduler: the scheduler; if None, the experiment never pauses.
+    :param core: the core device, whose connection is closed before pausing.
+    """
+    def __init__(self, scan, point_duration, block_duration=1.0,
+                 max_block_size=10000, scheduler=None, core=None):
+        self.scan = scan
+        self.block_size = max(1, min(int(block_duration/point_duration),
+                                     max_block_size))
+        self.scheduler = scheduler
+        self.core = core
+        self._results = []
+
+    def __len__(self):
+        """Return the number of blocks."""
+        return -(-len(self.scan)//self.block_size)
+
+    def _columns(self):
+        if isinstance(self.scan, MultiScanManager):
+            for block in self.scan.blocks(self.block_size):
+                yield [block[name] for name in self.scan.names]
+        else:
+            for start in range(0, len(self.scan), self.block_size):
+                yield [self.scan.points(start, start + self.block_size)]
+
+    def _check_pause(self):
+        if self.scheduler is not None and self.scheduler.check_pause():
+            if self.core is not None:
+                self.core.comm.close()
+            self.scheduler.pause()
+
+    def __iter__(self):
+        """Iterate over the blocks, checking whether the experiment should
+        pause between them. Each block is a list with one array per
+        scan dimension."""
+        for index, columns in enumerate(self._columns()):
+            if index > 0:
+                self._check_pause()
+            yield columns
+
+    @rpc(flags={"async"})
+    def store(self, results):
+        """Store the results of a block."""
+        self._results.append(results)
+
+    def results(self):
+        """Return the results stored so far, concatenated into an array."""
+        if not self._results:
+            return numpy.array([])
+        return numpy.concatenate(self._results)
+
+    def run(self, kernel):
+        """Call ``kernel`` on every block, and return the results
+        stored by it."""
+        self._results = []
+        for columns in self:
+            kernel(*columns)
+        return self.results()
@@ -1,4 +1,5 @@
 from random import Random
+import sys
 import numpy
 
 from artiq.language.core import delay, at_mu, kernel
@@ -6,8 +7,16 @@ from artiq.sim import time
 
 
 class Core:
-    def __init__(self, dmgr):
+    """Simulated core device.
+
+    After each kernel, its timeline is printed, or appended to
+    ``timeline_file`` if set. If ``vcd_file`` is set, the timeline
+    is also exported to it in VCD format, replacing the previous kernel's.
+    """
+    def __init__(self, dmgr, timeline_file=None, vcd_file=None):
         self.ref_period = 1
+        self.timeline_file = timeline_file
+        self.vcd_file = vcd_file
         self._level = 0
 
     def run(self, k_function, k_args, k_kwargs):
@@ -15,7 +24,15 @@ class Core:
         r = k_function.artiq_embedded.function(*k_args, **k_kwargs)
         self._level -= 1
         if self._level == 0:
-            print(time.manager.format_timeline())
+            if self.timeline_file is None:
+                time.manager.write_timeline(sys.stdout)
+                print()
+            else:
+                with open(self.timeline_file, "a") as f:
+                    time.manager.write_timeline(f)
+            if self.vcd_file is not None:
+                with open(self.vcd_file, "w") as f:
+                    time.manager.write_vcd(f)
             time.manager.timeline.clear()
         return r
 
@@ -1,7 +1,11 @@
-from operator import itemgetter
+import io
+from itertools import count
+
+import numpy
 
 from artiq.language.units import *
 from artiq.language import core as core_language
+from artiq.coredevice.comm_analyzer import VCDManager
 
 
 class SequentialTimeContext:
@@ -24,10 +28,66 @@ class ParallelTimeContext:
             self.block_duration = amount
 
 
+class Timeline:
+    """Events recorded by the simulation, as ``(time, description)`` pairs.
+
+    The times are stored in a NumPy array that grows geometrically, so that
+    recording and sorting millions of events remains cheap. Iterating yields
+    the events in the order they were recorded.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._times = numpy.empty(1024)
+        self._descriptions = []
+
+    def __len__(self):
+        return len(self._descriptions)
+
+    def append(self, event):
+        time, description = event
+        n = len(self._descriptions)
+        if n == len(self._times):
+            self._times = numpy.concatenate([self._times, numpy.empty(n)])
+        self._times[n] = time
+        self._descriptions.append(description)
+
+    def __iter__(self):
+        return zip(self._times[:len(self)].tolist(), self._descriptions)
+
+    def sorted(self):
+        """Return an iterator over the events ordered by time. Events
+        that happen at the same time keep the order they were recorded in.
+        """
+        times = self._times[:len(self)]
+        order = numpy.argsort(times, kind="mergesort")
+        return zip(times[order].tolist(),
+                   map(self._descriptions.__getitem__, order.tolist()))
+
+
+def _vcd_transitions(description):
+    # Map a simulation event to ((scope, name, width), value, offset)
+    # transitions, naming the signals like comm_analyzer does for the
+    # corresponding hardware. The offset is relative to the event time.
+    kind, name = description[:2]
+    if kind == "set":
+        yield (None, "ttl/" + name, 1), str(int(bool(description[2]))), 0
+    elif kind == "pulse" and len(description) == 3:
+        yield (None, "ttl/" + name, 1), "1", 0
+        yield (None, "ttl/" + name, 1), "0", description[2]
+    elif kind == "pulse":
+        signal = ("dds/" + name, name + "/frequency", 64)
+        yield signal, float(description[2]), 0
+        yield signal, 0.0, description[3]
+    elif kind == "set_voltage":
+        yield (None, "dac/" + name, 64), float(description[2]), 0
+
+
 class Manager:
     def __init__(self):
         self.stack = [SequentialTimeContext(0*s)]
-        self.timeline = []
+        self.timeline = Timeline()
 
     def enter_sequential(self):
         new_context = SequentialTimeContext(self.get_time_mu())
@@ -58,16 +118,66 @@ class Manager:
     def event(self, description):
         self.timeline.append((self.get_time_mu(), description))
 
-    def format_timeline(self):
-        r = ""
+    def write_timeline(self, fileobj):
+        """Write the events of the timeline, ordered by time, to
+        ``fileobj`` as text, one line per event."""
+        line_format = "@{:.9f} (+{:.9f}) {}\n".format
+        lines = []
         prev_time = 0*s
-        for time, description in sorted(self.timeline, key=itemgetter(0)):
-            r += "@{:.9f} (+{:.9f}) ".format(time, time-prev_time)
-            for item in description:
-                r += "{:16}".format(str(item))
-            r += "\n"
+        for time, description in self.timeline.sorted():
+            lines.append(line_format(
+                time, time-prev_time,
+                "".join([str(item).ljust(16) for item in description])))
             prev_time = time
-        return r
+            if len(lines) == 4096:
+                fileobj.writelines(lines)
+                lines.clear()
+        fileobj.writelines(lines)
+
+    def format_timeline(self):
+        r = io.StringIO()
+        self.write_timeline(r)
+        return r.getvalue()
+
+    def write_vcd(self, fileobj, ref_period=1*ns):
+        """Export the timeline to ``fileobj`` in the VCD format produced by
+        :func:`artiq.coredevice.comm_analyzer.decoded_dump_to_vcd`, so that
+        simulated and hardware traces can be compared.
+
+        TTL outputs are exported as ``ttl/<name>``, the frequency of wave
+        outputs as ``dds/<name>/frequency`` and voltage outputs as
+        ``dac/<name>``; other events are not exported.
+
+        :param ref_period: Time resolution of the VCD file.
+        """
+        transitions = []
+        order = count()
+        for time, description in self.timeline.sorted():
+            for signal, value, offset in _vcd_transitions(description):
+                t = int(round((time + offset)/ref_period))
+                transitions.append((t, next(order), signal, value))
+        transitions.sort()
+
+        vcd_manager = VCDManager(fileobj)
+        vcd_manager.set_timescale_ps(ref_period*1e12)
+        channels = dict()
+        for t, _, signal, value in transitions:
+            if signal not in channels:
+                scope, name, width = signal
+                if scope is None:
+                    channels[signal] = vcd_manager.get_channel(name, width)
+                else:
+                    with vcd_manager.scope(scope):
+                        channels[signal] = vcd_manager.get_channel(name, width)
+
+        vcd_manager.set_time(0)
+        for t, _, signal, value in transitions:
+            vcd_manager.set_time(t)
+            if isinstance(value, float):
+                channels[signal].set_value_double(value)
+            else:
+                channels[signal].set_value(value)
+        vcd_manager.flush()
 
 manager = Manager()
 core_language.set_time_manager(manager)
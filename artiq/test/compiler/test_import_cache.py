@@ -0,0 +1,78 @@
+import os
+import sys
+import linecache
+import tempfile
+import unittest
+import importlib
+import importlib.machinery as im
+
+from artiq.compiler import import_cache
+
+
+_kernel_module = """from artiq.experiment import *
+
+@kernel
+def entrypoint():
+    pass
+"""
+
+
+class ImportCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.exec_module = im.SourceFileLoader.exec_module
+        self.getlines = linecache.getlines
+        import_cache.install_hook()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name,
+                                     "import_cache_kernel.py")
+        with open(self.filename, "w") as f:
+            f.write(_kernel_module)
+        sys.path.insert(0, self.directory.name)
+        importlib.invalidate_caches()
+        importlib.import_module("import_cache_kernel")
+
+    def tearDown(self):
+        im.SourceFileLoader.exec_module = self.exec_module
+        linecache.getlines = self.getlines
+        import_cache.pending.pop(self.filename, None)
+        import_cache.cache.pop(self.filename, None)
+        sys.modules.pop("import_cache_kernel", None)
+        sys.path.remove(self.directory.name)
+        self.directory.cleanup()
+
+    def modify(self):
+        with open(self.filename, "w") as f:
+            f.write(_kernel_module.replace("pass", "delay(1*s)"))
+        stat = os.stat(self.filename)
+        # make sure the modification is visible even with coarse timestamps
+        os.utime(self.filename, ns=(stat.st_atime_ns,
+                                    stat.st_mtime_ns + 10**9))
+
+    def test_unmodified(self):
+        lines = linecache.getlines(self.filename)
+        self.assertEqual("".join(lines), _kernel_module)
+
+    def test_modified_after_import(self):
+        # The source is captured at import time, so the compiler still sees
+        # the code that was imported.
+        self.modify()
+        lines = linecache.getlines(self.filename)
+        self.assertEqual("".join(lines), _kernel_module)
+
+    def test_encoding(self):
+        with open(self.filename, "wb") as f:
+            f.write(b"# -*- coding: latin-1 -*-\n"
+                    b"from artiq.experiment import *\r\n"
+                    b"x = '\xe9'")
+        sys.modules.pop("import_cache_kernel")
+        importlib.import_module("import_cache_kernel")
+        self.assertEqual(linecache.getlines(self.filename),
+                         ["# -*- coding: latin-1 -*-\n",
+                          "from artiq.experiment import *\n",
+                          "x = '\xe9'\n"])
+
+    def test_modified_after_read(self):
+        lines = linecache.getlines(self.filename)
+        self.modify()
+        self.assertEqual(linecache.getlines(self.filename), lines)
@@ -0,0 +1,114 @@
+import unittest
+
+from pythonparser import diagnostic
+
+from artiq.compiler import types
+from artiq.compiler.module import Source
+from artiq.compiler.transforms import Inferencer, IODelayEstimator
+
+
+CALL_CHAIN = """
+def f(n):
+    g(n)
+    delay_mu(1)
+
+def g(n):
+    for _ in range(n):
+        h()
+
+def h():
+    delay_mu(2)
+    k()
+
+def k():
+    with interleave:
+        delay_mu(3)
+        delay_mu(4)
+
+def indeterminate(n):
+    if n:
+        delay_mu(1)
+
+def caller():
+    delay_mu(5)
+    indeterminate(1)
+
+class c:
+    def m(self, x):
+        f(2)
+        delay(x)
+
+def method_caller(i):
+    i.m(1.0)
+
+f(1)
+caller()
+method_caller(c())
+"""
+
+
+def parse(code):
+    engine = diagnostic.Engine(all_errors_are_fatal=True)
+    source = Source.from_string(code, engine=engine)
+    # As in Module, infer again to resolve the types of method calls.
+    Inferencer(engine=engine).visit(source.typedtree)
+    return source
+
+
+def estimate(code, fixpoint):
+    source = parse(code)
+    estimator = IODelayEstimator(engine=source.engine, ref_period=1e-6)
+    fixpoint(estimator, source.typedtree)
+
+    printer = types.TypePrinter()
+    return {name: printer.name(typ)
+            for name, typ in source.globals.items()
+            if types.is_function(typ)}
+
+
+def visit_fixpoint(estimator, typedtree):
+    estimator.visit_fixpoint(typedtree)
+
+
+def visit_until_unchanged(estimator, typedtree):
+    # Visit the whole tree until no delay changes.
+    def delays():
+        return [str(typ.find().delay.find())
+                for typ in typedtree.typing_env.values()
+                if types.is_function(typ)]
+    while True:
+        old_delays = delays()
+        estimator.visit(typedtree)
+        if delays() == old_delays:
+            break
+
+
+class TestIODelayEstimator(unittest.TestCase):
+    def test_identical(self):
+        expected = estimate(CALL_CHAIN, visit_until_unchanged)
+        self.assertEqual(estimate(CALL_CHAIN, visit_fixpoint), expected)
+        self.assertIn("delay(6 * n + 1 mu)", expected["f"])
+        self.assertIn("delay(?)", expected["caller"])
+
+    def test_iterations(self):
+        code = "\n".join("def f{}():\n    delay_mu(1)\n    f{}()\n".format(level, level + 1)
+                         for level in range(20))
+        code += "def f20():\n    delay_mu(1)\n"
+
+        source = parse(code)
+        estimator = IODelayEstimator(engine=source.engine, ref_period=1e-6)
+        estimator.visit_fixpoint(source.typedtree)
+        self.assertEqual(estimator.iterations, 21)
+        self.assertIn("delay(21 mu)",
+                      types.TypePrinter().name(source.globals["f0"]))
+
+    def test_many_zero_delay_calls(self):
+        code = "def f():\n    pass\n\ndef g():\n"
+        code += "    f()\n" * 5000
+        code += "    delay_mu(1)\n"
+
+        source = parse(code)
+        estimator = IODelayEstimator(engine=source.engine, ref_period=1e-6)
+        estimator.visit_fixpoint(source.typedtree)
+        self.assertIn("delay(1 mu)",
+                      types.TypePrinter().name(source.globals["g"]))
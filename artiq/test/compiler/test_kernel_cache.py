@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from artiq.compiler import kernel_cache
+from artiq.compiler.kernel_cache import KernelCache, default_kernel_cache
+
+
+class MockTarget:
+    triple = "or1k-linux"
+    data_layout = "E-m:e-p:32:32"
+    features = ["mul", "div"]
+
+
+class TestKernelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = KernelCache(self.tmpdir.name, size_limit=100)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key(self):
+        target = MockTarget()
+        key = KernelCache.key(target, ["define void @f() {}"])
+        self.assertEqual(key, KernelCache.key(target, ["define void @f() {}"]))
+        self.assertNotEqual(key, KernelCache.key(target, ["define void @g() {}"]))
+
+        other_target = MockTarget()
+        other_target.features = ["mul"]
+        self.assertNotEqual(key, KernelCache.key(other_target, ["define void @f() {}"]))
+
+    def test_key_versions(self):
+        target = MockTarget()
+        key = KernelCache.key(target, ["define void @f() {}"])
+
+        binutils_version = kernel_cache._binutils_version(target.triple)
+        try:
+            kernel_cache._binutils_versions[target.triple] = "GNU ld (other)"
+            self.assertNotEqual(key, KernelCache.key(target, ["define void @f() {}"]))
+        finally:
+            kernel_cache._binutils_versions[target.triple] = binutils_version
+
+        llvmlite_version = kernel_cache.llvmlite_version
+        try:
+            kernel_cache.llvmlite_version = "0.0"
+            self.assertNotEqual(key, KernelCache.key(target, ["define void @f() {}"]))
+        finally:
+            kernel_cache.llvmlite_version = llvmlite_version
+
+        self.assertEqual(key, KernelCache.key(target, ["define void @f() {}"]))
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.put("a", b"library", b"lib")
+        self.assertEqual(self.cache.get("a"), (b"library", b"lib"))
+
+    def test_evict_lru(self):
+        self.cache.put("a", b"x"*20, b"x"*10)
+        self.cache.put("b", b"x"*20, b"x"*10)
+        # Make "a" the least recently used entry, then use "b".
+        for suffix in (".elf", ".stripped.elf"):
+            os.utime(os.path.join(self.tmpdir.name, "a" + suffix), (0, 0))
+        self.assertIsNotNone(self.cache.get("b"))
+
+        self.cache.put("c", b"x"*40, b"x"*10)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_evict_entries(self):
+        # The size limit holds two entries of 30 bytes, i.e. four files.
+        self.cache.size_limit = 60
+        for i, key in enumerate("abc"):
+            self.cache.put(key, b"x"*20, b"x"*10)
+            for suffix in (".elf", ".stripped.elf"):
+                os.utime(os.path.join(self.tmpdir.name, key + suffix),
+                         (i, i))
+        self.cache.evict()
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)),
+                         ["b.elf", "b.stripped.elf",
+                          "c.elf", "c.stripped.elf"])
+
+    def test_evict_temporary(self):
+        stale = os.path.join(self.tmpdir.name, "stale.tmp")
+        fresh = os.path.join(self.tmpdir.name, "fresh.tmp")
+        for path in (stale, fresh):
+            with open(path, "wb") as f:
+                f.write(b"x")
+        os.utime(stale, (0, 0))
+        self.cache.evict()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(fresh))
+
+    def test_lazy_directory(self):
+        directory = os.path.join(self.tmpdir.name, "kernels")
+        cache = KernelCache(directory)
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(os.path.exists(directory))
+        cache.put("a", b"library", b"lib")
+        self.assertEqual(cache.get("a"), (b"library", b"lib"))
+
+
+class TestDefaultKernelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.environ = dict(os.environ)
+        os.environ["ARTIQ_KERNEL_CACHE"] = self.tmpdir.name
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.tmpdir.cleanup()
+
+    def test_size(self):
+        os.environ["ARTIQ_KERNEL_CACHE_SIZE"] = "16"
+        self.assertEqual(default_kernel_cache().size_limit, 16*1024*1024)
+
+    def test_invalid_size(self):
+        os.environ["ARTIQ_KERNEL_CACHE_SIZE"] = "1G"
+        with self.assertLogs(kernel_cache.logger, "WARNING"):
+            cache = default_kernel_cache()
+        self.assertEqual(cache.size_limit, 256*1024*1024)
+
+    def test_disabled(self):
+        os.environ["ARTIQ_KERNEL_CACHE"] = ""
+        self.assertIsNone(default_kernel_cache())
+        del os.environ["ARTIQ_KERNEL_CACHE"]
+        self.assertIsNone(default_kernel_cache())
+
+    def test_dump_requested(self):
+        for variable in kernel_cache._dump_variables:
+            os.environ.pop(variable, None)
+        self.assertFalse(kernel_cache.dump_requested())
+        os.environ["ARTIQ_DUMP_ELF"] = ""
+        self.assertTrue(kernel_cache.dump_requested())
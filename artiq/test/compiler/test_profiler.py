@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from artiq.compiler.module import Module, Source
+from artiq.compiler.profiler import (ProfileReport, count_nodes,
+                                     count_instructions)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_module(self):
+        report = ProfileReport()
+        Module(Source.from_string("def f(x):\n    return x + 1\nf(1)\n"),
+               profile_hook=report)
+
+        stages = [entry["stage"] for entry in report.stages]
+        self.assertEqual(stages[0], "Cast monomorphization")
+        self.assertIn("I/O delay estimation", stages)
+        self.assertEqual(stages[-1], "Local access validation")
+        for entry in report.stages:
+            self.assertGreaterEqual(entry["seconds"], 0)
+            if entry["stage"] == "I/O delay estimation":
+                self.assertGreaterEqual(entry["iterations"], 1)
+            if entry["stage"] == "Interleaving":
+                self.assertGreater(entry["instructions"], 0)
+
+        data = json.loads(report.to_json(kernel="f"))
+        self.assertEqual(data["kernel"], "f")
+        self.assertEqual(len(data["stages"]), len(stages))
+        self.assertAlmostEqual(data["total_seconds"], report.total())
+
+    def test_counters(self):
+        # The counters describe the tree or IR as each stage receives it.
+        report = ProfileReport()
+        src = Source.from_string("def f(x):\n    return x + 1\nf(1)\n")
+        module = Module(src, remarks=True, profile_hook=report)
+
+        counters = {entry["stage"]: entry for entry in report.stages}
+        self.assertEqual(counters["ARTIQ IR generation"]["nodes"],
+                         count_nodes(src.typedtree))
+        self.assertEqual(counters["Invariant detection"]["instructions"],
+                         count_instructions(module.artiq_ir))
+
+    def test_forward(self):
+        calls = []
+        report = ProfileReport(lambda stage, seconds, **counters:
+                               calls.append((stage, counters)))
+        report("Stage", 0.5, nodes=3)
+        self.assertEqual(calls, [("Stage", {"nodes": 3})])
+        self.assertIn("nodes=3", report.format())
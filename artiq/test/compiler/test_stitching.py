@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from pythonparser import ast, algorithm
+
+from artiq.compiler import types
+from artiq.compiler.embedding import Stitcher
+from artiq.compiler.testbench.perf_stitching import synthesize_experiment
+from artiq.coredevice.core import Core
+from artiq.language.core import kernel
+from artiq.tools import file_import
+
+
+class _DeviceManager:
+    def __init__(self):
+        self.core = Core(self, host=None, ref_period=1e-9)
+
+    def get(self, name):
+        assert name == "core"
+        return self.core
+
+
+class _TypedtreeDumper(algorithm.Visitor):
+    """Lists the types of every node of a typed tree, in order."""
+
+    def __init__(self):
+        self.printer = types.TypePrinter()
+        self.lines = []
+
+    def generic_visit(self, node):
+        def dump(obj):
+            if isinstance(obj, ast.AST):
+                self.visit(obj)
+            elif isinstance(obj, list):
+                for elem in obj:
+                    dump(elem)
+            elif isinstance(obj, types.Type):
+                self.lines.append("{}: {}".format(type(node).__name__,
+                                                  self.printer.name(obj)))
+
+        fields = node._fields
+        if hasattr(node, '_types'):
+            fields = fields + node._types
+        for field_name in fields:
+            dump(getattr(node, field_name))
+
+
+def _dump(stitcher):
+    dumper = _TypedtreeDumper()
+    dumper.visit(stitcher.typedtree)
+    for host_type in stitcher.embedding_map.type_map:
+        for typ in stitcher.embedding_map.type_map[host_type]:
+            for attr in sorted(typ.attributes):
+                dumper.lines.append("{}.{}: {}".format(
+                    typ.name, attr, dumper.printer.name(typ.attributes[attr])))
+    return dumper.lines
+
+
+class _FixedPointStitcher(Stitcher):
+    # Inference as it was done before the worklist: infer the whole
+    # typed tree again until nothing changes.
+    def _infer(self, inferencer):
+        old_dump = None
+        while True:
+            inferencer.visit(self.typedtree)
+            self.inference_passes += 1
+            new_dump = _dump(self)
+            if new_dump == old_dump:
+                break
+            old_dump = new_dump
+
+
+class StitchingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        filename = os.path.join(self.tmpdir.name, "synthetic_experiment.py")
+        with open(filename, "w") as f:
+            f.write(synthesize_experiment(n_devices=20, n_methods=10))
+        self.module = file_import(filename)
+        self.dmgr = _DeviceManager()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def embed(self, stitcher_class):
+        devices = [self.module.Device(self.dmgr.core, channel)
+                   for channel in range(20)]
+        experiment = self.module.Benchmark(self.dmgr.core, devices)
+        stitcher = stitcher_class(core=self.dmgr.core, dmgr=self.dmgr)
+        stitcher.stitch_call(experiment.run, (), {})
+        stitcher.finalize()
+        return stitcher
+
+    def test_worklist_fixed_point(self):
+        stitcher = self.embed(Stitcher)
+        reference = self.embed(_FixedPointStitcher)
+        self.assertEqual(_dump(stitcher), _dump(reference))
+        self.assertLess(stitcher.inferred_nodes,
+                        reference.inference_passes * len(reference.typedtree.body))
+
+    def test_value_map(self):
+        # Every device is referenced from several kernel methods and from
+        # the list of all devices, but is recorded once.
+        stitcher = self.embed(Stitcher)
+        device_type, _ = stitcher.embedding_map.type_map[self.module.Device]
+        values = [value for value, loc in stitcher.value_map[device_type]]
+        self.assertEqual(len(values), 20)
+        self.assertEqual(len(set(map(id, values))), 20)
+
+    def test_call_source(self):
+        # The synthesized call separates the arguments even when they are
+        # false, and accepts arrays as arguments.
+        @kernel
+        def f(x, y):
+            pass
+
+        for args, kwargs, source in [
+                ((0,), {"y": False}, "(0, y=False)"),
+                ((numpy.zeros(2),), {"y": numpy.zeros(2)},
+                 "(numpy.array([0.0, 0.0]), y=numpy.array([0.0, 0.0]))")]:
+            stitcher = Stitcher(core=self.dmgr.core, dmgr=self.dmgr)
+            stitcher.stitch_call(f, args, kwargs)
+            call = stitcher.typedtree[-1]
+            self.assertEqual(call.begin_loc.join(call.end_loc).source(),
+                             source)
@@ -0,0 +1,38 @@
+import unittest
+
+from artiq.compiler.module import Module, Source
+from artiq.compiler.profiler import ProfileReport
+from artiq.compiler.targets import OR1KTarget
+
+
+def _modules():
+    return [Module(Source.from_string("def f(x):\n    return x + {}\nf(1)\n".format(n),
+                                      name="module{}.py".format(n)))
+            for n in range(3)]
+
+
+class TestAssembleModules(unittest.TestCase):
+    def test_parallel(self):
+        target = OR1KTarget()
+        self.assertEqual(target.assemble_modules(_modules(), jobs=None),
+                         target.assemble_modules(_modules(), jobs=1))
+
+    def test_parallel_target(self):
+        # The worker processes compile for the same target, including
+        # attributes set after it was constructed.
+        target = OR1KTarget()
+        target.features = ["mul"]
+        self.assertEqual(target.assemble_modules(_modules(), jobs=2),
+                         target.assemble_modules(_modules(), jobs=1))
+
+    def test_parallel_profile(self):
+        report = ProfileReport()
+        target = OR1KTarget()
+        target.profile_hook = report
+        target.assemble_modules(_modules(), jobs=2)
+
+        stages = [entry["stage"] for entry in report.stages]
+        self.assertEqual(stages.count("LLVM IR generation"), 3)
+        self.assertEqual(stages.count("LLVM optimization"), 3)
+        self.assertEqual(stages.count("LLVM machine code emission"), 3)
+        self.assertEqual(len(stages), 9)
@@ -0,0 +1,46 @@
+import unittest
+
+from artiq.compiler import types, builtins
+
+
+class TestTypeVariables(unittest.TestCase):
+    def test_unify_chain(self):
+        tvars = [types.TVar() for _ in range(100)]
+        for left, right in zip(tvars, tvars[1:]):
+            left.unify(right)
+        root = tvars[0].find()
+        for tvar in tvars:
+            self.assertIs(tvar.find(), root)
+        # Union by rank keeps the trees shallow.
+        self.assertLessEqual(root.rank, 1)
+
+        tvars[50].unify(builtins.TFloat())
+        for tvar in tvars:
+            self.assertEqual(tvar.find(), builtins.TFloat())
+
+    def test_unify_resolved(self):
+        tvar = types.TVar()
+        tvar.unify(builtins.TInt())
+        tvar.unify(builtins.TInt32())
+        self.assertEqual(tvar.find(), builtins.TInt32())
+        with self.assertRaises(types.UnificationError):
+            tvar.unify(builtins.TFloat())
+
+    def test_hash_stable(self):
+        # Types are used as dictionary keys while inference is in progress,
+        # so their hashes must not change when type variables are unified.
+        tvar = types.TVar()
+        typ = types.TTuple([builtins.TList(tvar)])
+        seen = {typ}
+        tvar.unify(builtins.TInt32())
+        self.assertIn(typ, seen)
+
+
+class TestInterning(unittest.TestCase):
+    def test_ground(self):
+        self.assertIs(builtins.TNone(), builtins.TNone())
+        self.assertIs(builtins.TFloat(), builtins.TFloat())
+        self.assertIsNot(builtins.TFloat(), builtins.TBool())
+        self.assertIs(builtins.TInt32(), builtins.TInt32())
+        self.assertEqual(builtins.TFloat().name, "float")
+        self.assertEqual(builtins.TStr().params, {})
@@ -1,6 +1,20 @@
+import io
+import random
+import socket
+import struct
+import threading
+import time
+import unittest
+
 from artiq.experiment import *
-from artiq.coredevice.comm_analyzer import (decode_dump, StoppedMessage,
+from artiq.coredevice.comm_analyzer import (decode_dump, decode_message,
+                                            AnalyzerDumpStream, DecodedDump,
+                                            decoded_dump_to_vcd,
+                                            dump_statistics, format_statistics,
+                                            get_channel_names,
+                                            StoppedMessage, MessageType,
                                             OutputMessage, InputMessage,
+                                            ExceptionMessage, ExceptionType,
                                            _extract_log_chars, get_analyzer_dump)
 from artiq.test.hardware_testbench import ExperimentCase
 
@@ -75,3 +89,241 @@ class AnalyzerTest(ExperimentCase):
                         for msg in dump.messages
                         if isinstance(msg, OutputMessage) and msg.channel == dump.log_channel])
         self.assertEqual(log, "foo\x1E32\n\x1D")
+
+
+def synthetic_dump(n, seed=0):
+    """Return an analyzer dump of ``n`` random messages on 8 channels,
+    followed by a stopped message."""
+    rng = random.Random(seed)
+    messages = []
+    rtio_counter = 1000
+    for i in range(n):
+        rtio_counter += rng.randrange(100)
+        channel = rng.randrange(8)
+        kind = rng.choice([MessageType.output]*8 + [MessageType.input]*3 +
+                          [MessageType.exception])
+        if kind == MessageType.exception:
+            exception_type = rng.choice(list(ExceptionType)).value
+            messages.append(struct.pack(">QIQQI", 0, exception_type,
+                                        rtio_counter, 0,
+                                        (channel << 2) | kind.value))
+        else:
+            messages.append(struct.pack(">QIQQI", rng.getrandbits(64),
+                                        rng.randrange(4), rtio_counter,
+                                        rtio_counter + rng.randrange(10000),
+                                        (channel << 2) | kind.value))
+    messages.append(struct.pack(">QIQQI", 0, 0, rtio_counter + 10, 0,
+                                MessageType.stopped.value))
+    sent_bytes = 32*len(messages)
+    header = struct.pack(">IQbbb", sent_bytes, sent_bytes, 0, 8, 0)
+    return header + b"".join(messages)
+
+
+class DecodeTest(unittest.TestCase):
+    def reference_decode(self, dump):
+        return [decode_message(dump[position:position+32])
+                for position in range(15, len(dump), 32)]
+
+    def test_decode(self):
+        dump = synthetic_dump(10000)
+        decoded = decode_dump(dump)
+        self.assertEqual(decoded.log_channel, 8)
+        self.assertFalse(decoded.dds_onehot_sel)
+        messages = decoded.messages
+        reference = self.reference_decode(dump)
+        self.assertEqual(len(messages), len(reference))
+        self.assertEqual(list(messages), reference)
+        self.assertEqual(messages[-1], reference[-1])
+        self.assertEqual(messages[5], reference[5])
+        self.assertEqual(list(messages[10:20]), reference[10:20])
+
+    def test_columns(self):
+        dump = synthetic_dump(1000)
+        messages = decode_dump(dump).messages
+        reference = self.reference_decode(dump)
+        outputs = messages.of_type(MessageType.output)
+        self.assertEqual(list(outputs),
+                         [m for m in reference if isinstance(m, OutputMessage)])
+        self.assertEqual(outputs.timestamp.tolist(),
+                         [m.timestamp for m in reference
+                          if isinstance(m, OutputMessage)])
+        exceptions = messages.of_type(MessageType.exception)
+        self.assertEqual(
+            [ExceptionType(t) for t in exceptions.exception_type.tolist()],
+            [m.exception_type for m in reference
+             if isinstance(m, ExceptionMessage)])
+        self.assertEqual(messages.channel.tolist(),
+                         [getattr(m, "channel", 0) for m in reference])
+
+    def test_benchmark(self):
+        n = 100000
+        dump = synthetic_dump(n)
+        t0 = time.monotonic()
+        self.reference_decode(dump)
+        t1 = time.monotonic()
+        messages = decode_dump(dump).messages
+        outputs = messages.of_type(MessageType.output)
+        outputs.timestamp - outputs.rtio_counter
+        t2 = time.monotonic()
+        list(messages)
+        t3 = time.monotonic()
+        print("{} messages: per message {:.1f} ms, vectorized {:.1f} ms, "
+              "named tuples {:.1f} ms".format(
+                n, (t1 - t0)*1e3, (t2 - t1)*1e3, (t3 - t2)*1e3))
+
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.dump = synthetic_dump(5000)
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.start()
+
+    def tearDown(self):
+        self.thread.join()
+        self.server.close()
+
+    def serve(self):
+        connection, _ = self.server.accept()
+        with connection:
+            # split the messages across packets
+            for position in range(0, len(self.dump), 1000):
+                connection.sendall(self.dump[position:position+1000])
+
+    def connect(self):
+        return AnalyzerDumpStream(*self.server.getsockname())
+
+    def test_read(self):
+        with self.connect() as stream:
+            self.assertEqual(stream.read(), self.dump)
+
+    def test_get_analyzer_dump(self):
+        self.assertEqual(get_analyzer_dump(*self.server.getsockname()),
+                         self.dump)
+
+    def test_blocks(self):
+        f = io.BytesIO()
+        with self.connect() as stream:
+            self.assertEqual(stream.log_channel, 8)
+            self.assertFalse(stream.dds_onehot_sel)
+            blocks = list(stream.blocks(f, block_size=100))
+        self.assertGreater(len(blocks), 1)
+        self.assertTrue(all(len(block) <= 100 for block in blocks))
+        self.assertEqual([message for block in blocks for message in block],
+                         list(decode_dump(self.dump).messages))
+        self.assertEqual(f.getvalue(), self.dump)
+
+
+class VCDTest(unittest.TestCase):
+    def setUp(self):
+        self.devices = {
+            "core": {
+                "type": "local",
+                "module": "artiq.coredevice.core",
+                "class": "Core",
+                "arguments": {"ref_period": 1e-9}
+            }
+        }
+        for channel in range(8):
+            self.devices["ttl{}".format(channel)] = {
+                "type": "local",
+                "module": "artiq.coredevice.ttl",
+                "class": "TTLOut",
+                "arguments": {"channel": channel}
+            }
+
+    def write_vcd(self, dump):
+        f = io.StringIO()
+        decoded_dump_to_vcd(f, self.devices, dump)
+        return f.getvalue()
+
+    def test_vcd(self):
+        def double(x):
+            return "{:064b}".format(
+                struct.unpack(">Q", struct.pack(">d", x))[0])
+
+        dump = DecodedDump(8, False, [
+            OutputMessage(0, 1100, 1000, 0, 1),
+            OutputMessage(0, 1300, 1010, 0, 0),
+            StoppedMessage(1020)
+        ])
+        vcd = self.write_vcd(dump).splitlines()
+        self.assertEqual(vcd[0], "$timescale 1000ps $end")
+        self.assertEqual(vcd[1], "$var wire 1 ! ttl/ttl0 $end")
+        self.assertEqual(vcd[9:], [
+            "$var wire 64 ) rtio_slack $end",
+            "#0",
+            "1!",
+            "b" + double(100*1e-9) + " )",
+            "#200",
+            "0!",
+            "b" + double(290*1e-9) + " )",
+        ])
+
+    def test_messages_list(self):
+        dump = synthetic_dump(1000)
+        self.assertEqual(
+            self.write_vcd(decode_dump(dump)),
+            self.write_vcd(DecodedDump(8, False,
+                                       list(decode_dump(dump).messages))))
+
+    def test_benchmark(self):
+        n = 100000
+        dump = synthetic_dump(n)
+        t0 = time.monotonic()
+        vcd = self.write_vcd(decode_dump(dump))
+        t1 = time.monotonic()
+        print("{} messages: {:.0f} messages/s, {:.1f} MB/s VCD".format(
+            n, n/(t1 - t0), len(vcd)/(t1 - t0)/1e6))
+
+
+class StatisticsTest(unittest.TestCase):
+    def test_statistics(self):
+        dump = DecodedDump(8, False, [
+            OutputMessage(0, 1100, 1000, 0, 1),
+            InputMessage(1, 1150, 1100, 1),
+            OutputMessage(0, 2100, 1200, 0, 0),
+            OutputMessage(0, 3100, 2800, 0, 1),
+            ExceptionMessage(0, 2900, ExceptionType.o_underflow),
+            OutputMessage(8, 1000, 900, 0, 0x61),
+            StoppedMessage(3000)
+        ])
+        devices = {
+            "ttl0": {"type": "local", "module": "artiq.coredevice.ttl",
+                     "class": "TTLOut", "arguments": {"channel": 0}},
+            "core": {"type": "local", "module": "artiq.coredevice.core",
+                     "class": "Core", "arguments": {"ref_period": 1e-9}}
+        }
+        statistics = dump_statistics(dump, 1e-9, get_channel_names(devices),
+                                     slack_threshold=500e-9)
+        self.assertEqual([entry["channel"] for entry in statistics],
+                         [0, 1, 8])
+        ttl0, ttl1, log = statistics
+        self.assertEqual(ttl0["name"], "ttl0")
+        self.assertEqual(ttl0["outputs"], 3)
+        self.assertEqual(ttl0["inputs"], 0)
+        self.assertAlmostEqual(ttl0["rate"], 1e6)
+        self.assertAlmostEqual(ttl0["min_slack"], 100e-9)
+        self.assertAlmostEqual(ttl0["median_slack"], 300e-9)
+        self.assertEqual(ttl0["low_slack"], 2)
+        self.assertEqual(dict(ttl0["exceptions"]), {"o_underflow": 1})
+        self.assertEqual(ttl1["name"], None)
+        self.assertEqual(ttl1["inputs"], 1)
+        self.assertIsNone(ttl1["rate"])
+        self.assertIsNone(ttl1["min_slack"])
+        self.assertEqual(log["name"], "rtio_log")
+
+        table = format_statistics(statistics).splitlines()
+        self.assertEqual(len(table), 4)
+        self.assertIn("o_underflow: 1", table[1])
+
+    def test_benchmark(self):
+        n = 100000
+        dump = decode_dump(synthetic_dump(n))
+        t0 = time.monotonic()
+        dump_statistics(dump)
+        t1 = time.monotonic()
+        print("{} messages: statistics in {:.1f} ms".format(
+            n, (t1 - t0)*1e3))
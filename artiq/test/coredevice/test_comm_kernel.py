@@ -0,0 +1,206 @@
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from artiq.coredevice.comm_kernel import CommKernel, RPCStatistics
+from artiq.coredevice.exceptions import WatchdogExpired
+
+
+class _EmbeddingMap:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def retrieve_object(self, obj_id):
+        return self.objects[obj_id]
+
+
+def _rpc_call(service_id, value):
+    # one int32 argument, returning None
+    return (struct.pack(">l", service_id) +
+            b"i" + struct.pack(">l", value) + b"\x00" +
+            struct.pack(">l", 1) + b"n")
+
+
+def _rpc_request(service_id, value, is_async=True):
+    return (struct.pack(">lBB", 0x5a5a5a5a, 10, is_async) +
+            _rpc_call(service_id, value))
+
+
+def _rpc_batch(calls):
+    return (struct.pack(">lBl", 0x5a5a5a5a, 18, len(calls)) +
+            b"".join(_rpc_call(service_id, value)
+                     for service_id, value in calls))
+
+
+_kernel_finished = struct.pack(">lB", 0x5a5a5a5a, 7)
+_watchdog_expired = struct.pack(">lB", 0x5a5a5a5a, 14)
+
+
+class _RPCDevice:
+    """Core device that sends a fixed sequence of messages, as if a kernel
+    were running, and records the replies of the host."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.replies = b""
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.start()
+
+    def close(self):
+        self.thread.join()
+        self.server.close()
+
+    def serve(self):
+        connection, _ = self.server.accept()
+        with connection:
+            connection.recv(14)
+            connection.sendall(b"".join(self.messages))
+            while True:
+                data = connection.recv(4096)
+                if not data:
+                    break
+                self.replies += data
+
+
+class AsyncRPCTest(unittest.TestCase):
+    def serve(self, messages, services, async_rpc_workers,
+              rpc_statistics=None):
+        device = _RPCDevice(messages)
+        comm = CommKernel(*device.server.getsockname(),
+                          async_rpc_workers=async_rpc_workers)
+        comm.rpc_statistics = rpc_statistics
+        try:
+            comm.serve(_EmbeddingMap(services), None, None)
+        finally:
+            comm.close()
+            device.close()
+        return device.replies
+
+    def test_order(self):
+        for async_rpc_workers in 0, 1, 4:
+            calls = {1: [], 2: []}
+            def append(key):
+                def service(value):
+                    time.sleep(0.001)
+                    calls[key].append(value)
+                return service
+            messages = [_rpc_request(1 + n % 2, n) for n in range(40)]
+            messages.append(_kernel_finished)
+            self.serve(messages, {1: append(1), 2: append(2)},
+                       async_rpc_workers)
+            self.assertEqual(calls[1], list(range(0, 40, 2)))
+            self.assertEqual(calls[2], list(range(1, 40, 2)))
+
+    def test_sync_rpc_waits(self):
+        values = []
+        def check(value):
+            values.append(list(values))
+        messages = [_rpc_request(1, n) for n in range(10)]
+        messages.append(_rpc_request(2, 0, is_async=False))
+        messages.append(_kernel_finished)
+        replies = self.serve(messages, {1: values.append, 2: check}, 2)
+        self.assertEqual(values[-1], list(range(10)))
+        self.assertEqual(replies, struct.pack(">lBl", 0x5a5a5a5a, 7, 1) + b"n")
+
+    def test_exception(self):
+        def fail(value):
+            raise ValueError(value)
+        calls = []
+        messages = [_rpc_request(1, 0), _rpc_request(1, 1),
+                    _rpc_request(2, 2), _kernel_finished]
+        with self.assertRaises(ValueError):
+            self.serve(messages, {1: fail, 2: calls.append}, 1)
+        self.assertEqual(calls, [])
+
+    def test_exception_kernel_error(self):
+        # The error that terminated the kernel is reported without waiting
+        # for the asynchronous RPCs, and their failures are only logged.
+        release = threading.Event()
+        def fail(value):
+            release.wait()
+            raise ValueError(value)
+        device = _RPCDevice([_rpc_request(1, 0), _watchdog_expired])
+        comm = CommKernel(*device.server.getsockname(), async_rpc_workers=1)
+        try:
+            with self.assertRaises(WatchdogExpired):
+                comm.serve(_EmbeddingMap({1: fail}), None, None)
+            with self.assertLogs("artiq.coredevice.comm_kernel",
+                                 "ERROR") as logs:
+                release.set()
+                comm.close()
+        finally:
+            release.set()
+            comm.close()
+            device.close()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsInstance(logs.records[0].exc_info[1], ValueError)
+
+    def test_batch(self):
+        for async_rpc_workers in 0, 1:
+            calls = []
+            messages = [_rpc_batch([(1, n) for n in range(10)]),
+                        _rpc_request(1, 10),
+                        _rpc_batch([(1, 11), (2, 12)]),
+                        _kernel_finished]
+            self.serve(messages, {1: calls.append, 2: calls.append},
+                       async_rpc_workers)
+            self.assertEqual(calls, list(range(13)))
+
+    def test_statistics(self):
+        def slow(value):
+            time.sleep(0.01)
+        def fast(value):
+            pass
+        messages = [_rpc_request(1, 0), _rpc_batch([(1, 1), (2, 2)]),
+                    _rpc_request(2, 3, is_async=False), _kernel_finished]
+        for async_rpc_workers in 0, 1:
+            statistics = RPCStatistics()
+            self.serve(messages, {1: slow, 2: fast}, async_rpc_workers,
+                       statistics)
+            slow_entry = statistics.services[slow.__qualname__]
+            fast_entry = statistics.services[fast.__qualname__]
+            self.assertEqual(slow_entry["calls"], 2)
+            self.assertEqual(fast_entry["calls"], 2)
+            # service id, int32 argument, terminator, return tags
+            self.assertEqual(slow_entry["bytes_received"], 2*(4 + 5 + 1 + 5))
+            self.assertEqual(slow_entry["bytes_sent"], 0)
+            # reply header and return tags
+            self.assertEqual(fast_entry["bytes_sent"], 5 + 5)
+            self.assertGreaterEqual(slow_entry["service_seconds"], 0.02)
+            self.assertLess(fast_entry["service_seconds"], 0.01)
+            self.assertEqual(slow_entry["encode_seconds"], 0)
+            self.assertGreater(fast_entry["encode_seconds"], 0)
+
+            lines = statistics.format().splitlines()
+            self.assertEqual(len(lines), 3)
+            self.assertTrue(lines[1].startswith(slow.__qualname__))
+
+    def test_benchmark(self):
+        # A service that blocks (e.g. on I/O) for 100us per call.
+        n = 2000
+        messages = [_rpc_request(1, i) for i in range(n)]
+        messages.append(_kernel_finished)
+        for async_rpc_workers in 0, 1:
+            t0 = time.monotonic()
+            self.serve(messages, {1: lambda value: time.sleep(100e-6)},
+                       async_rpc_workers)
+            t1 = time.monotonic()
+            print("{} async RPCs with {} workers: {:.0f} messages/s".format(
+                  n, async_rpc_workers, n/(t1 - t0)))
+
+    def test_benchmark_batch(self):
+        n = 20000
+        single = [_rpc_request(1, i) for i in range(n)]
+        batched = [_rpc_batch([(1, i) for i in range(j, j + 200)])
+                   for j in range(0, n, 200)]
+        for name, messages in ("single", single), ("batched", batched):
+            t0 = time.monotonic()
+            self.serve(messages + [_kernel_finished], {1: lambda value: None}, 0)
+            t1 = time.monotonic()
+            print("{} {} async RPCs: {:.0f} messages/s".format(
+                  n, name, n/(t1 - t0)))
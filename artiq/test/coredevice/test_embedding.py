@@ -1,4 +1,5 @@
 import numpy
+import time
 from time import sleep
 
 from artiq.experiment import *
@@ -267,11 +268,81 @@ class _Async(EnvExperiment):
         self.recv_async([0]*4096)
 
 
+class _AsyncThroughput(EnvExperiment):
+    def build(self):
+        self.setattr_device("core")
+
+    @rpc(flags={"async"})
+    def recv_async(self, data):
+        # stand-in for e.g. writing a result to a dataset or a file
+        sleep(100e-6)
+
+    @kernel
+    def run(self, count):
+        for i in range(count):
+            self.recv_async(i)
+
+
+class _Batch(EnvExperiment):
+    def build(self):
+        self.setattr_device("core")
+        self.received = []
+
+    @rpc(flags={"batch"})
+    def recv_batch(self, data):
+        self.received.append(data)
+
+    def count_received(self) -> TInt32:
+        return len(self.received)
+
+    @kernel
+    def run(self, count):
+        for i in range(count):
+            self.recv_batch(i)
+
+    @kernel
+    def run_sync(self) -> TInt32:
+        for i in range(10):
+            self.recv_batch(i)
+        return self.count_received()
+
+
 class AsyncTest(ExperimentCase):
     def test_args(self):
         exp = self.create(_Async)
         exp.run()
 
+    def test_args_workers(self):
+        exp = self.create(_Async)
+        exp.core.comm.async_rpc_workers = 1
+        exp.run()
+
+    def test_benchmark(self):
+        exp = self.create(_AsyncThroughput)
+        count = 10000
+        for async_rpc_workers in 0, 1:
+            exp.core.comm.async_rpc_workers = async_rpc_workers
+            t0 = time.monotonic()
+            exp.run(count)
+            t1 = time.monotonic()
+            print("{} async RPCs with {} workers: {:.0f} messages/s".format(
+                  count, async_rpc_workers, count/(t1 - t0)))
+
+    def test_batch(self):
+        exp = self.create(_Batch)
+        count = 10000
+        t0 = time.monotonic()
+        exp.run(count)
+        t1 = time.monotonic()
+        print("{} batched RPCs: {:.0f} messages/s".format(
+              count, count/(t1 - t0)))
+        self.assertEqual(exp.received, list(range(count)))
+
+    def test_batch_sync(self):
+        exp = self.create(_Batch)
+        # batched RPCs are flushed before a synchronous RPC
+        self.assertEqual(exp.run_sync(), 10)
+
 
 class _Payload1MB(EnvExperiment):
     def build(self):
@@ -0,0 +1,178 @@
+import os
+import socket
+import struct
+import tempfile
+import threading
+import unittest
+
+from artiq.coredevice.comm_kernel import CommKernel
+from artiq.frontend.artiq_coreconfig import (load_records, sync_records,
+                                             write_records)
+from artiq.protocols import pyon
+
+
+class _FlashStorageDevice:
+    """Minimal core device that serves the flash storage requests.
+
+    If ``bulk`` is false, it behaves like firmware without the bulk
+    requests, closing the connection when it receives one; it then
+    accepts a second connection.
+    """
+
+    def __init__(self, values=None, bulk=True):
+        self.values = dict() if values is None else values
+        self.bulk = bulk
+        self.writes = []
+        self.server = socket.socket()
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.start()
+
+    def close(self):
+        self.thread.join()
+        self.server.close()
+
+    def read(self, length):
+        data = b""
+        while len(data) < length:
+            chunk = self.connection.recv(length - len(data))
+            if not chunk:
+                raise ConnectionResetError
+            data += chunk
+        return data
+
+    def read_int32(self):
+        return struct.unpack(">l", self.read(4))[0]
+
+    def read_bytes(self):
+        return self.read(self.read_int32())
+
+    def serve(self):
+        for _ in range(1 if self.bulk else 2):
+            self.connection, _ = self.server.accept()
+            with self.connection:
+                self.serve_connection()
+
+    def serve_connection(self):
+        assert self.read(14) == b"ARTIQ coredev\n"
+        while True:
+            try:
+                sync, ty = struct.unpack(">lB", self.read(5))
+            except ConnectionResetError:
+                return
+            assert sync == 0x5a5a5a5a
+            if ty in (15, 16) and not self.bulk:
+                return
+            if ty == 10:
+                record = (self.read_bytes().decode(), self.read_bytes())
+                self.writes.append([record])
+                self.values.update([record])
+                self.connection.sendall(struct.pack(">lB", 0x5a5a5a5a, 12))
+            elif ty == 12:
+                record = (self.read_bytes().decode(), b"")
+                self.writes.append([record])
+                self.values.update([record])
+                self.connection.sendall(struct.pack(">lB", 0x5a5a5a5a, 12))
+            elif ty == 15:
+                keys = [self.read_bytes().decode()
+                        for _ in range(self.read_int32())]
+                reply = bytearray(struct.pack(">lBl", 0x5a5a5a5a, 17,
+                                              len(keys)))
+                for key in keys:
+                    value = self.values.get(key, b"")
+                    reply += struct.pack(">l", len(value)) + value
+                self.connection.sendall(reply)
+            elif ty == 16:
+                records = [(self.read_bytes().decode(), self.read_bytes())
+                           for _ in range(self.read_int32())]
+                self.writes.append(records)
+                self.values.update(records)
+                self.connection.sendall(struct.pack(">lB", 0x5a5a5a5a, 12))
+            else:
+                raise ValueError("unexpected request type {}".format(ty))
+
+
+class FlashStorageTest(unittest.TestCase):
+    def setUp(self):
+        self.device = _FlashStorageDevice({"mac": b"02:00:00:00:00:01",
+                                           "ip": b"192.168.1.50"})
+        self.comm = CommKernel(*self.device.server.getsockname())
+
+    def tearDown(self):
+        self.comm.close()
+        self.device.close()
+
+    def test_read_many(self):
+        self.assertEqual(self.comm.flash_storage_read_many(["ip", "absent"]),
+                         {"ip": b"192.168.1.50", "absent": b""})
+
+    def test_write_many(self):
+        kernel = bytes(range(256))*1000
+        self.comm.flash_storage_write_many([("a", b"1"),
+                                            ("startup_kernel", kernel),
+                                            ("b", b"")], chunk_size=1024)
+        self.assertEqual(self.device.writes,
+                         [[("a", b"1"), ("startup_kernel", kernel),
+                           ("b", b"")]])
+        self.assertEqual(
+            self.comm.flash_storage_read_many(["startup_kernel"]),
+            {"startup_kernel": kernel})
+
+    def test_sync(self):
+        records = {"mac": b"02:00:00:00:00:01", "ip": b"192.168.1.60",
+                   "calibration": b"\x00\x01"}
+        self.assertEqual(sync_records(self.comm, records, dry_run=True),
+                         ["calibration", "ip"])
+        self.assertEqual(self.device.writes, [])
+        self.assertEqual(sync_records(self.comm, records),
+                         ["calibration", "ip"])
+        self.assertEqual(self.device.writes,
+                         [[("calibration", b"\x00\x01"),
+                           ("ip", b"192.168.1.60")]])
+        self.assertEqual(sync_records(self.comm, records), [])
+        self.assertEqual(len(self.device.writes), 1)
+
+
+    def test_write_records(self):
+        write_records(self.comm, [("a", b"1"), ("ip", b"")])
+        self.assertEqual(self.device.writes, [[("a", b"1"), ("ip", b"")]])
+
+
+class FallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.device = _FlashStorageDevice({"ip": b"192.168.1.50"},
+                                          bulk=False)
+        self.comm = CommKernel(*self.device.server.getsockname())
+
+    def tearDown(self):
+        self.comm.close()
+        self.device.close()
+
+    def test_write_records(self):
+        with self.assertLogs("artiq.frontend.artiq_coreconfig", "WARNING"):
+            write_records(self.comm, [("a", b"1"), ("ip", b"")])
+        self.assertEqual(self.device.writes, [[("a", b"1")], [("ip", b"")]])
+        self.assertEqual(self.device.values, {"a": b"1", "ip": b""})
+
+
+class LoadRecordsTest(unittest.TestCase):
+    def test_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for key, value in (("ip", b"192.168.1.50"), ("kernel", b"\x7fELF")):
+                with open(os.path.join(directory, key), "wb") as f:
+                    f.write(value)
+            self.assertEqual(load_records(directory),
+                             {"ip": b"192.168.1.50", "kernel": b"\x7fELF"})
+
+    def test_pyon(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "config.pyon")
+            pyon.store_file(filename, {"ip": "192.168.1.50",
+                                       "kernel": b"\x7fELF"})
+            self.assertEqual(load_records(filename),
+                             {"ip": b"192.168.1.50", "kernel": b"\x7fELF"})
+
+            pyon.store_file(filename, {"ip": 1})
+            with self.assertRaises(TypeError):
+                load_records(filename)
@@ -1,9 +1,19 @@
 import asyncio
+import struct
+import unittest
 
 from artiq.coredevice.comm_moninj import *
 from artiq.test.hardware_testbench import ExperimentCase
 
 
+def monitor_packet(channel, probe, value):
+    return struct.pack(">blbl", 0, channel, probe, value)
+
+
+def injection_status_packet(channel, override, value):
+    return struct.pack(">blbb", 1, channel, override, value)
+
+
 class MonInjTest(ExperimentCase):
     def test_moninj(self):
         core_host = self.device_mgr.get_desc("core")["arguments"]["host"]
@@ -52,3 +62,116 @@ class MonInjTest(ExperimentCase):
             (loop_out_channel, TTLOverride.en.value, 0),
             (loop_out_channel, TTLOverride.en.value, 1)
         ])
+
+    def test_subscribe(self):
+        core_host = self.device_mgr.get_desc("core")["arguments"]["host"]
+        loop_in_channel = self.device_mgr.get_desc("loop_in")["arguments"]["channel"]
+
+        notifications = []
+
+        def monitor_cb(channel, probe, value):
+            notifications.append((channel, probe, value))
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            moninj_comm = CommMonInj(monitor_cb, lambda *args: None)
+            loop.run_until_complete(moninj_comm.connect(core_host))
+            try:
+                moninj_comm.subscribe(loop_in_channel, TTLProbe.level.value,
+                                      interval=0.05, periodic=True)
+                loop.run_until_complete(asyncio.sleep(0.5))
+                moninj_comm.monitor(False, loop_in_channel, TTLProbe.level.value)
+                loop.run_until_complete(moninj_comm._writer.drain())
+            finally:
+                loop.run_until_complete(moninj_comm.close())
+        finally:
+            loop.close()
+
+        # the value does not change, but is reported every 50ms
+        self.assertGreaterEqual(len(notifications), 5)
+        self.assertEqual(len(set(notifications)), 1)
+
+
+class MonInjProtocolTest(unittest.TestCase):
+    def test_parse(self):
+        data = (monitor_packet(1, 0, 1) + monitor_packet(1, 0, 0) +
+                injection_status_packet(2, 0, 1) + monitor_packet(3, 1, 5) +
+                monitor_packet(1, 0, 1))
+        partial = monitor_packet(4, 0, 1)[:5]
+        position, updates = CommMonInj._parse(bytearray(data + partial))
+        self.assertEqual(position, len(data))
+        self.assertEqual(list(updates.items()), [
+            ((0, 1, 0), 1),
+            ((1, 2, 0), 1),
+            ((0, 3, 1), 5)
+        ])
+        self.assertEqual(CommMonInj._parse(bytearray(partial)),
+                         (0, {}))
+        with self.assertRaises(ValueError):
+            CommMonInj._parse(bytearray(b"\x05"))
+
+    def test_subscribe(self):
+        class Writer:
+            def __init__(self):
+                self.data = b""
+
+            def write(self, data):
+                self.data += data
+
+        comm = CommMonInj(None, None)
+        comm._writer = Writer()
+        comm.subscribe(0x10005, 1, interval=0.05, periodic=True)
+        comm.monitor(False, 0x10005, 1)
+        self.assertEqual(comm._writer.data,
+                         b"\x03\x00\x01\x00\x05\x01\x00\x00\x00\x32\x01"
+                         b"\x00\x00\x00\x01\x00\x05\x01")
+
+    def test_receive(self):
+        packets = ([monitor_packet(channel, 0, value)
+                    for value in range(100) for channel in range(10)] +
+                   [injection_status_packet(channel, 0, 1)
+                    for channel in range(10)])
+        data = b"".join(packets)
+
+        async def serve(reader, writer):
+            self.assertEqual(await reader.readline(), b"ARTIQ moninj\n")
+            # split packets across writes
+            for position in range(0, len(data), 1000):
+                writer.write(data[position:position+1000])
+                await writer.drain()
+                await asyncio.sleep(0.01)
+            writer.close()
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        monitored = dict()
+        injection_statuses = dict()
+        disconnected = asyncio.Event()
+
+        def monitor_cb(channel, probe, value):
+            monitored[(channel, probe)] = value
+
+        def injection_status_cb(channel, override, value):
+            injection_statuses[(channel, override)] = value
+
+        async def run():
+            server = await asyncio.start_server(serve, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            comm = CommMonInj(monitor_cb, injection_status_cb,
+                              disconnected.set)
+            await comm.connect("127.0.0.1", port)
+            await asyncio.wait_for(disconnected.wait(), 10)
+            await comm.close()
+            server.close()
+            await server.wait_closed()
+
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+        self.assertEqual(monitored, {(channel, 0): 99
+                                     for channel in range(10)})
+        self.assertEqual(injection_statuses, {(channel, 0): 1
+                                              for channel in range(10)})
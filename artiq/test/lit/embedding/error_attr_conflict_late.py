@@ -0,0 +1,34 @@
+# RUN: %python -m artiq.compiler.testbench.embedding +diag %s 2>%t
+# RUN: OutputCheck %s --file-to-check=%t
+
+from artiq.language.core import *
+from artiq.language.types import *
+
+class c:
+    pass
+
+i1 = c()
+i1.x = 1.0
+
+class d:
+    def __init__(self):
+        self.y = c()
+        self.y.x = "x"
+
+    @kernel
+    def f(self):
+        # This quotes another instance of c only after i1.x is inferred.
+        self.y
+
+i2 = d()
+
+@kernel
+def g():
+    i1.x
+
+@kernel
+def entrypoint():
+    g()
+    # CHECK-L: <synthesized>:1: error: host object has an attribute 'x' of type str, which is different from previously inferred type float for the same attribute
+    # CHECK-L: ${LINE:+1}: note: expanded from here
+    i2.f()
@@ -0,0 +1,25 @@
+# RUN: %python -m artiq.compiler.testbench.embedding +diag %s 2>%t
+# RUN: OutputCheck %s --file-to-check=%t
+
+from artiq.language.core import *
+from artiq.language.types import *
+
+class c:
+    pass
+
+i1 = c()
+i1.x = 1
+
+i2 = c()
+i2.x = 1.0
+
+@kernel
+def entrypoint():
+    i1
+    # The location where the host object is first referenced is reported.
+    # CHECK-L: <synthesized>:1: error: host object has an attribute 'x' of type float, which is different from previously inferred type numpy.int32 for the same attribute
+    # CHECK-L: ${LINE:+1}: note: expanded from here
+    i2
+    [i2, i2]
+    i2
+    i1.x
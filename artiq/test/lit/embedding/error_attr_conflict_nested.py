@@ -0,0 +1,29 @@
+# RUN: %python -m artiq.compiler.testbench.embedding +diag %s 2>%t
+# RUN: OutputCheck %s --file-to-check=%t
+
+from artiq.language.core import *
+from artiq.language.types import *
+
+class Device:
+    def __init__(self, x):
+        self.x = x
+
+class Driver:
+    def __init__(self, device):
+        self.device = device
+
+    @kernel
+    def f(self):
+        self.device.x
+
+# The type inferred for device1 is reused for the second driver,
+# but not for device2.
+device1 = Device(1)
+device2 = Device(1.0)
+drivers = [Driver(device1), Driver(device1), Driver(device2)]
+
+@kernel
+def entrypoint():
+    # CHECK-L: <synthesized>:1: error: host object has an attribute 'x' of type float, which is different from previously inferred type numpy.int32 for the same attribute
+    # CHECK-L: ${LINE:+1}: note: expanded from here
+    drivers[0].f()
@@ -41,6 +41,61 @@ class TestSplineCoef(unittest.TestCase):
         y = s.trigger()[0]
         np.testing.assert_almost_equal(y[::scale], self.y[0, :-1])
 
+    def test_cached_spline(self):
+        s = coefficients.SplineSource(self.x.copy(), self.y.copy(), order=4)
+        self.assertIs(s.spline, self.s.spline)
+        s = coefficients.SplineSource(self.x, self.y + 1, order=4)
+        self.assertIsNot(s.spline, self.s.spline)
+
+    def test_cached_segment(self):
+        a = self.test_get_segment()
+        b = self.test_get_segment()
+        self.assertEqual(a, b)
+        for line in a:
+            for channel in line["channel_data"]:
+                channel["bias"]["amplitude"][0] += 1
+        self.assertEqual(b, self.test_get_segment())
+
+    def test_cached_evaluation(self):
+        x = np.linspace(1, 3, 7)
+        y = self.s(x)
+        cached = self.s.spline._evaluate_cached(x.copy(), True)
+        self.assertIs(self.s.spline._evaluate_cached(x, True), cached)
+        np.testing.assert_array_equal(y, cached)
+
+        # Callers get their own, writable, copy of the memoized array.
+        self.assertTrue(y.flags.writeable)
+        y[:] = 0
+        np.testing.assert_array_equal(self.s(x), cached)
+
+        coefficients.clear_cache()
+        self.assertIsNot(self.s.spline._evaluate_cached(x, True), cached)
+        np.testing.assert_array_equal(self.s(x), cached)
+        self.assertIsNot(
+            coefficients.SplineSource(self.x, self.y, order=4).spline,
+            self.s.spline)
+
+    def test_cache_size(self):
+        # The evaluations of all splines share one bound.
+        other = coefficients.SplineSource(self.x, self.y + 1, order=4)
+        for i in range(200):
+            x = np.linspace(1, 3, 3 + i)
+            self.s(x)
+            other(x)
+        self.assertEqual(len(coefficients._evaluation_cache.entries),
+                         coefficients._evaluation_cache.size)
+
+    def test_batched_compensate(self):
+        c = np.random.RandomState(0).standard_normal((4, 2, 10))
+        expected = c.copy()
+        for i in range(c.shape[1]):
+            for j in range(c.shape[2]):
+                line = list(expected[:, i, j])
+                coefficients.discrete_compensate(line)
+                expected[:, i, j] = line
+        coefficients.discrete_compensate(c)
+        np.testing.assert_allclose(c, expected)
+
     @unittest.skip("manual/visual test")
     def test_plot(self):
         import matplotlib.pyplot as plt
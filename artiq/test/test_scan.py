@@ -0,0 +1,147 @@
+import unittest
+from itertools import product
+
+import numpy as np
+
+from artiq.language.scan import (NoScan, RangeScan, ExplicitScan,
+                                 MultiScanManager, ScanBlocks)
+
+
+class ScanCase(unittest.TestCase):
+    def test_range(self):
+        scan = RangeScan(1, 2, 11)
+        dx = (2 - 1)/10
+        self.assertEqual(list(scan), [i*dx + 1 for i in range(11)])
+        self.assertEqual(scan.sequence, list(scan))
+        self.assertEqual(len(scan), 11)
+        self.assertEqual(scan.points(3, 5).tolist(), list(scan)[3:5])
+
+        self.assertEqual(list(RangeScan(3, 4, 1)), [3])
+        self.assertEqual(list(RangeScan(3, 4, 0)), [])
+
+    def test_range_sequence(self):
+        scan = RangeScan(0, 1, 10000, randomize=True, seed=42)
+        sequence = scan.sequence
+        self.assertEqual(sequence, list(scan))
+        self.assertIs(scan.sequence, sequence)
+
+        # Kernels write back the attributes they accessed.
+        scan.sequence = [float(i) for i in range(5)]
+        self.assertEqual(list(scan), [0.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(len(scan), 5)
+        self.assertEqual(scan.points(1, 3).tolist(), [1.0, 2.0])
+
+    def test_range_large(self):
+        scan = RangeScan(0, 1, 10000)
+        self.assertEqual(list(scan), scan.points().tolist())
+        self.assertEqual(list(scan), list(scan))
+
+    def test_range_randomize(self):
+        scan = RangeScan(0, 9, 10, randomize=True, seed=42)
+        self.assertEqual(sorted(scan), list(RangeScan(0, 9, 10)))
+        self.assertEqual(list(scan),
+                         list(RangeScan(0, 9, 10, randomize=True, seed=42)))
+        self.assertEqual(list(scan), scan.points().tolist())
+
+    def test_range_randomize_order(self):
+        # The order of the points for a given seed is kept across releases.
+        self.assertEqual(
+            list(RangeScan(0, 9, 10, randomize=True, seed=42)),
+            [9, 7, 8, 5, 3, 4, 1, 2, 0, 6])
+        self.assertEqual(
+            list(RangeScan(0, 9, 10, randomize=True, seed="abc")),
+            [1, 6, 0, 3, 9, 4, 2, 8, 5, 7])
+        self.assertEqual(
+            list(RangeScan(0, 9, 10, randomize=True, seed=2**40)),
+            [9, 4, 5, 8, 0, 7, 2, 3, 6, 1])
+
+    def test_explicit(self):
+        scan = ExplicitScan([3, 1, 2])
+        self.assertEqual(list(scan), [3, 1, 2])
+        self.assertEqual(scan.points().tolist(), [3, 1, 2])
+
+    def test_noscan(self):
+        scan = NoScan(5, 3)
+        self.assertEqual(list(scan), [5, 5, 5])
+        self.assertEqual(scan.points(1).tolist(), [5, 5])
+
+
+class MultiScanManagerCase(unittest.TestCase):
+    def setUp(self):
+        self.scans = [("a", RangeScan(0, 1, 3)),
+                      ("b", ExplicitScan([10, 20])),
+                      ("c", NoScan(7, 2))]
+
+    def test_iter(self):
+        msm = MultiScanManager(*self.scans)
+        points = [(p.a, p.b, p.c) for p in msm]
+        self.assertEqual(points,
+                         list(product(*(scan for _, scan in self.scans))))
+        self.assertEqual(len(msm), len(points))
+        self.assertIsInstance(points[0][1], int)
+
+    def test_blocks(self):
+        msm = MultiScanManager(*self.scans)
+        blocks = list(msm.blocks(5))
+        self.assertEqual([len(block) for block in blocks], [5, 5, 2])
+        self.assertEqual(blocks[0].dtype.names, ("a", "b", "c"))
+
+        rows = np.concatenate(blocks)
+        self.assertEqual([tuple(row) for row in rows.tolist()],
+                         [(p.a, p.b, p.c) for p in msm])
+
+    def test_iterables(self):
+        msm = MultiScanManager(("x", [1, 2]), ("y", range(2)))
+        self.assertEqual([(p.x, p.y) for p in msm],
+                         [(1, 0), (1, 1), (2, 0), (2, 1)])
+
+
+class _Scheduler:
+    def __init__(self, pause_at):
+        self.pause_at = pause_at
+        self.checks = 0
+        self.pauses = 0
+
+    def check_pause(self):
+        self.checks += 1
+        return self.checks == self.pause_at
+
+    def pause(self):
+        self.pauses += 1
+
+
+class ScanBlocksCase(unittest.TestCase):
+    def test_block_size(self):
+        blocks = ScanBlocks(RangeScan(0, 1, 10), point_duration=0.1,
+                            block_duration=0.4)
+        self.assertEqual(blocks.block_size, 4)
+        self.assertEqual(len(blocks), 3)
+        self.assertEqual([len(columns[0]) for columns in blocks], [4, 4, 2])
+
+        blocks = ScanBlocks(RangeScan(0, 1, 10), point_duration=1,
+                            block_duration=0.1)
+        self.assertEqual(blocks.block_size, 1)
+
+    def test_run(self):
+        scheduler = _Scheduler(pause_at=2)
+        blocks = ScanBlocks(MultiScanManager(("a", RangeScan(0, 1, 3)),
+                                             ("b", ExplicitScan([10, 20]))),
+                            point_duration=1, block_duration=4,
+                            scheduler=scheduler)
+
+        calls = []
+        def kernel(a, b):
+            calls.append(len(a))
+            blocks.store(a + b)
+
+        results = blocks.run(kernel)
+        self.assertEqual(calls, [4, 2])
+        self.assertEqual(results.tolist(),
+                         [10.0, 20.0, 10.5, 20.5, 11.0, 21.0])
+        self.assertEqual(scheduler.checks, 1)
+        self.assertEqual(scheduler.pauses, 0)
+
+        scheduler = _Scheduler(pause_at=1)
+        blocks.scheduler = scheduler
+        blocks.run(kernel)
+        self.assertEqual(scheduler.pauses, 1)
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from artiq.language.core import (kernel, delay, parallel, sequential,
+                                 set_time_manager)
+from artiq.language.units import us, MHz
+from artiq.sim import devices, time
+
+
+class _DeviceManager:
+    def __init__(self, **kwargs):
+        self.core = devices.Core(self, **kwargs)
+
+    def get(self, name):
+        return self.core
+
+
+class _Experiment:
+    def __init__(self, dmgr):
+        self.core = dmgr.get("core")
+        self.ttl = devices.Output(dmgr, "ttl0")
+        self.dds = devices.WaveOutput(dmgr, "dds0")
+        self.dac = devices.VoltageOutput(dmgr, "dac0")
+
+    @kernel
+    def run(self):
+        with parallel:
+            self.ttl.pulse(2*us)
+            with sequential:
+                delay(1*us)
+                self.dds.pulse(100*MHz, 3*us)
+        self.ttl.on()
+        self.dac.set(1.5)
+
+
+class TimelineCase(unittest.TestCase):
+    def setUp(self):
+        self.global_manager = time.manager
+        # devices record their events in the module-level manager
+        time.manager = self.manager = time.Manager()
+        set_time_manager(self.manager)
+
+    def tearDown(self):
+        time.manager = self.global_manager
+        set_time_manager(self.global_manager)
+
+    def test_sorted(self):
+        timeline = time.Timeline()
+        events = [(3, "a"), (1, "b"), (3, "c"), (0, "d")] * 1000
+        for event in events:
+            timeline.append(event)
+        self.assertEqual(len(timeline), len(events))
+        self.assertEqual(list(timeline), events)
+        self.assertEqual(list(timeline.sorted()),
+                         sorted(events, key=lambda event: event[0]))
+        timeline.clear()
+        self.assertEqual(list(timeline.sorted()), [])
+
+    def test_format(self):
+        self.manager.timeline.append((2e-6, ("set", "ttl0", True)))
+        self.manager.timeline.append((1e-6, ("pulse", "ttl0", 1e-6)))
+        self.assertEqual(self.manager.format_timeline(),
+            "@0.000001000 (+0.000001000) pulse           ttl0            1e-06           \n"
+            "@0.000002000 (+0.000001000) set             ttl0            True            \n")
+
+    def test_core(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            timeline_file = os.path.join(tmpdir, "timeline.txt")
+            vcd_file = os.path.join(tmpdir, "timeline.vcd")
+            dmgr = _DeviceManager(timeline_file=timeline_file,
+                                  vcd_file=vcd_file)
+            _Experiment(dmgr).run()
+            self.assertEqual(len(self.manager.timeline), 0)
+            with open(timeline_file) as f:
+                self.assertEqual(len(f.readlines()), 4)
+            with open(vcd_file) as f:
+                vcd = f.read()
+
+        lines = vcd.splitlines()
+        self.assertEqual(lines[:7], [
+            "$timescale 1000ps $end",
+            "$var wire 1 ! ttl/ttl0 $end",
+            "$scope module dds/dds0 $end",
+            "$var wire 64 \" dds0/frequency $end",
+            "$upscope $end",
+            "$var wire 64 # dac/dac0 $end",
+            "#0",
+        ])
+        self.assertEqual([line for line in lines[7:] if line[0] in "#01"], [
+            "1!",
+            "#1000",
+            "#2000",
+            "0!",
+            "#4000",
+            "1!",
+        ])
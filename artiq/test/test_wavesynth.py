@@ -1,10 +1,19 @@
 # Copyright (C) 2014, 2015 Robert Jordens <jordens@gmail.com>
 
+import time
 import unittest
 
+import numpy as np
+
 from artiq.wavesynth import compute_samples
 
 
+class _ScalarChannel(compute_samples.Channel):
+    # Reference model, computing one sample at a time.
+    def next_block(self, n):
+        return np.array([self.next() for _ in range(n)])
+
+
 class TestSynthesizer(unittest.TestCase):
     program = [
         [
@@ -119,6 +128,64 @@ class TestSynthesizer(unittest.TestCase):
     def test_run(self):
         x, y = self.drive()
 
+    def test_scalar(self):
+        x, y = self.drive()
+        self.dev = compute_samples.Synthesizer(1, self.program)
+        self.dev.channels = [_ScalarChannel()]
+        x, y_scalar = self.drive()
+        np.testing.assert_allclose(y, y_scalar, rtol=1e-9, atol=1e-9)
+
+    def long_program(self, duration):
+        return [[
+            {
+                "duration": duration,
+                "channel_data": [
+                    {
+                        "bias": {"amplitude": [0.1, 1e-4, -1e-9, 1e-14]},
+                        "dds": {"amplitude": [1.0, 0.0, -1e-10],
+                                "phase": [0.0, 0.0123, 1e-8],
+                                "clear": True}
+                    },
+                    {
+                        "dds": {"amplitude": [0.5],
+                                "phase": [0.25, 0.1, 0.0, 1e-12]}
+                    }
+                ],
+                "trigger": True
+            },
+            {
+                "duration": duration,
+                "channel_data": [
+                    {"silence": True},
+                    {"bias": {"amplitude": [0.5, -1e-5]}}
+                ]
+            }
+        ]]
+
+    def synthesize(self, program, channel_cls=compute_samples.Channel):
+        dev = compute_samples.Synthesizer(2, program)
+        dev.channels = [channel_cls() for _ in dev.channels]
+        dev.select(0)
+        return np.array(dev.trigger())
+
+    def test_long(self):
+        program = self.long_program(10000)
+        y = self.synthesize(program)
+        y_scalar = self.synthesize(program, _ScalarChannel)
+        self.assertEqual(y.shape, (2, 20000))
+        np.testing.assert_allclose(y, y_scalar, rtol=1e-7, atol=1e-7)
+
+    def test_benchmark(self):
+        duration = 20000
+        program = self.long_program(duration)
+        t0 = time.monotonic()
+        self.synthesize(program)
+        t1 = time.monotonic()
+        self.synthesize(program, _ScalarChannel)
+        t2 = time.monotonic()
+        print("{} samples: vectorized {:.1f} ms, scalar {:.1f} ms".format(
+            4*duration, (t1 - t0)*1e3, (t2 - t1)*1e3))
+
     @unittest.skip("manual/visual test")
     def test_plot(self):
         from matplotlib import pyplot as plt
@@ -1,12 +1,64 @@
 # Copyright (C) 2014, 2015 Robert Jordens <jordens@gmail.com>
 
+from collections import OrderedDict
+
 import numpy as np
 from scipy.interpolate import splrep, splev, spalde
 
 
+class _LRUCache:
+    """A dictionary holding at most `size` entries, evicting the least
+    recently used ones first."""
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def _array_key(a):
+    """Return a hashable key identifying the contents of the array `a`."""
+    a = np.ascontiguousarray(a)
+    return a.dtype.str, a.shape, a.tobytes()
+
+
+# Fitted splines, keyed by the data they were fitted to. Fits are
+# deterministic, so sources built from identical data share one spline.
+_spline_cache = _LRUCache(64)
+
+# Evaluations of all splines, keyed by the spline and the sample positions.
+_evaluation_cache = _LRUCache(256)
+
+
+def clear_cache():
+    """Forget all memoized spline fits and evaluations, e.g. to release
+    their memory after a parameter sweep."""
+    _spline_cache.clear()
+    _evaluation_cache.clear()
+
+
 class UnivariateMultiSpline:
     """Multidimensional wrapper around `scipy.interpolate.sp*` functions.
     `scipy.inteprolate.splprep` is limited to 12 dimensions.
+
+    Evaluations with :meth:`__call__` are memoized, keyed by the sample
+    positions, and each call returns a copy of the memoized array. At most
+    256 evaluations are kept in total, across all splines; see also
+    :func:`clear_cache`.
     """
     def __init__(self, x, y, *, x0=None, order=4, **kwargs):
         self.order = order
@@ -17,6 +69,17 @@ class UnivariateMultiSpline:
                 yi = self.upsample_knots(x0[i], yi, x)
             self.s.append(splrep(x, yi, k=order - 1, **kwargs))
 
+    @classmethod
+    def cached(cls, x, y, *, order=4):
+        """Return a spline fitted to `x` and `y`, reusing a previous fit
+        to the same data if there is one."""
+        key = _array_key(x), _array_key(y), order
+        spline = _spline_cache.get(key)
+        if spline is None:
+            spline = cls(x, y, order=order)
+            _spline_cache.put(key, spline)
+        return spline
+
     def upsample_knots(self, x0, y0, x):
         return splev(x, splrep(x0, y0, k=self.order - 1))
 
@@ -30,6 +93,19 @@ class UnivariateMultiSpline:
         return u
 
     def __call__(self, x, use_alde=True):
+        return self._evaluate_cached(x, use_alde).copy()
+
+    def _evaluate_cached(self, x, use_alde):
+        key = self, _array_key(x), use_alde
+        y = _evaluation_cache.get(key)
+        if y is None:
+            y = self._evaluate(x, use_alde)
+            # The memoized array is never handed out, only copies of it.
+            y.flags.writeable = False
+            _evaluation_cache.put(key, y)
+        return y
+
+    def _evaluate(self, x, use_alde):
         if use_alde:
             u = self.alde(x)[:, :, :self.order]
             s = (len(self.s), len(x), self.order)
@@ -65,17 +141,20 @@ def build_segment(durations, coefficients, target="bias",
     :param variable: The variable within the target component.
     :param compress: If `True`, skip zero high order coefficients.
     """
-    for dxi, yi in zip(durations, coefficients.transpose()):
-        cd = []
-        for yij in yi:
-            cdj = []
-            for yijk in reversed(yij):
-                if cdj or abs(yijk) or not compress:
-                    cdj.append(float(yijk))
-            cdj.reverse()
-            if not cdj:
-                cdj.append(float(yij[0]))
-            cd.append({target: {variable: cdj}})
+    coefficients = np.asanyarray(coefficients)
+    if compress:
+        # number of coefficients up to the highest order non-zero one,
+        # at least one
+        nonzero = coefficients != 0
+        lengths = np.where(nonzero.any(axis=0),
+                           len(nonzero) - np.argmax(nonzero[::-1], axis=0), 1)
+        lengths = lengths.transpose().tolist()
+    else:
+        lengths = np.full(coefficients.shape[:0:-1],
+                          coefficients.shape[0]).tolist()
+    for dxi, yi, li in zip(np.asanyarray(durations).tolist(),
+                           coefficients.transpose().tolist(), lengths):
+        cd = [{target: {variable: yij[:lij]}} for yij, lij in zip(yi, li)]
         yield {"duration": int(dxi), "channel_data": cd}
 
 
@@ -171,7 +250,7 @@ class SplineSource(CoefficientSource):
             self.y = pad_const(self.y, order, axis=1)
 
         assert self.y.shape[1] == self.x.shape[0]
-        self.spline = UnivariateMultiSpline(self.x, self.y, order=order)
+        self.spline = UnivariateMultiSpline.cached(self.x, self.y, order=order)
 
     def crop_x(self, start, stop):
         ia, ib = np.searchsorted(self.x, (start, stop))
@@ -223,6 +302,11 @@ def discrete_compensate(c):
     target devices.
 
     The compensation is performed in-place.
+
+    :param c: Sequence of coefficients, lowest order first. This can
+        also be an array of shape `(order, ...)`, e.g. the coefficients
+        returned by `CoefficientSource.__call__()`, to compensate the
+        coefficients of many lines and channels at once.
     """
     l = len(c)
     if l > 2:
@@ -4,9 +4,35 @@
 from copy import copy
 from math import cos, pi
 
+import numpy as np
+
 from artiq.wavesynth.coefficients import discrete_compensate
 
 
+# Number of samples evaluated at once by the vectorized methods. Between
+# blocks the accumulator state is advanced, which keeps the binomial
+# coefficients (and the rounding errors) small.
+_block_size = 4096
+
+
+def _binomials(n, order):
+    """Return the array ``b`` with ``b[k, t] == binomial(t, k)``
+    for ``k < order`` and ``t < n``."""
+    t = np.arange(n, dtype=np.float64)
+    b = np.empty((order, n))
+    b[0] = 1.
+    for k in range(1, order):
+        b[k] = b[k - 1]*(t - (k - 1))/k
+    return b
+
+
+def _advance(c, n):
+    """Return the state of the accumulators ``c`` after ``n`` steps."""
+    b = _binomials(n + 1, len(c))[:, n]
+    return [float(sum(c[k + j]*b[j] for j in range(len(c) - k)))
+            for k in range(len(c))]
+
+
 class Spline:
     def __init__(self):
         self.c = [0.0]
@@ -23,6 +49,16 @@ class Spline:
             self.c[i] += self.c[i + 1]
         return r
 
+    def next_block(self, n):
+        """Return the next ``n`` samples as an array; equivalent to
+        calling :meth:`next` ``n`` times."""
+        r = np.empty(n)
+        for start in range(0, n, _block_size):
+            m = min(n - start, _block_size)
+            r[start:start + m] = np.dot(self.c, _binomials(m, len(self.c)))
+            self.c = _advance(self.c, m)
+        return r
+
 
 class SplinePhase:
     def __init__(self):
@@ -47,6 +83,14 @@ class SplinePhase:
             self.c[i] %= 1.0
         return r + self.c0
 
+    def next_block(self, n):
+        r = np.empty(n)
+        for start in range(0, n, _block_size):
+            m = min(n - start, _block_size)
+            r[start:start + m] = np.dot(self.c, _binomials(m, len(self.c))) % 1.0
+            self.c = [ci % 1.0 for ci in _advance(self.c, m)]
+        return r + self.c0
+
 
 class DDS:
     def __init__(self):
@@ -56,6 +100,9 @@ class DDS:
     def next(self):
         return self.amplitude.next()*cos(2*pi*self.phase.next())
 
+    def next_block(self, n):
+        return self.amplitude.next_block(n)*np.cos(2*pi*self.phase.next_block(n))
+
 
 class Channel:
     def __init__(self):
@@ -70,6 +117,14 @@ class Channel:
             self.v = v
         return self.v
 
+    def next_block(self, n):
+        v = self.bias.next_block(n) + self.dds.next_block(n)
+        if self.silence:
+            return np.full(n, self.v)
+        if n:
+            self.v = float(v[-1])
+        return v
+
     def set_silence(self, s):
         self.silence = s
 
@@ -121,8 +176,7 @@ class Synthesizer:
                 raise NotImplementedError
 
             for channel, rc in zip(self.channels, r):
-                for i in range(line["duration"]):
-                    rc.append(channel.next())
+                rc.extend(channel.next_block(line["duration"]).tolist())
 
             try:
                 self.line = line = next(self.line_iter)